@@ -1,18 +1,89 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 
-def create_app() -> FastAPI:
+from app.api.config import ADMIN_ENABLED, ADMIN_TOKEN, METRICS_ENABLED
+from app.services.cache.config import CACHE_BACKEND
+from app.services.cache.two_tier import close_cache_backend, open_cache_backend
+from app.services.http.clients import close_clients, open_clients
+from app.services.music.config import TRACK_SNAPSHOT_PATH
+from app.services.music.music_service import (
+    load_track_snapshot,
+    save_track_snapshot,
+    tag_pool_cache,
+)
+from app.services.prewarm.config import (
+    PREWARM_CITIES,
+    PREWARM_CONCURRENCY,
+    PREWARM_ENABLED,
+    PREWARM_TIMEOUT,
+)
+from app.services.prewarm.prewarm_service import prewarm
+from app.services.tracing.config import TRACE_EXPORTER
+from app.services.tracing.exporters import close_tracing, open_tracing
+from app.services.weather.city_index import city_index
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_app(
+    transports: Optional[Dict[str, httpx.AsyncBaseTransport]] = None,
+) -> FastAPI:
     """
     Create and configure the FastAPI application
     
+    Args:
+        transports: Optional mapping of upstream name to httpx transport,
+            used to route upstream calls to a local transport in tests
+
     Returns:
         FastAPI: The configured FastAPI application
     """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.ready = False
+        # Open pooled upstream clients once and share them across requests
+        await open_clients(transports)
+        # Share cached upstream results with the other workers and nodes
+        open_cache_backend(CACHE_BACKEND)
+        # Export sampled request spans to a file or a collector
+        open_tracing(TRACE_EXPORTER)
+        # Serve tag pools from the last snapshot until Last.fm refreshes them
+        if TRACK_SNAPSHOT_PATH:
+            load_track_snapshot(TRACK_SNAPSHOT_PATH)
+        # Parse the city index off the event loop, before the first lookup
+        await asyncio.to_thread(city_index.load)
+        try:
+            # Warm the caches before reporting ready so no traffic hits a cold pod
+            if PREWARM_ENABLED:
+                await prewarm(PREWARM_CITIES, PREWARM_CONCURRENCY, PREWARM_TIMEOUT)
+                if TRACK_SNAPSHOT_PATH:
+                    save_track_snapshot(TRACK_SNAPSHOT_PATH)
+            app.state.ready = True
+            yield
+        finally:
+            app.state.ready = False
+            await tag_pool_cache.aclose()
+            if TRACK_SNAPSHOT_PATH:
+                save_track_snapshot(TRACK_SNAPSHOT_PATH)
+            await close_cache_backend()
+            await close_tracing()
+            await close_clients()
+
     app = FastAPI(
         title="Mood-Weather-Music API",
         description="An API that recommends songs based on user's mood and weather in their city",
         version="1.0.0",
+        lifespan=lifespan,
     )
     
     # Configure CORS
@@ -24,9 +95,25 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
-    # Import and include API router
+    # Import and include API routers
     from app.api.endpoints import router
+    from app.api.health import router as health_router
     app.include_router(router)
+    app.include_router(health_router)
+
+    # Profiling routes are only mounted on request and never without a token
+    if ADMIN_ENABLED:
+        if ADMIN_TOKEN:
+            from app.api.admin import router as admin_router
+            app.include_router(admin_router)
+        else:
+            logger.warning("ADMIN_ENABLED is set but ADMIN_TOKEN is empty, not mounting /admin")
+
+    # Export Prometheus metrics and time every request
+    if METRICS_ENABLED:
+        from app.api.metrics import MetricsMiddleware, router as metrics_router
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
     
     # Custom OpenAPI schema
     def custom_openapi():
@@ -0,0 +1,137 @@
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.config import ADMIN_TOKEN
+from app.api.models import MemoryDiffResponse, MemorySnapshot, ProfilerStatus
+from app.error.exceptions import ProfilingError
+from app.error.models import ErrorResponse
+from app.services.profiling.memory import (
+    compare_snapshots,
+    start_tracemalloc,
+    stop_tracemalloc,
+    take_snapshot,
+)
+from app.services.profiling.sampler import profiler
+
+
+async def require_admin_token(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Allow only requests carrying "Authorization: Bearer <ADMIN_TOKEN>"
+
+    Raises:
+        HTTPException: 401 if the token is missing or wrong
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if (
+        not ADMIN_TOKEN
+        or scheme.lower() != "bearer"
+        or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+    ):
+        raise HTTPException(
+            status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_token)],
+    responses={
+        401: {"model": ErrorResponse, "description": "Invalid admin token"},
+        409: {"model": ErrorResponse, "description": "Conflicts with the profiler state"},
+    },
+)
+
+
+@router.get("/profiler", response_model=ProfilerStatus)
+async def profiler_status() -> ProfilerStatus:
+    """
+    Report whether the sampling profiler is running
+    """
+    return ProfilerStatus(**profiler.stats())
+
+
+@router.post("/profiler/start", response_model=ProfilerStatus)
+async def start_profiler(
+    interval: Optional[float] = Query(None, gt=0, le=1, description="Seconds between samples"),
+) -> ProfilerStatus:
+    """
+    Start sampling the worker's event loop thread
+
+    It stops on its own after PROFILER_MAX_DURATION seconds.
+    """
+    try:
+        profiler.start(interval)
+    except ProfilingError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return ProfilerStatus(**profiler.stats())
+
+
+@router.post(
+    "/profiler/stop",
+    response_class=PlainTextResponse,
+    responses={200: {"description": "Collapsed stacks, one 'outer;inner count' per line"}},
+)
+async def stop_profiler() -> PlainTextResponse:
+    """
+    Stop the profiler and download the collapsed stacks, ready for
+    flamegraph.pl, speedscope or inferno
+    """
+    try:
+        collapsed = await asyncio.to_thread(profiler.stop)
+    except ProfilingError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(
+        collapsed, headers={"Content-Disposition": 'attachment; filename="profile.folded"'}
+    )
+
+
+@router.post("/tracemalloc/start", status_code=204)
+async def start_memory_tracing() -> None:
+    """
+    Start tracing allocations; this slows every allocation down until stopped
+    """
+    start_tracemalloc()
+
+
+@router.post("/tracemalloc/stop", status_code=204)
+async def stop_memory_tracing() -> None:
+    """
+    Stop tracing allocations and drop the snapshots
+    """
+    stop_tracemalloc()
+
+
+@router.post("/tracemalloc/snapshots", response_model=MemorySnapshot)
+async def create_memory_snapshot() -> MemorySnapshot:
+    """
+    Snapshot the traced allocations for a later diff
+    """
+    try:
+        return MemorySnapshot(**await asyncio.to_thread(take_snapshot))
+    except ProfilingError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get(
+    "/tracemalloc/diff",
+    response_model=MemoryDiffResponse,
+    responses={404: {"model": ErrorResponse, "description": "Unknown snapshot"}},
+)
+async def diff_memory_snapshots(
+    old_id: int = Query(..., alias="from"),
+    new_id: int = Query(..., alias="to"),
+    limit: int = Query(20, ge=1, le=500),
+) -> MemoryDiffResponse:
+    """
+    Show the source lines whose allocations changed most between two snapshots
+    """
+    try:
+        lines = await asyncio.to_thread(compare_snapshots, old_id, new_id, limit)
+    except ProfilingError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return MemoryDiffResponse(old_id=old_id, new_id=new_id, lines=lines)
@@ -0,0 +1,26 @@
+import os
+
+# Overall time budget in seconds for one /recommendations request; the stages
+# run concurrently, so this is the limit that normally ends a slow request
+RECOMMENDATION_DEADLINE = float(os.getenv("RECOMMENDATION_DEADLINE", "4"))
+
+# Per-stage time limits in seconds, capped by what is left of the deadline;
+# they only take effect when set below RECOMMENDATION_DEADLINE
+WEATHER_STAGE_TIMEOUT = float(os.getenv("WEATHER_STAGE_TIMEOUT", "5"))
+MUSIC_STAGE_TIMEOUT = float(os.getenv("MUSIC_STAGE_TIMEOUT", "5"))
+
+# Seconds a rendered /recommendations response is reused for the same mood,
+# city and weather (0 disables the response cache), and max responses kept
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "0"))
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "10000"))
+
+# Serve Prometheus metrics at /metrics and time every request
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Add a Server-Timing header with the stage durations to /recommendations responses
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Mount the /admin profiling routes; they also need ADMIN_TOKEN, sent as
+# "Authorization: Bearer <token>"
+ADMIN_ENABLED = os.getenv("ADMIN_ENABLED", "false").lower() == "true"
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, Awaitable, List, Type
+
+
+class Deadline:
+    """Time budget shared by the stages of a single request"""
+
+    def __init__(self, budget: float):
+        self._expires_at = asyncio.get_running_loop().time() + budget
+
+    def remaining(self) -> float:
+        """
+        Seconds left before the deadline expires
+
+        Returns:
+            Remaining time in seconds, never negative
+        """
+        return max(0.0, self._expires_at - asyncio.get_running_loop().time())
+
+    def stage_timeout(self, limit: float) -> float:
+        """
+        Carve a stage timeout out of the remaining budget
+
+        Args:
+            limit: The stage's own time limit in seconds
+
+        Returns:
+            The smaller of the stage limit and the remaining budget
+        """
+        return min(limit, self.remaining())
+
+
+async def run_stage(
+    stage: Awaitable[Any], timeout: float, error: Type[Exception], name: str
+) -> Any:
+    """
+    Await a stage, cancelling it once its timeout runs out
+
+    Args:
+        stage: The awaitable doing the stage's work
+        timeout: Time limit in seconds
+        error: Exception class raised when the stage times out
+        name: Human-readable stage name used in the error message
+
+    Returns:
+        The stage's result
+
+    Raises:
+        error: If the stage does not finish within the timeout
+    """
+    try:
+        return await asyncio.wait_for(stage, timeout)
+    except asyncio.TimeoutError:
+        raise error(f"{name} timed out after {timeout:.2f}s")
+
+
+async def gather_stages(*stages: Awaitable[Any]) -> List[Any]:
+    """
+    Run stages concurrently and return their results in order
+
+    If any stage fails, the others are cancelled before the error is re-raised,
+    so the request stops waiting on them. Upstream loads shared through the
+    single-flight caches are shielded from that cancellation and keep running
+    to fill the cache for later requests.
+
+    Args:
+        stages: Awaitables to run concurrently
+
+    Returns:
+        List of stage results in the order given
+    """
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
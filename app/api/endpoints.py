@@ -1,11 +1,48 @@
-from fastapi import APIRouter, HTTPException
+import math
+from typing import Annotated, Dict, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import Response
+from app.api.config import (
+    MUSIC_STAGE_TIMEOUT,
+    RECOMMENDATION_DEADLINE,
+    RESPONSE_CACHE_TTL,
+    SERVER_TIMING,
+    WEATHER_STAGE_TIMEOUT,
+)
+from app.api.deadline import Deadline, gather_stages, run_stage
+from app.api.response_cache import (
+    cache_response,
+    entity_tag,
+    etag_matches,
+    get_cached_response,
+)
+from app.api.responses import DuplexStreamingResponse
+from app.api.serialization import render_mood_response
+from app.api.timing import collect_server_timing, server_timing_header, stage, timed
 from app.error.models import ErrorResponse
+from app.services.tracing.tracer import tracer
 from app.services.explanation.music_explanation import generate_explanation
 from app.services.mood.models import MoodRequest, MoodResponse
+from app.services.weather.models import WeatherData
 from app.services.weather.weather_service import get_weather_for_city
 from app.services.mood.mood_service import match_mood_with_weather
 from app.services.music.music_service import get_song_recommendation
-from app.error.exceptions import WeatherAPIError, MusicAPIError
+from app.services.recommendation.config import (
+    BATCH_UPSTREAM_CONCURRENCY,
+    STREAM_CONCURRENCY,
+    STREAM_MAX_LINE_BYTES,
+    STREAM_QUEUE_SIZE,
+)
+from app.services.recommendation.models import (
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+)
+from app.services.recommendation.recommendation_service import (
+    recommend_batch,
+    stream_recommendations,
+)
+from app.error.exceptions import WeatherAPIError, MusicAPIError, find_upstream_unavailable_error
 
 router = APIRouter(
     prefix="/api/v1",
@@ -18,48 +55,63 @@ router = APIRouter(
     }
 )
 
-@router.post("/recommendations", response_model=MoodResponse, status_code=200)
-async def get_mood_based_recommendation(request: MoodRequest) -> MoodResponse:
+def _retry_after_headers(error: Exception) -> Optional[Dict[str, str]]:
+    """Tell the client when to retry if an upstream refused the call for a while"""
+    unavailable = find_upstream_unavailable_error(error)
+    if unavailable is None:
+        return None
+    return {"Retry-After": str(max(1, math.ceil(unavailable.retry_after)))}
+
+
+async def _recommend(request: MoodRequest) -> Tuple[MoodResponse, WeatherData]:
     """
-    Get a song recommendation based on the user's mood and weather in their city.
-    
-    - Takes the user's current mood and city
-    - Fetches the current weather in the city
-    - Checks if the mood matches the weather
-    - Provides a song recommendation to match the mood
-    
+    Build the recommendation for a mood and city
+
     Args:
         request: The mood and city information
-        
+
     Returns:
-        A response containing weather information, mood-weather match status, and song recommendation
-        
+        Tuple of the response and the weather it was built from
+
     Raises:
         HTTPException: If there's an error with the weather API, music API, or if the city is not found
     """
     try:
-        # Get weather data for the city
-        weather_data = await get_weather_for_city(request.city)
-        
-        # Check if mood matches weather
-        mood_matches_weather = match_mood_with_weather(
-            request.mood, 
-            weather_data
+        # Weather and song only depend on the request, so fetch them together
+        deadline = Deadline(RECOMMENDATION_DEADLINE)
+        weather_data, song = await gather_stages(
+            run_stage(
+                timed("weather", get_weather_for_city(request.city)),
+                deadline.stage_timeout(WEATHER_STAGE_TIMEOUT),
+                WeatherAPIError,
+                "Weather lookup",
+            ),
+            run_stage(
+                timed("song", get_song_recommendation(request.mood)),
+                deadline.stage_timeout(MUSIC_STAGE_TIMEOUT),
+                MusicAPIError,
+                "Song lookup",
+            ),
         )
-        
-        # Get song recommendation
-        song = await get_song_recommendation(request.mood)
+
+        # Check if mood matches weather
+        with stage("match"):
+            mood_matches_weather = match_mood_with_weather(
+                request.mood, 
+                weather_data
+            )
         
         # Get explanation
-        explanation = generate_explanation(
-            mood=request.mood.value,
-            weather=weather_data,
-            song=song,
-            city=request.city,
-            matches=mood_matches_weather,
-        )
+        with stage("explanation"):
+            explanation = generate_explanation(
+                mood=request.mood.value,
+                weather=weather_data,
+                song=song,
+                city=request.city,
+                matches=mood_matches_weather,
+            )
         # Create and return the response
-        return MoodResponse(
+        response = MoodResponse(
             mood=request.mood,
             city=request.city,
             weather=weather_data,
@@ -67,10 +119,210 @@ async def get_mood_based_recommendation(request: MoodRequest) -> MoodResponse:
             recommendation=song,
             explanation=explanation
         )
+        return response, weather_data
         
     except WeatherAPIError as e:
-        raise HTTPException(status_code=503, detail=f"Weather service error: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Weather service error: {str(e)}",
+            headers=_retry_after_headers(e),
+        )
     except MusicAPIError as e:
-        raise HTTPException(status_code=503, detail=f"Music service error: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Music service error: {str(e)}",
+            headers=_retry_after_headers(e),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+
+async def _recommendation_response(
+    request: MoodRequest,
+    if_none_match: Optional[str],
+    traceparent: Optional[str],
+    headers: Dict[str, str],
+) -> Response:
+    """
+    Serve a recommendation from the response cache or build and cache it
+
+    Args:
+        request: The mood and city information
+        if_none_match: The request's If-None-Match header, if any
+        traceparent: The request's W3C traceparent header, if any
+        headers: Extra headers for the response, e.g. Cache-Control
+
+    Returns:
+        The rendered JSON response, or 304 Not Modified if the client
+        already has it
+    """
+    with tracer.trace(
+        "recommendation", traceparent, mood=request.mood.value, city=request.city
+    ) as span, collect_server_timing(SERVER_TIMING) as timings:
+        cached = get_cached_response(request.mood, request.city)
+        if cached is not None:
+            body, etag = cached
+        else:
+            response, weather_data = await _recommend(request)
+            with stage("serialization"):
+                body = render_mood_response(response)
+            etag = entity_tag(request.mood, request.city, weather_data)
+            cache_response(request.mood, request.city, weather_data, body, etag)
+        if span is not None:
+            span.set_attribute("response_cache.hit", cached is not None)
+
+    headers = {"ETag": etag, **headers}
+    if timings is not None:
+        headers["Server-Timing"] = (
+            "cache;desc=hit" if cached is not None else server_timing_header(timings)
+        )
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.post(
+    "/recommendations",
+    response_model=MoodResponse,
+    status_code=200,
+    responses={304: {"description": "Not modified"}},
+)
+async def get_mood_based_recommendation(
+    request: MoodRequest,
+    if_none_match: Optional[str] = Header(None),
+    traceparent: Optional[str] = Header(None),
+) -> Response:
+    """
+    Get a song recommendation based on the user's mood and weather in their city.
+    
+    - Takes the user's current mood and city
+    - Fetches the current weather in the city and a song recommendation
+      to match the mood concurrently, within one request deadline
+    - Checks if the mood matches the weather
+    - Tags the response with a weak ETag per mood, city and weather bucket
+      and answers 304 Not Modified when it matches If-None-Match
+    - Reports the stage durations in a Server-Timing header when enabled
+    
+    Args:
+        request: The mood and city information
+        if_none_match: ETags of responses the client already has
+        traceparent: W3C trace context of the caller, if it traces the request
+        
+    Returns:
+        A response containing weather information, mood-weather match status, and song recommendation
+        
+    Raises:
+        HTTPException: If there's an error with the weather API, music API, or if the city is not found
+    """
+    return await _recommendation_response(request, if_none_match, traceparent, {})
+
+
+@router.get(
+    "/recommendations",
+    response_model=MoodResponse,
+    status_code=200,
+    responses={304: {"description": "Not modified"}},
+)
+async def get_cacheable_recommendation(
+    request: Annotated[MoodRequest, Query()],
+    if_none_match: Optional[str] = Header(None),
+    traceparent: Optional[str] = Header(None),
+) -> Response:
+    """
+    Get a song recommendation like POST /recommendations, with the mood and
+    city as query parameters so CDNs and clients can cache the response.
+
+    Args:
+        request: The mood and city information
+        if_none_match: ETags of responses the client already has
+        traceparent: W3C trace context of the caller, if it traces the request
+
+    Returns:
+        A response containing weather information, mood-weather match status, and song recommendation
+
+    Raises:
+        HTTPException: If there's an error with the weather API, music API, or if the city is not found
+    """
+    if RESPONSE_CACHE_TTL > 0:
+        cache_control = f"public, max-age={math.ceil(RESPONSE_CACHE_TTL)}"
+    else:
+        cache_control = "no-cache"
+    return await _recommendation_response(
+        request, if_none_match, traceparent, {"Cache-Control": cache_control}
+    )
+
+
+@router.post(
+    "/recommendations/batch", response_model=BatchRecommendationResponse, status_code=200
+)
+async def get_batch_recommendations(
+    request: BatchRecommendationRequest,
+) -> BatchRecommendationResponse:
+    """
+    Get song recommendations for many mood and city pairs in one call.
+
+    - Fetches the weather of each distinct city and the tracks of each
+      distinct mood tag only once
+    - Keeps the number of concurrent upstream calls bounded
+    - Returns a result or an error for every item, so one bad city does not
+      fail the whole batch
+
+    Args:
+        request: The list of mood and city pairs
+
+    Returns:
+        A response with one result per item, in request order
+    """
+    results = await recommend_batch(request.items, BATCH_UPSTREAM_CONCURRENCY)
+    return BatchRecommendationResponse(results=results)
+
+
+@router.post(
+    "/recommendations/stream",
+    response_class=DuplexStreamingResponse,
+    status_code=200,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {
+                    "schema": {"$ref": "#/components/schemas/MoodRequest"}
+                }
+            },
+        }
+    },
+    responses={
+        200: {
+            "content": {
+                "application/x-ndjson": {
+                    "schema": {"$ref": "#/components/schemas/BatchItemResult"}
+                }
+            },
+            "description": "One BatchItemResult per line, in completion order",
+        }
+    },
+)
+async def stream_batch_recommendations(request: Request) -> DuplexStreamingResponse:
+    """
+    Stream song recommendations for a large number of mood and city pairs.
+
+    - Reads the request body as newline-delimited JSON, one MoodRequest per line
+    - Writes one BatchItemResult per line as soon as each item completes
+    - Reads and processes items only as fast as the client consumes results,
+      so memory use stays constant regardless of the number of items
+
+    Args:
+        request: The raw request whose body is the NDJSON item stream
+
+    Returns:
+        A streaming NDJSON response
+    """
+    results = stream_recommendations(
+        request.stream(), STREAM_CONCURRENCY, STREAM_QUEUE_SIZE, STREAM_MAX_LINE_BYTES
+    )
+
+    async def body():
+        async for result in results:
+            yield result.model_dump_json().encode() + b"\n"
+
+    return DuplexStreamingResponse(body(), media_type="application/x-ndjson")
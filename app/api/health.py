@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from app.api.models import (
+    CacheStats,
+    CacheStatsResponse,
+    CircuitBreakerStats,
+    HealthResponse,
+    HedgingStats,
+    RateLimiterStats,
+    UpstreamStatsResponse,
+)
+from app.api.metrics import cache_stats as collect_cache_stats
+from app.services.http.clients import circuit_breakers, hedgers, rate_limiters
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"],
+)
+
+
+@router.get("/live", response_model=HealthResponse)
+async def liveness() -> HealthResponse:
+    """
+    Report that the process is up and serving requests
+    """
+    return HealthResponse(status="ok")
+
+
+@router.get(
+    "/ready",
+    response_model=HealthResponse,
+    responses={503: {"model": HealthResponse, "description": "Not ready"}},
+)
+async def readiness(request: Request):
+    """
+    Report whether the app has finished startup, including cache prewarm,
+    and can take traffic
+    """
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return HealthResponse(status="ready")
+
+
+@router.get("/upstreams", response_model=UpstreamStatsResponse)
+async def upstream_stats() -> UpstreamStatsResponse:
+    """
+    Report the rate limiter, circuit breaker and hedging state of each upstream
+    """
+    return UpstreamStatsResponse(
+        rate_limiters={
+            upstream: RateLimiterStats(**bucket.stats())
+            for upstream, bucket in rate_limiters.items()
+        },
+        circuit_breakers={
+            upstream: CircuitBreakerStats(**breaker.stats())
+            for upstream, breaker in circuit_breakers.items()
+        },
+        hedging={
+            upstream: HedgingStats(**hedger.stats())
+            for upstream, hedger in hedgers.items()
+        },
+    )
+
+
+@router.get("/caches", response_model=CacheStatsResponse)
+async def cache_stats() -> CacheStatsResponse:
+    """
+    Report the hit ratio of each cache, including the negative city cache
+    and the distributed (L2) cache when one is configured
+    """
+    return CacheStatsResponse(
+        caches={name: CacheStats(**stats) for name, stats in collect_cache_stats().items()}
+    )
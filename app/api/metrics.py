@@ -0,0 +1,142 @@
+import time
+from typing import Any, Dict, Iterable, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.api.response_cache import response_cache
+from app.services.cache import two_tier
+from app.services.http.clients import circuit_breakers, rate_limiters
+from app.services.metrics.metrics import http_in_flight, http_latency, registry
+from app.services.music.music_service import failed_tag_cache, tag_pool_cache
+from app.services.weather.weather_service import negative_city_cache, weather_cache
+
+router = APIRouter(tags=["metrics"])
+
+# Request methods kept as label values; any other method is labelled "other"
+HTTP_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE")
+)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Collect the counters of every cache
+
+    Returns:
+        Mapping of cache name to its stats, including the distributed (L2)
+        cache when one is configured
+    """
+    caches = {
+        "weather": weather_cache.stats(),
+        "negative_city": negative_city_cache.stats(),
+        "tag_pool": tag_pool_cache.stats(),
+        "failed_tag": failed_tag_cache.stats(),
+        "response": response_cache.stats(),
+    }
+    if two_tier.cache_backend is not None:
+        caches["l2"] = two_tier.cache_backend.stats()
+    return caches
+
+
+def _cache_samples(field: str) -> Iterable[Tuple[Dict[str, str], float]]:
+    for name, stats in cache_stats().items():
+        if field in stats:
+            yield {"cache": name}, stats[field]
+
+
+registry.collect(
+    "mwm_cache_hits_total", "Cache lookups answered from the cache", "counter",
+    lambda: _cache_samples("hits"),
+)
+registry.collect(
+    "mwm_cache_misses_total", "Cache lookups that had to load the value", "counter",
+    lambda: _cache_samples("misses"),
+)
+registry.collect(
+    "mwm_cache_hit_ratio", "Share of cache lookups answered from the cache", "gauge",
+    lambda: _cache_samples("hit_ratio"),
+)
+registry.collect(
+    "mwm_cache_entries", "Entries currently held by a cache", "gauge",
+    lambda: _cache_samples("size"),
+)
+registry.collect(
+    "mwm_circuit_breaker_open", "Whether an upstream's circuit breaker refuses calls", "gauge",
+    lambda: (
+        ({"upstream": upstream}, float(breaker.stats()["state"] != "closed"))
+        for upstream, breaker in circuit_breakers.items()
+    ),
+)
+registry.collect(
+    "mwm_rate_limit_waited_total", "Upstream calls that queued for a rate limit token", "counter",
+    lambda: (
+        ({"upstream": upstream}, bucket.stats()["waited"])
+        for upstream, bucket in rate_limiters.items()
+    ),
+)
+registry.collect(
+    "mwm_rate_limit_upstream_429_total",
+    "Upstream 429 answers that paused the rate limiter",
+    "counter",
+    lambda: (
+        ({"upstream": upstream}, bucket.stats()["throttled"])
+        for upstream, bucket in rate_limiters.items()
+    ),
+)
+registry.collect(
+    "mwm_rate_limit_rejected_total", "Upstream calls refused by the rate limiter", "counter",
+    lambda: (
+        ({"upstream": upstream}, bucket.stats()["rejected"])
+        for upstream, bucket in rate_limiters.items()
+    ),
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting in-flight HTTP requests and timing each one
+
+    Requests are labelled with their route template rather than the raw
+    path, and with "other" for non-standard methods, so clients cannot grow
+    the number of series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            with http_in_flight.track_inprogress():
+                await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_latency.observe(
+                time.perf_counter() - started,
+                method=scope["method"] if scope["method"] in HTTP_METHODS else "other",
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Export the process's metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,100 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class HealthResponse(BaseModel):
+    """Model for liveness and readiness probe responses"""
+
+    status: str
+
+
+class CacheStats(BaseModel):
+    """Model for the lookup counters of one cache"""
+
+    size: Optional[int] = None
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class CacheStatsResponse(BaseModel):
+    """Model for the counters of every cache, keyed by cache name"""
+
+    caches: Dict[str, CacheStats]
+
+
+class RateLimiterStats(BaseModel):
+    """Model for the state of one upstream's rate limiter"""
+
+    tokens: float
+    queued: int
+    rate_per_minute: float
+    burst: int
+    granted: int
+    waited: int
+    rejected: int
+    throttled: int
+
+
+class CircuitBreakerStats(BaseModel):
+    """Model for the state of one upstream's circuit breaker"""
+
+    state: str
+    calls: int
+    failures: int
+    slow_calls: int
+    opened: int
+    rejected: int
+
+
+class HedgingStats(BaseModel):
+    """Model for the hedging policy of one upstream"""
+
+    hedge_delay: Optional[float]
+    hedged: int
+    hedge_wins: int
+
+
+class UpstreamStatsResponse(BaseModel):
+    """Model for the rate limiter, circuit breaker and hedging state of every upstream"""
+
+    rate_limiters: Dict[str, RateLimiterStats]
+    circuit_breakers: Dict[str, CircuitBreakerStats]
+    hedging: Dict[str, HedgingStats]
+
+
+class ProfilerStatus(BaseModel):
+    """Model for the state of the sampling profiler"""
+
+    running: bool
+    interval: float
+    samples: int
+    elapsed: Optional[float]
+
+
+class MemorySnapshot(BaseModel):
+    """Model for a tracemalloc snapshot"""
+
+    id: int
+    taken_at: float
+    traced_bytes: int
+    peak_bytes: int
+
+
+class MemoryDiffEntry(BaseModel):
+    """Model for the allocation change of one source line between two snapshots"""
+
+    location: str
+    size_diff: int
+    count_diff: int
+    size: int
+    count: int
+
+
+class MemoryDiffResponse(BaseModel):
+    """Model for the largest allocation changes between two snapshots"""
+
+    old_id: int
+    new_id: int
+    lines: List[MemoryDiffEntry]
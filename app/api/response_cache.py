@@ -0,0 +1,115 @@
+import hashlib
+from typing import Hashable, Optional, Tuple
+
+from app.api.config import RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL
+from app.services.cache.ttl_cache import AsyncTTLCache
+from app.services.mood.models import Mood
+from app.services.weather.city_index import canonical_city_key
+from app.services.weather.models import WeatherData
+from app.services.weather.weather_service import weather_cache
+
+# Rendered /recommendations bodies and their ETags, keyed by response_key
+response_cache = AsyncTTLCache(max_size=RESPONSE_CACHE_MAX_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+
+def response_key(mood: Mood, city: str, weather: WeatherData) -> Hashable:
+    """
+    Get the response cache key of a recommendation
+
+    Responses are shared per mood, canonical city and weather bucket. The
+    city is also keyed as given, since the response echoes it back.
+
+    Args:
+        mood: The user's mood
+        city: Name of the city as given by the user
+        weather: The city's current weather
+
+    Returns:
+        Hashable cache key
+    """
+    return (
+        mood,
+        canonical_city_key(city),
+        weather.condition,
+        weather.temperature_category,
+        city,
+    )
+
+
+def get_cached_response(mood: Mood, city: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Look up a rendered response without awaiting anything
+
+    The weather bucket is taken from the weather cache, so a response is
+    only found while the city's weather is cached as well.
+
+    Args:
+        mood: The user's mood
+        city: Name of the city as given by the user
+
+    Returns:
+        Tuple of the response body and its ETag, or None on a miss
+    """
+    if response_cache.ttl <= 0:
+        return None
+    weather = weather_cache.get(canonical_city_key(city))
+    if weather is None:
+        return None
+    return response_cache.lookup(response_key(mood, city, weather))
+
+
+def cache_response(mood: Mood, city: str, weather: WeatherData, body: bytes, etag: str) -> None:
+    """
+    Store a rendered response for the next identical request
+
+    Args:
+        mood: The user's mood
+        city: Name of the city as given by the user
+        weather: The weather the response was built from
+        body: Rendered response body
+        etag: The body's ETag
+    """
+    response_cache.set(response_key(mood, city, weather), (body, etag))
+
+
+def entity_tag(mood: Mood, city: str, weather: WeatherData) -> str:
+    """
+    Compute the ETag of a recommendation from its response cache key
+
+    The body holds a randomly drawn song, so a digest of it would change on
+    every rebuild. The tag is weak instead: every response for the same
+    mood, city and weather bucket is an equivalent recommendation, so a
+    client revalidating one gets 304 whether or not the response cache is
+    enabled.
+
+    Args:
+        mood: The user's mood
+        city: Name of the city as given by the user
+        weather: The weather the response was built from
+
+    Returns:
+        Weak ETag, a quoted digest of the response key
+    """
+    key = repr(response_key(mood, city, weather)).encode("utf-8")
+    return f'W/"{hashlib.blake2b(key, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against a response's ETag
+
+    Args:
+        if_none_match: The request's If-None-Match header, if any
+        etag: The response's ETag
+
+    Returns:
+        True if the client already has this response
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        # If-None-Match uses weak comparison
+        if tag == "*" or tag.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
@@ -0,0 +1,23 @@
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response that can be sent while the request body is still being read
+
+    StreamingResponse normally listens on `receive` for a disconnect while it
+    streams, which would steal body chunks from an endpoint that reads its
+    request incrementally. Here the body reader sees the disconnect instead,
+    and a failed send ends the response.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
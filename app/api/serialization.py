@@ -0,0 +1,17 @@
+from app.services.mood.models import MoodResponse
+
+
+def render_mood_response(response: MoodResponse) -> bytes:
+    """
+    Serialize a recommendation straight to bytes with pydantic-core's encoder
+
+    This skips the jsonable_encoder and json.dumps passes of FastAPI's
+    JSONResponse, which dominate the cost of rendering a response.
+
+    Args:
+        response: The recommendation
+
+    Returns:
+        Compact UTF-8 JSON
+    """
+    return MoodResponse.__pydantic_serializer__.to_json(response)
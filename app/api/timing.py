@@ -0,0 +1,87 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Iterator, List, Optional, Tuple
+
+from app.services.metrics.metrics import stage_latency
+from app.services.tracing.tracer import tracer
+
+# (stage, seconds) of the current request for its Server-Timing header, or
+# None when the request does not report them
+_server_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "server_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time one stage of a request
+
+    The duration goes to the stage latency histogram, to the request's
+    Server-Timing header when it has one, and to a span when the request
+    is traced.
+
+    Args:
+        name: Stage name, e.g. "weather"
+    """
+    started = time.perf_counter()
+    try:
+        with tracer.span(name):
+            yield
+    finally:
+        duration = time.perf_counter() - started
+        stage_latency.observe(duration, stage=name)
+        timings = _server_timings.get()
+        if timings is not None:
+            timings.append((name, duration))
+
+
+async def timed(name: str, awaitable: Awaitable[Any]) -> Any:
+    """
+    Await a stage inside stage(name)
+
+    Args:
+        name: Stage name
+        awaitable: The awaitable doing the stage's work
+
+    Returns:
+        The stage's result
+    """
+    with stage(name):
+        return await awaitable
+
+
+@contextmanager
+def collect_server_timing(enabled: bool) -> Iterator[Optional[List[Tuple[str, float]]]]:
+    """
+    Collect the stage durations of the enclosed request
+
+    Stages running in tasks created inside the block report to the same
+    list, since tasks copy the context they are created in.
+
+    Args:
+        enabled: Whether to collect them at all
+
+    Yields:
+        The list stages append (name, seconds) to, or None if disabled
+    """
+    timings: Optional[List[Tuple[str, float]]] = [] if enabled else None
+    token = _server_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _server_timings.reset(token)
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """
+    Format stage durations as a Server-Timing header
+
+    Args:
+        timings: (stage, seconds) pairs
+
+    Returns:
+        Header value with durations in milliseconds, e.g. "weather;dur=12.3"
+    """
+    return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in timings)
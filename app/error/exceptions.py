@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class BaseAPIError(Exception):
     """Base class for API-related exceptions"""
     pass
@@ -6,6 +9,10 @@ class WeatherAPIError(BaseAPIError):
     """Exception raised for errors in the weather service"""
     pass
 
+class CityNotFoundError(WeatherAPIError):
+    """Exception raised when the weather service does not know a city"""
+    pass
+
 class MusicAPIError(BaseAPIError):
     """Exception raised for errors in the music service"""
     pass
@@ -13,3 +20,44 @@ class MusicAPIError(BaseAPIError):
 class MoodServiceError(BaseAPIError):
     """Exception raised for errors in the mood matching service"""
     pass
+
+class CacheBackendError(Exception):
+    """Exception raised when the distributed cache backend cannot be reached"""
+    pass
+
+class ProfilingError(Exception):
+    """Exception raised when a profiling action conflicts with the profiler's state"""
+    pass
+
+class UpstreamUnavailableError(BaseAPIError):
+    """Exception raised when an upstream cannot be called right now"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class UpstreamRateLimitError(UpstreamUnavailableError):
+    """Exception raised when an upstream call would exceed the upstream's rate limit"""
+    pass
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Exception raised when an upstream's circuit breaker refuses the call"""
+    pass
+
+def find_upstream_unavailable_error(error: BaseException) -> Optional[UpstreamUnavailableError]:
+    """
+    Find the UpstreamUnavailableError a service error was raised from, if any
+
+    Args:
+        error: Exception raised by a service
+
+    Returns:
+        The first UpstreamUnavailableError in the exception's cause chain, or None
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, UpstreamUnavailableError):
+            return error
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return None
@@ -0,0 +1,185 @@
+import abc
+import sqlite3
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from app.error.exceptions import CacheBackendError
+from app.services.cache.config import SHARED_CACHE_BUSY_TIMEOUT
+from app.services.cache.shared_cache import SQLiteSharedCache
+
+
+class CacheBackend(abc.ABC):
+    """
+    Interface of a distributed (L2) cache shared by workers or nodes
+
+    Values are opaque bytes with a TTL. Leases let one caller per key fetch
+    a missing value while the others wait for it. Backends raise
+    CacheBackendError when the store cannot be reached, so callers can
+    bypass the cache instead of failing the request.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """
+        Get a value that has not expired yet
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of the stored bytes and the seconds left before they expire,
+            or None on a miss
+
+        Raises:
+            CacheBackendError: If the store cannot be reached
+        """
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store a value for `ttl` seconds
+
+        Raises:
+            CacheBackendError: If the store cannot be reached
+        """
+
+    @abc.abstractmethod
+    async def acquire_lease(self, key: str, ttl: float) -> bool:
+        """
+        Try to become the one caller that fetches a key
+
+        Args:
+            key: Cache key
+            ttl: Seconds before an unreleased lease can be taken over
+
+        Returns:
+            True if this caller now holds the lease
+
+        Raises:
+            CacheBackendError: If the store cannot be reached
+        """
+
+    @abc.abstractmethod
+    async def release_lease(self, key: str) -> None:
+        """
+        Release a lease held by this caller
+
+        Raises:
+            CacheBackendError: If the store cannot be reached
+        """
+
+    async def close(self) -> None:
+        """Release connections held by the backend"""
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counters of L2 lookups"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class InMemoryBackend(CacheBackend):
+    """
+    Backend kept in this process, with the same semantics as the network ones
+
+    Useful for tests and single-process development; nothing is shared
+    with other workers.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self._clock = clock
+        self._entries: Dict[str, Tuple[bytes, float]] = {}
+        self._leases: Dict[str, float] = {}
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is None or entry[1] <= now:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0], entry[1] - now
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (value, self._clock() + ttl)
+
+    async def acquire_lease(self, key: str, ttl: float) -> bool:
+        now = self._clock()
+        if self._leases.get(key, now) > now:
+            return False
+        self._leases[key] = now + ttl
+        return True
+
+    async def release_lease(self, key: str) -> None:
+        self._leases.pop(key, None)
+
+
+def _is_busy(error: sqlite3.Error) -> bool:
+    """Whether a SQLite call gave up waiting for another connection's lock"""
+    return getattr(error, "sqlite_errorcode", None) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Backend on a SQLite WAL file, shared by the workers of one host
+
+    Calls run on the event loop, so they wait at most `busy_timeout` seconds
+    for another worker's write lock; a lookup that times out counts as a
+    miss and a write that times out is skipped.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout: float = SHARED_CACHE_BUSY_TIMEOUT,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__()
+        try:
+            self._cache = SQLiteSharedCache(path, busy_timeout=busy_timeout, clock=clock)
+        except sqlite3.Error as e:
+            raise CacheBackendError(f"Shared cache '{path}' could not be opened: {e}")
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        try:
+            hit = self._cache.get(key)
+        except sqlite3.Error as e:
+            if not _is_busy(e):
+                raise CacheBackendError(f"Shared cache lookup failed: {e}")
+            hit = None
+        if hit is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return hit
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            self._cache.set(key, value, ttl)
+        except sqlite3.Error as e:
+            if not _is_busy(e):
+                raise CacheBackendError(f"Shared cache write failed: {e}")
+
+    async def acquire_lease(self, key: str, ttl: float) -> bool:
+        try:
+            return self._cache.acquire_lease(key, ttl)
+        except sqlite3.Error as e:
+            raise CacheBackendError(f"Shared cache lease failed: {e}")
+
+    async def release_lease(self, key: str) -> None:
+        try:
+            self._cache.release_lease(key)
+        except sqlite3.Error as e:
+            raise CacheBackendError(f"Shared cache lease release failed: {e}")
+
+    async def close(self) -> None:
+        self._cache.close()
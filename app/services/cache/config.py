@@ -0,0 +1,30 @@
+import os
+
+# Distributed (L2) cache backend: "sqlite", "redis", "memory" or empty for none.
+# Empty falls back to "sqlite" when SHARED_CACHE_PATH is set.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "").strip().lower()
+
+# Prefix of every L2 key; bump the version when a value encoding changes
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "mwm:v1:")
+
+# SQLite file shared by all workers on a host; empty disables the shared cache
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+
+# Seconds a SQLite call waits while another worker holds the write lock;
+# a lookup that times out counts as a miss and a write is skipped
+SHARED_CACHE_BUSY_TIMEOUT = float(os.getenv("SHARED_CACHE_BUSY_TIMEOUT", "0.005"))
+
+# Redis server shared by every node, redis://[:password@]host[:port][/db]
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+# Connections kept open to Redis per worker
+CACHE_REDIS_POOL_SIZE = int(os.getenv("CACHE_REDIS_POOL_SIZE", "8"))
+
+# Seconds a Redis round trip may take before the cache is bypassed
+CACHE_REDIS_TIMEOUT = float(os.getenv("CACHE_REDIS_TIMEOUT", "0.5"))
+
+# Seconds a worker may hold the refresh lease of a key before others take over
+SHARED_CACHE_LEASE_TTL = float(os.getenv("SHARED_CACHE_LEASE_TTL", "10"))
+
+# Seconds between checks while another worker refreshes a key
+SHARED_CACHE_POLL_INTERVAL = float(os.getenv("SHARED_CACHE_POLL_INTERVAL", "0.05"))
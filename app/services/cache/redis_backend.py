@@ -0,0 +1,188 @@
+import asyncio
+import os
+import uuid
+from typing import Any, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlsplit
+
+from app.error.exceptions import CacheBackendError
+from app.services.cache.backends import CacheBackend
+
+# Deletes a lease only if this worker still holds it
+_RELEASE_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class RedisReplyError(Exception):
+    """Error reply (-ERR ...) returned by the server"""
+    pass
+
+
+def encode_command(*args: Any) -> bytes:
+    """
+    Encode a command as a RESP array of bulk strings
+
+    Args:
+        args: Command name and arguments; str and numbers are sent as UTF-8
+
+    Returns:
+        The command as sent on the wire
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """
+    Read one RESP reply
+
+    Args:
+        reader: Stream connected to the server
+
+    Returns:
+        str for simple strings, int for integers, bytes or None for bulk
+        strings, a list for arrays, and a RedisReplyError for error replies
+
+    Raises:
+        ConnectionError: If the server closed the connection or sent garbage
+    """
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Redis connection closed")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode("utf-8")
+    if kind == b"-":
+        return RedisReplyError(payload.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unexpected Redis reply {line!r}")
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend on a Redis server, shared by every node of the deployment
+
+    Speaks RESP directly over asyncio streams with a small connection pool,
+    so no client library is needed. Commands of one call are pipelined in a
+    single round trip.
+    """
+
+    def __init__(self, url: str, pool_size: int = 8, timeout: float = 0.5):
+        super().__init__()
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise CacheBackendError(f"Unsupported Redis URL '{url}'")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip("/") or 0)
+        self.timeout = timeout
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._slots = asyncio.Semaphore(max(1, pool_size))
+        self._idle: List[Connection] = []
+
+    async def _connect(self) -> Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password is not None:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            try:
+                self._check(await self._roundtrip((reader, writer), setup))
+            except BaseException:
+                writer.close()
+                raise
+        return reader, writer
+
+    @staticmethod
+    async def _roundtrip(connection: Connection, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        reader, writer = connection
+        writer.write(b"".join(encode_command(*command) for command in commands))
+        await writer.drain()
+        return [await read_reply(reader) for _ in commands]
+
+    @staticmethod
+    def _check(replies: List[Any]) -> List[Any]:
+        for reply in replies:
+            if isinstance(reply, RedisReplyError):
+                raise CacheBackendError(f"Redis error: {reply}")
+        return replies
+
+    async def execute(self, *commands: Sequence[Any]) -> List[Any]:
+        """
+        Send commands in one pipelined round trip
+
+        Args:
+            commands: Each command as a sequence of name and arguments
+
+        Returns:
+            One reply per command
+
+        Raises:
+            CacheBackendError: If the server cannot be reached, times out or
+                answers with an error
+        """
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(self._connect(), self.timeout)
+                replies = await asyncio.wait_for(
+                    self._roundtrip(connection, commands), self.timeout
+                )
+            except BaseException as e:
+                # A connection interrupted mid-reply cannot be reused
+                if connection is not None:
+                    connection[1].close()
+                if isinstance(e, (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError)):
+                    raise CacheBackendError(f"Redis {self.host}:{self.port} unavailable: {e!r}")
+                raise
+            self._idle.append(connection)
+        return self._check(replies)
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        value, remaining_ms = await self.execute(("GET", key), ("PTTL", key))
+        # PTTL is -2 if the key expired between the two commands
+        if value is None or remaining_ms == -2:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value, float("inf") if remaining_ms < 0 else remaining_ms / 1000
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.execute(("SET", key, value, "PX", max(1, int(ttl * 1000))))
+
+    async def acquire_lease(self, key: str, ttl: float) -> bool:
+        (reply,) = await self.execute(
+            ("SET", f"{key}#lease", self._owner, "NX", "PX", max(1, int(ttl * 1000)))
+        )
+        return reply == "OK"
+
+    async def release_lease(self, key: str) -> None:
+        await self.execute(("EVAL", _RELEASE_SCRIPT, 1, f"{key}#lease", self._owner))
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import time
+import uuid
+from typing import Callable, Optional, Tuple
+
+# Expired rows are purged after this many writes
+_PURGE_EVERY = 1000
+
+
+class SQLiteSharedCache:
+    """
+    Key/value cache in a SQLite WAL file shared by every worker on a host
+
+    Reads never block on writers, and a primary key lookup stays well under
+    a millisecond, so it is called directly from the event loop. Writers
+    take turns on the file lock; a call that cannot get it within
+    `busy_timeout` seconds raises sqlite3.OperationalError instead of
+    stalling the event loop. Expiry uses wall-clock time because it is
+    compared across processes.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 0.005, clock: Callable[[], float] = time.time):
+        self.path = path
+        self._clock = clock
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._writes = 0
+        # Setup runs once at startup, so it may wait longer for the lock
+        self._conn = sqlite3.connect(path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases "
+            "(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.purge_expired()
+        self._conn.execute(f"PRAGMA busy_timeout = {max(0, round(busy_timeout * 1000))}")
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """
+        Get a value that has not expired yet
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of the stored bytes and the seconds left before they expire,
+            or None on a miss
+        """
+        now = self._clock()
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1] - now
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store a value for `ttl` seconds
+
+        Args:
+            key: Cache key
+            value: Serialized value
+            ttl: Seconds the value stays valid
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, self._clock() + ttl),
+        )
+        self._writes += 1
+        if self._writes % _PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def delete(self, key: str) -> None:
+        """Remove a value"""
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def acquire_lease(self, key: str, ttl: float) -> bool:
+        """
+        Try to become the one worker that refreshes a key
+
+        Args:
+            key: Cache key
+            ttl: Seconds before an unreleased lease can be taken over
+
+        Returns:
+            True if this worker now holds the lease
+        """
+        now = self._clock()
+        cursor = self._conn.execute(
+            "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at <= ?",
+            (key, self._owner, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, key: str) -> None:
+        """Release a lease held by this worker"""
+        self._conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self._owner))
+
+    def purge_expired(self) -> None:
+        """Delete expired values and leases"""
+        now = self._clock()
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, Set, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidateCache:
+    """
+    In-process cache that keeps serving an entry after it goes stale while a
+    background task refreshes it
+
+    Only the very first read of a key waits on the fetch. A failed refresh
+    keeps the last good value and is retried after retry_interval.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        retry_interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._clock = clock
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._refreshes: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_failures = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def set(
+        self, key: Hashable, value: Any, stale: bool = False, ttl: Optional[float] = None
+    ) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to store
+            stale: Store the value as already stale, so the next read
+                serves it and schedules a refresh
+            ttl: Seconds the value stays fresh, defaults to the cache TTL
+        """
+        if stale:
+            fresh_until = self._clock()
+        else:
+            fresh_until = self._clock() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (fresh_until, value)
+
+    def peek(self, key: Hashable) -> Any:
+        """
+        Get the stored value, fresh or stale, without scheduling a refresh
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The stored value, or None if the key was never loaded
+        """
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Iterate over stored keys and values, fresh or stale"""
+        for key, (_, value) in list(self._entries.items()):
+            yield key, value
+
+    def clear(self) -> None:
+        """Drop every entry, cancel pending refreshes and reset the counters"""
+        for task in self._refreshes:
+            task.cancel()
+        self._refreshes.clear()
+        self._entries.clear()
+        self._inflight.clear()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_failures = 0
+
+    async def aclose(self) -> None:
+        """Cancel background refreshes and wait for them to finish"""
+        tasks = list(self._refreshes)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a value, serving stale data while a refresh runs in the background
+
+        Args:
+            key: Cache key
+            fetch: Zero-argument coroutine function that loads the value
+
+        Returns:
+            The cached value, or the freshly fetched one on the first read
+
+        Raises:
+            Exception: Whatever fetch raises when there is no value to fall back on
+        """
+
+        async def load() -> Tuple[Any, Optional[float]]:
+            return await fetch(), None
+
+        return await self.get_or_load(key, load)
+
+    async def get_or_load(
+        self, key: Hashable, load: Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+    ) -> Any:
+        """
+        Like get_or_fetch, but the loader also decides how long the value stays fresh
+
+        Args:
+            key: Cache key
+            load: Zero-argument coroutine function returning the value and its
+                TTL in seconds, or None for the cache TTL
+
+        Returns:
+            The cached value, or the freshly loaded one on the first read
+
+        Raises:
+            Exception: Whatever load raises when there is no value to fall back on
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            fresh_until, value = entry
+            if fresh_until > self._clock():
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._schedule_refresh(key, load)
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            self.misses += 1
+            inflight = asyncio.ensure_future(self._load(key, load))
+            self._inflight[key] = inflight
+        return await asyncio.shield(inflight)
+
+    def _schedule_refresh(
+        self, key: Hashable, load: Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+    ) -> None:
+        if key in self._inflight:
+            return
+        task = asyncio.ensure_future(self._refresh(key, load))
+        self._inflight[key] = task
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def _load(
+        self, key: Hashable, load: Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+    ) -> Any:
+        try:
+            value, ttl = await load()
+            self.set(key, value, ttl=ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _refresh(
+        self, key: Hashable, load: Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+    ) -> None:
+        try:
+            await self._load(key, load)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.error(f"Background refresh of {key!r} failed, keeping stale value: {e}")
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Keep serving the last good value and retry later
+                self._entries[key] = (self._clock() + self.retry_interval, entry[1])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the cache counters
+
+        Returns:
+            Dictionary with size, hits, stale hits, misses, refresh failures and hit ratio
+        """
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_failures": self.refresh_failures,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
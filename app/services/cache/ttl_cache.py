@@ -0,0 +1,196 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class AsyncTTLCache:
+    """
+    Bounded in-process cache with per-entry expiry, LRU eviction and
+    single-flight loading
+
+    Concurrent misses for the same key share one in-flight fetch instead of
+    each calling the upstream. Expired entries are kept for another
+    `stale_ttl` seconds, where only get_stale sees them.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        stale_ttl: float = 0,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a fresh cached value without loading it
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        now = self._clock()
+        if expires_at <= now:
+            if expires_at + self.stale_ttl <= now:
+                del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a value even if it expired less than stale_ttl seconds ago
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if it is missing or too old
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] + self.stale_ttl <= self._clock():
+            return None
+        return entry[1]
+
+    def lookup(self, key: Hashable) -> Optional[Any]:
+        """
+        Like get, but counted in the hit and miss counters
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when full
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds the value stays fresh, defaults to the cache TTL
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a cached value, fetching and storing it on a miss
+
+        Args:
+            key: Cache key
+            fetch: Zero-argument coroutine function that loads the value
+
+        Returns:
+            The cached or freshly fetched value
+
+        Raises:
+            Exception: Whatever fetch raises; failures are not cached
+        """
+
+        async def load() -> Tuple[Any, Optional[float]]:
+            return await fetch(), None
+
+        return await self.get_or_load(key, load)
+
+    async def get_or_load(
+        self, key: Hashable, load: Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+    ) -> Any:
+        """
+        Like get_or_fetch, but the loader also decides how long the value stays fresh
+
+        Args:
+            key: Cache key
+            load: Zero-argument coroutine function returning the value and its
+                TTL in seconds, or None for the cache TTL
+
+        Returns:
+            The cached or freshly loaded value
+
+        Raises:
+            Exception: Whatever load raises; failures are not cached
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._load(key, load))
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, key: Hashable, load: Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+    ) -> Any:
+        try:
+            value, ttl = await load()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the cache counters
+
+        Returns:
+            Dictionary with size, hits, misses, coalesced waits and hit ratio
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from app.error.exceptions import CacheBackendError
+from app.services.cache.backends import CacheBackend, InMemoryBackend, SQLiteBackend
+from app.services.cache.config import (
+    CACHE_KEY_PREFIX,
+    CACHE_REDIS_POOL_SIZE,
+    CACHE_REDIS_TIMEOUT,
+    CACHE_REDIS_URL,
+    SHARED_CACHE_LEASE_TTL,
+    SHARED_CACHE_PATH,
+    SHARED_CACHE_POLL_INTERVAL,
+)
+from app.services.cache.redis_backend import RedisBackend
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# L2 backend opened by the app lifespan, None when no backend is configured
+cache_backend: Optional[CacheBackend] = None
+
+
+def create_backend(kind: str) -> Optional[CacheBackend]:
+    """
+    Create the L2 backend named by CACHE_BACKEND
+
+    Args:
+        kind: "sqlite", "redis", "memory", or empty for SHARED_CACHE_PATH's
+            SQLite file if one is set
+
+    Returns:
+        The backend, or None if no backend is configured
+
+    Raises:
+        CacheBackendError: If the backend is unknown or cannot be opened
+    """
+    if not kind:
+        kind = "sqlite" if SHARED_CACHE_PATH else ""
+    if not kind:
+        return None
+    if kind == "sqlite":
+        if not SHARED_CACHE_PATH:
+            raise CacheBackendError("CACHE_BACKEND=sqlite requires SHARED_CACHE_PATH")
+        return SQLiteBackend(SHARED_CACHE_PATH)
+    if kind == "redis":
+        return RedisBackend(CACHE_REDIS_URL, CACHE_REDIS_POOL_SIZE, CACHE_REDIS_TIMEOUT)
+    if kind == "memory":
+        return InMemoryBackend()
+    raise CacheBackendError(f"Unknown cache backend '{kind}'")
+
+
+def open_cache_backend(kind: str) -> Optional[CacheBackend]:
+    """
+    Open the L2 backend used by l2_get_or_load
+
+    Args:
+        kind: Backend name, see create_backend
+
+    Returns:
+        The opened backend, or None if none is configured or it could not be opened
+    """
+    global cache_backend
+    try:
+        cache_backend = create_backend(kind)
+    except CacheBackendError as e:
+        logger.error(f"{e}, continuing without a distributed cache")
+        cache_backend = None
+    return cache_backend
+
+
+async def close_cache_backend() -> None:
+    """Close the L2 backend if it is open"""
+    global cache_backend
+    backend, cache_backend = cache_backend, None
+    if backend is not None:
+        await backend.close()
+
+
+async def l2_get_or_load(
+    key: str,
+    fetch: Callable[[], Awaitable[Any]],
+    encode: Callable[[Any], bytes],
+    decode: Callable[[bytes], Any],
+    ttl: float,
+) -> Tuple[Any, float]:
+    """
+    Load a value through the L2 cache, letting only one caller fetch a missing key
+
+    Meant as the loader of an in-process (L1) cache's get_or_load: the
+    returned TTL is what the value has left in L2, so the L1 copy expires
+    together with the shared one instead of outliving it. The caller that
+    takes the key's lease fetches and stores the value; the others poll L2
+    until it appears or the lease runs out. Without a backend, or when the
+    backend fails, this simply calls fetch.
+
+    Args:
+        key: Cache key, unique across value types
+        fetch: Zero-argument coroutine function that loads the value
+        encode: Serializes the value for storage
+        decode: Restores a value from storage
+        ttl: Seconds a fetched value stays valid
+
+    Returns:
+        Tuple of the value and the seconds it stays valid
+    """
+    backend = cache_backend
+    if backend is None:
+        return await fetch(), ttl
+
+    key = CACHE_KEY_PREFIX + key
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + SHARED_CACHE_LEASE_TTL
+    while True:
+        try:
+            hit = await backend.get(key)
+            if hit is not None:
+                data, remaining = hit
+                try:
+                    return decode(data), min(remaining, ttl)
+                except Exception as e:
+                    # Treat undecodable values like a miss and overwrite them
+                    logger.error(f"Discarding undecodable cache value {key!r}: {e}")
+            leased = await backend.acquire_lease(key, SHARED_CACHE_LEASE_TTL)
+        except CacheBackendError as e:
+            logger.error(f"Cache lookup of {key!r} failed: {e}")
+            return await fetch(), ttl
+
+        if leased:
+            try:
+                value = await fetch()
+                try:
+                    await backend.set(key, encode(value), ttl)
+                except CacheBackendError as e:
+                    logger.error(f"Cache write of {key!r} failed: {e}")
+                return value, ttl
+            finally:
+                try:
+                    await backend.release_lease(key)
+                except CacheBackendError:
+                    pass
+
+        # Another caller is fetching this key; wait for its result
+        if loop.time() >= give_up_at:
+            return await fetch(), ttl
+        await asyncio.sleep(SHARED_CACHE_POLL_INTERVAL)
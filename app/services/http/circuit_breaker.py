@@ -0,0 +1,189 @@
+import asyncio
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Dict, Tuple
+
+import httpx
+
+from app.error.exceptions import CircuitOpenError, UpstreamUnavailableError
+
+
+class CircuitState(str, Enum):
+    """States of a circuit breaker"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over a sliding window of recent upstream calls
+
+    While closed, every call goes through and its outcome is recorded. The
+    breaker opens when, over the last `window` calls, the share of failures
+    or of slow calls reaches its ratio. An open breaker refuses calls for
+    `open_duration` seconds, then lets `probes` calls through (half-open):
+    if they all succeed it closes, if one fails it opens again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int,
+        min_calls: int,
+        failure_ratio: float,
+        slow_ratio: float,
+        slow_call: float,
+        open_duration: float,
+        probes: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.min_calls = max(1, min_calls)
+        self.failure_ratio = failure_ratio
+        self.slow_ratio = slow_ratio
+        self.slow_call = slow_call
+        self.open_duration = open_duration
+        self.probes = max(1, probes)
+        self._clock = clock
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=max(1, window))
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self.state = CircuitState.CLOSED
+        self.opened = 0
+        self.rejected = 0
+
+    def reset(self) -> None:
+        """Close the breaker and forget recorded calls"""
+        self._outcomes.clear()
+        self.state = CircuitState.CLOSED
+        self.opened = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets probe calls through"""
+        return max(0.0, self._opened_at + self.open_duration - self._clock())
+
+    def before_call(self) -> None:
+        """
+        Check that a call may go to the upstream
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with all
+                probe calls already in flight
+        """
+        if self.state is CircuitState.OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    f"{self.name} circuit is open, retry in {self.retry_after():.1f}s",
+                    retry_after=self.retry_after(),
+                )
+            self.state = CircuitState.HALF_OPEN
+            self._probes_started = 0
+            self._probes_succeeded = 0
+
+        if self.state is CircuitState.HALF_OPEN:
+            if self._probes_started >= self.probes:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    f"{self.name} circuit is half-open and probing", retry_after=1.0
+                )
+            self._probes_started += 1
+
+    def release(self) -> None:
+        """Forget a call that before_call let through but that never reached a verdict"""
+        if self.state is CircuitState.HALF_OPEN and self._probes_started > 0:
+            self._probes_started -= 1
+
+    def record(self, failed: bool, duration: float) -> None:
+        """
+        Record the outcome of a call that before_call let through
+
+        Args:
+            failed: Whether the call failed
+            duration: Seconds the call took
+        """
+        slow = duration >= self.slow_call
+        if self.state is CircuitState.HALF_OPEN:
+            if failed or slow:
+                self._open()
+            else:
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self.probes:
+                    self._outcomes.clear()
+                    self.state = CircuitState.CLOSED
+            return
+        if self.state is CircuitState.OPEN:
+            return
+
+        self._outcomes.append((failed, slow))
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(failed for failed, _ in self._outcomes)
+        slow_calls = sum(slow for _, slow in self._outcomes)
+        if failures >= self.failure_ratio * calls or slow_calls >= self.slow_ratio * calls:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = CircuitState.OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict[str, object]:
+        """State and counters of the breaker"""
+        # Report an elapsed open period as half-open, which the next call will find
+        state = self.state
+        if state is CircuitState.OPEN and self.retry_after() == 0:
+            state = CircuitState.HALF_OPEN
+        return {
+            "state": state.value,
+            "calls": len(self._outcomes),
+            "failures": sum(failed for failed, _ in self._outcomes),
+            "slow_calls": sum(slow for _, slow in self._outcomes),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakerTransport(httpx.AsyncBaseTransport):
+    """
+    Transport that fails fast while the upstream's circuit breaker is open
+
+    Connection errors, timeouts and 5xx answers count as failures. Calls
+    refused locally, e.g. by the rate limiter, are not recorded, and a call
+    cancelled by its caller only counts once it has been slow.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, breaker: CircuitBreaker):
+        self._transport = transport
+        self.breaker = breaker
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.breaker.before_call()
+        started = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except UpstreamUnavailableError:
+            self.breaker.release()
+            raise
+        except asyncio.CancelledError:
+            duration = time.monotonic() - started
+            if duration >= self.breaker.slow_call:
+                self.breaker.record(True, duration)
+            else:
+                self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record(True, time.monotonic() - started)
+            raise
+        self.breaker.record(response.status_code >= 500, time.monotonic() - started)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+from app.services.http.circuit_breaker import CircuitBreaker, CircuitBreakerTransport
+from app.services.http.config import (
+    HTTP_BREAKER_ENABLED,
+    HTTP_BREAKER_FAILURE_RATIO,
+    HTTP_BREAKER_HALF_OPEN_PROBES,
+    HTTP_BREAKER_MIN_CALLS,
+    HTTP_BREAKER_OPEN_DURATION,
+    HTTP_BREAKER_SLOW_CALL,
+    HTTP_BREAKER_SLOW_RATIO,
+    HTTP_BREAKER_WINDOW,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_HEDGE_MIN_DELAY,
+    HTTP_HEDGE_MIN_SAMPLES,
+    HTTP_HEDGE_PERCENTILE,
+    HTTP_HEDGING,
+    HTTP_HTTP2,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_RATE_LIMIT_BACKGROUND_MAX_WAIT,
+    HTTP_RATE_LIMIT_MAX_WAIT,
+    HTTP_TIMEOUT,
+    LASTFM_RATE_BURST,
+    LASTFM_RATE_PER_MINUTE,
+    OPENWEATHER_RATE_BURST,
+    OPENWEATHER_RATE_PER_MINUTE,
+)
+from app.services.http.hedging import Hedger, HedgingTransport
+from app.services.http.instrumentation import InstrumentedTransport
+from app.services.http.rate_limit import RateLimitedTransport, TokenBucket
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upstream names used as keys for the shared clients
+WEATHER_UPSTREAM = "openweather"
+MUSIC_UPSTREAM = "lastfm"
+UPSTREAMS = (WEATHER_UPSTREAM, MUSIC_UPSTREAM)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _create_rate_limiters() -> Dict[str, TokenBucket]:
+    """Create a token bucket for every upstream with a configured quota"""
+    quotas = {
+        WEATHER_UPSTREAM: (OPENWEATHER_RATE_PER_MINUTE, OPENWEATHER_RATE_BURST),
+        MUSIC_UPSTREAM: (LASTFM_RATE_PER_MINUTE, LASTFM_RATE_BURST),
+    }
+    return {
+        upstream: TokenBucket(
+            upstream,
+            per_minute / 60,
+            burst,
+            HTTP_RATE_LIMIT_MAX_WAIT,
+            HTTP_RATE_LIMIT_BACKGROUND_MAX_WAIT,
+        )
+        for upstream, (per_minute, burst) in quotas.items()
+        if per_minute > 0
+    }
+
+
+# Per-upstream guards; they outlive the clients so their state survives reconnects
+rate_limiters: Dict[str, TokenBucket] = _create_rate_limiters()
+circuit_breakers: Dict[str, CircuitBreaker] = {
+    upstream: CircuitBreaker(
+        upstream,
+        window=HTTP_BREAKER_WINDOW,
+        min_calls=HTTP_BREAKER_MIN_CALLS,
+        failure_ratio=HTTP_BREAKER_FAILURE_RATIO,
+        slow_ratio=HTTP_BREAKER_SLOW_RATIO,
+        slow_call=HTTP_BREAKER_SLOW_CALL,
+        open_duration=HTTP_BREAKER_OPEN_DURATION,
+        probes=HTTP_BREAKER_HALF_OPEN_PROBES,
+    )
+    for upstream in UPSTREAMS
+    if HTTP_BREAKER_ENABLED
+}
+hedgers: Dict[str, Hedger] = {
+    upstream: Hedger(HTTP_HEDGE_PERCENTILE, HTTP_HEDGE_MIN_SAMPLES, HTTP_HEDGE_MIN_DELAY)
+    for upstream in UPSTREAMS
+    if HTTP_HEDGING
+}
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that remembers resolved addresses for a fixed time
+
+    TLS still uses the original host name for SNI and certificate checks,
+    only the TCP connect goes to the cached address.
+    """
+
+    def __init__(self, ttl: float, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._ttl = ttl
+        self._backend = backend or httpcore.AnyIOBackend()
+        self._addresses: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """
+        Resolve a host name, reusing a previous answer while it is fresh
+
+        Args:
+            host: Host name to resolve
+            port: Port the connection will use
+
+        Returns:
+            List of IP addresses for the host
+        """
+        cached = self._addresses.get((host, port))
+        now = time.monotonic()
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, port, type=0, proto=6)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._addresses[(host, port)] = (now + self._ttl, addresses)
+        return addresses
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await self.resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+
+        # Every cached address failed, so resolve again on the next attempt
+        self._addresses.pop((host, port), None)
+        raise last_error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: Optional[float] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """httpx transport whose connection pool resolves hosts through CachingDNSBackend"""
+
+    def __init__(self, limits: httpx.Limits, http2: bool, dns_cache_ttl: float):
+        super().__init__(limits=limits, http2=http2)
+        if dns_cache_ttl > 0:
+            # httpx does not expose the network backend, so rebuild its pool
+            self._pool = httpcore.AsyncConnectionPool(
+                ssl_context=self._pool._ssl_context,
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+                http1=True,
+                http2=http2,
+                network_backend=CachingDNSBackend(dns_cache_ttl),
+            )
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_client(
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    upstream: Optional[str] = None,
+) -> httpx.AsyncClient:
+    """
+    Create a long-lived client with the configured pool limits and timeouts
+
+    Calls go through the upstream's circuit breaker, then hedging, then
+    its rate limiter, so every hedge attempt also takes a token. Calls
+    that leave the process are recorded in the metrics registry.
+
+    Args:
+        transport: Optional transport to use instead of the pooled network transport
+        upstream: Upstream name whose rate limiter, hedger and circuit
+            breaker the client uses, if any
+
+    Returns:
+        A new httpx.AsyncClient
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+    if transport is None:
+        http2 = HTTP_HTTP2
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+        transport = PooledTransport(limits, http2, HTTP_DNS_CACHE_TTL)
+    if upstream is not None:
+        transport = InstrumentedTransport(transport, upstream)
+    if upstream in rate_limiters:
+        transport = RateLimitedTransport(transport, rate_limiters[upstream])
+    if upstream in hedgers:
+        transport = HedgingTransport(transport, hedgers[upstream])
+    if upstream in circuit_breakers:
+        transport = CircuitBreakerTransport(transport, circuit_breakers[upstream])
+
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+async def open_clients(
+    transports: Optional[Dict[str, httpx.AsyncBaseTransport]] = None,
+) -> None:
+    """
+    Create one pooled client per upstream
+
+    Args:
+        transports: Optional mapping of upstream name to transport, used by tests
+            to route calls to a local transport
+    """
+    transports = transports or {}
+    for upstream in UPSTREAMS:
+        set_client(upstream, create_client(transports.get(upstream), upstream))
+
+
+async def close_clients() -> None:
+    """Close every upstream client and release its pooled connections"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def set_client(upstream: str, client: httpx.AsyncClient) -> None:
+    """
+    Register the client used for an upstream
+
+    Args:
+        upstream: Upstream name, e.g. WEATHER_UPSTREAM
+        client: The client to use for calls to that upstream
+    """
+    _clients[upstream] = client
+
+
+def get_client(upstream: str) -> httpx.AsyncClient:
+    """
+    Get the shared client for an upstream
+
+    A client is created on first use when the app lifespan has not opened one,
+    e.g. when a service is called directly from a script.
+
+    Args:
+        upstream: Upstream name, e.g. WEATHER_UPSTREAM
+
+    Returns:
+        The pooled httpx.AsyncClient for the upstream
+    """
+    client = _clients.get(upstream)
+    if client is None or client.is_closed:
+        client = create_client(upstream=upstream)
+        _clients[upstream] = client
+    return client
@@ -0,0 +1,61 @@
+import os
+
+# Connection pool limits shared by every upstream client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# Seconds an idle keep-alive connection stays in the pool
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Timeouts in seconds
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+
+# HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "false").lower() == "true"
+
+# Seconds a resolved upstream address is reused; 0 disables the DNS cache
+HTTP_DNS_CACHE_TTL = float(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+
+# Upstream request quotas per worker, in requests per minute; 0 disables the
+# limiter. With several workers, divide the plan's quota between them.
+OPENWEATHER_RATE_PER_MINUTE = float(os.getenv("OPENWEATHER_RATE_PER_MINUTE", "60"))
+LASTFM_RATE_PER_MINUTE = float(os.getenv("LASTFM_RATE_PER_MINUTE", "300"))
+
+# Requests that may be sent back to back before the per-minute rate applies
+OPENWEATHER_RATE_BURST = int(os.getenv("OPENWEATHER_RATE_BURST", "10"))
+LASTFM_RATE_BURST = int(os.getenv("LASTFM_RATE_BURST", "10"))
+
+# Seconds a call may queue for a rate limit token before it is rejected
+HTTP_RATE_LIMIT_MAX_WAIT = float(os.getenv("HTTP_RATE_LIMIT_MAX_WAIT", "2"))
+
+# Seconds batch and prewarm calls may queue for a token; they are still
+# bounded by their own deadline, e.g. PREWARM_TIMEOUT or BATCH_STAGE_TIMEOUT
+HTTP_RATE_LIMIT_BACKGROUND_MAX_WAIT = float(os.getenv("HTTP_RATE_LIMIT_BACKGROUND_MAX_WAIT", "60"))
+
+# Circuit breaker: the last HTTP_BREAKER_WINDOW calls are judged once at least
+# HTTP_BREAKER_MIN_CALLS were made; the breaker opens when the share of
+# failed or of slow calls reaches its ratio
+HTTP_BREAKER_ENABLED = os.getenv("HTTP_BREAKER_ENABLED", "true").lower() == "true"
+HTTP_BREAKER_WINDOW = int(os.getenv("HTTP_BREAKER_WINDOW", "20"))
+HTTP_BREAKER_MIN_CALLS = int(os.getenv("HTTP_BREAKER_MIN_CALLS", "10"))
+HTTP_BREAKER_FAILURE_RATIO = float(os.getenv("HTTP_BREAKER_FAILURE_RATIO", "0.5"))
+HTTP_BREAKER_SLOW_RATIO = float(os.getenv("HTTP_BREAKER_SLOW_RATIO", "0.5"))
+
+# Seconds after which a call counts as slow
+HTTP_BREAKER_SLOW_CALL = float(os.getenv("HTTP_BREAKER_SLOW_CALL", "2"))
+
+# Seconds an open breaker fails fast before letting probe calls through
+HTTP_BREAKER_OPEN_DURATION = float(os.getenv("HTTP_BREAKER_OPEN_DURATION", "30"))
+
+# Successful probe calls needed to close a half-open breaker
+HTTP_BREAKER_HALF_OPEN_PROBES = int(os.getenv("HTTP_BREAKER_HALF_OPEN_PROBES", "3"))
+
+# Hedged GETs: send a second request when the first has not answered after
+# the given percentile of recent latencies (never sooner than the minimum delay)
+HTTP_HEDGING = os.getenv("HTTP_HEDGING", "false").lower() == "true"
+HTTP_HEDGE_PERCENTILE = float(os.getenv("HTTP_HEDGE_PERCENTILE", "95"))
+HTTP_HEDGE_MIN_DELAY = float(os.getenv("HTTP_HEDGE_MIN_DELAY", "0.05"))
+
+# Latency samples needed before hedging starts
+HTTP_HEDGE_MIN_SAMPLES = int(os.getenv("HTTP_HEDGE_MIN_SAMPLES", "20"))
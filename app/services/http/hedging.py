@@ -0,0 +1,145 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+import httpx
+
+
+class Hedger:
+    """
+    Hedging policy of one upstream, derived from its recent response times
+
+    The hedge delay is a percentile of the recent latencies, never shorter
+    than `min_delay`. It is recomputed every few samples rather than per
+    call, so asking for it stays cheap.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        min_samples: int,
+        min_delay: float,
+        size: int = 200,
+        refresh_every: int = 20,
+    ):
+        self.percentile = percentile
+        self.min_samples = max(1, min_samples)
+        self.min_delay = min_delay
+        self.refresh_every = max(1, refresh_every)
+        self._samples: Deque[float] = deque(maxlen=max(size, self.min_samples))
+        self._since_refresh = 0
+        self._value: Optional[float] = None
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, duration: float) -> None:
+        """Add the duration of a completed call"""
+        self._samples.append(duration)
+        self._since_refresh += 1
+        if self._value is None and len(self._samples) >= self.min_samples:
+            self._refresh()
+        elif self._since_refresh >= self.refresh_every:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        self._since_refresh = 0
+        if len(self._samples) < self.min_samples:
+            return
+        ordered = sorted(self._samples)
+        rank = math.ceil(self.percentile / 100 * len(ordered)) - 1
+        self._value = ordered[min(max(rank, 0), len(ordered) - 1)]
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before sending a hedge, None until enough samples were recorded"""
+        return None if self._value is None else max(self._value, self.min_delay)
+
+    def stats(self) -> Dict[str, object]:
+        """Hedge delay and counters"""
+        return {
+            "hedge_delay": self.delay(),
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+class HedgingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport that races a second GET against a slow first one
+
+    If the first attempt has not answered after the hedger's delay, the same request is sent again and whichever attempt answers
+    first wins; the other is cancelled. Only GET requests are hedged, since
+    they are idempotent.
+
+    Only first attempts feed the latency estimate. A first attempt that
+    loses the race is recorded with the time it ran until it was cancelled,
+    so slow answers keep pushing the delay up; a winning hedge is not
+    recorded, as it is by selection the faster of two answers.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, hedger: Hedger):
+        self._transport = transport
+        self.hedger = hedger
+
+    def _recorder(self, started: float) -> Callable[["asyncio.Future[httpx.Response]"], None]:
+        """Done callback recording how long a first attempt ran, answered or cancelled"""
+
+        def record(task: "asyncio.Future[httpx.Response]") -> None:
+            if task.cancelled() or task.exception() is None:
+                self.hedger.record(time.monotonic() - started)
+
+        return record
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self.hedger.delay() if request.method == "GET" else None
+        started = time.monotonic()
+        if delay is None:
+            response = await self._transport.handle_async_request(request)
+            self.hedger.record(time.monotonic() - started)
+            return response
+
+        primary = asyncio.ensure_future(self._transport.handle_async_request(request))
+        primary.add_done_callback(self._recorder(started))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done:
+            return primary.result()
+
+        self.hedger.hedged += 1
+        hedge = asyncio.ensure_future(self._transport.handle_async_request(request))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedger.hedge_wins += 1
+                        winner = task
+                        for other in (primary, hedge):
+                            if other is not winner:
+                                other.add_done_callback(_discard)
+                                other.cancel()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        except asyncio.CancelledError:
+            for task in (primary, hedge):
+                task.add_done_callback(_discard)
+                task.cancel()
+            raise
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _discard(task: "asyncio.Task[httpx.Response]") -> None:
+    """Close the response of an attempt that lost the race"""
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().aclose())
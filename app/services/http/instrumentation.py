@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import httpx
+
+from app.services.metrics.metrics import upstream_in_flight, upstream_latency
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport that records every upstream call in the metrics registry
+
+    Calls are labelled with the HTTP status, "error" when no answer arrived
+    and "cancelled" when the caller gave up, e.g. a hedge that lost.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, upstream: str):
+        self._transport = transport
+        self.upstream = upstream
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        status = "error"
+        upstream_in_flight.inc(upstream=self.upstream)
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            upstream_in_flight.dec(upstream=self.upstream)
+            upstream_latency.observe(
+                time.perf_counter() - started, upstream=self.upstream, status=status
+            )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
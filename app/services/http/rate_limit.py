@@ -0,0 +1,257 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from app.error.exceptions import UpstreamRateLimitError
+
+
+class Priority(IntEnum):
+    """Order in which queued upstream calls get rate limit tokens, lowest first"""
+
+    INTERACTIVE = 0
+    BATCH = 1
+    PREWARM = 2
+
+
+# Priority of the upstream calls made by the current task
+request_priority: ContextVar[Priority] = ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+
+@contextlib.contextmanager
+def use_priority(priority: Priority) -> Iterator[None]:
+    """
+    Run upstream calls made inside the block, and by tasks created in it,
+    with the given priority
+
+    Args:
+        priority: Priority of the calls
+    """
+    token = request_priority.set(priority)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket with a priority queue of waiting callers
+
+    Tokens refill at `rate` per second up to `burst`. A caller that finds the
+    bucket empty queues until a token is available, higher priorities
+    first, but never longer than `max_wait` seconds: if the queue ahead of it
+    cannot drain in time it is rejected right away instead of waiting.
+    Batch and prewarm calls have no user waiting on each call, so they may
+    queue for up to `background_max_wait` seconds instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_wait: float,
+        background_max_wait: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self.background_max_wait = max_wait if background_max_wait is None else background_max_wait
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Calls given a token, calls that had to queue for one, calls refused,
+        # and pauses after the upstream answered 429
+        self.granted = 0
+        self.waited = 0
+        self.rejected = 0
+        self.throttled = 0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        if now > self._paused_until:
+            elapsed = now - max(self._updated, self._paused_until)
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def tokens(self) -> float:
+        """Tokens currently available"""
+        self._refill()
+        return self._tokens
+
+    def queued(self) -> int:
+        """Number of callers waiting for a token"""
+        return sum(not future.done() for _, _, future in self._waiters)
+
+    def _estimated_wait(self, priority: Priority) -> float:
+        ahead = sum(
+            not future.done() and waiter_priority <= priority
+            for waiter_priority, _, future in self._waiters
+        )
+        pause = max(0.0, self._paused_until - self._clock())
+        return pause + max(0.0, ahead + 1 - self._tokens) / self.rate
+
+    def max_wait_for(self, priority: Priority) -> float:
+        """
+        Seconds a call of the given priority may queue for a token
+
+        Args:
+            priority: Priority of the call
+
+        Returns:
+            max_wait for interactive calls, background_max_wait otherwise
+        """
+        return self.max_wait if priority == Priority.INTERACTIVE else self.background_max_wait
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """
+        Take a token, waiting for one if the bucket is empty
+
+        Args:
+            priority: Priority of the call
+
+        Raises:
+            UpstreamRateLimitError: If no token is available within the
+                priority's max wait
+        """
+        self._refill()
+        if not self.queued() and self._tokens >= 1:
+            self._tokens -= 1
+            self.granted += 1
+            return
+
+        max_wait = self.max_wait_for(priority)
+        wait = self._estimated_wait(priority)
+        if wait > max_wait:
+            self.rejected += 1
+            raise UpstreamRateLimitError(
+                f"{self.name} rate limit reached, retry in {wait:.1f}s", retry_after=wait
+            )
+
+        self.waited += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._wake()
+        try:
+            await asyncio.wait_for(future, max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            retry_after = self._estimated_wait(priority)
+            raise UpstreamRateLimitError(
+                f"{self.name} rate limit reached, retry in {retry_after:.1f}s",
+                retry_after=retry_after,
+            )
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop handing out tokens for a while, e.g. after the upstream answered 429
+
+        Args:
+            seconds: How long the bucket stays empty
+        """
+        self.throttled += 1
+        self._refill()
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def _wake(self) -> None:
+        loop = asyncio.get_running_loop()
+        dispatcher = self._dispatcher
+        if dispatcher is None or dispatcher.done() or dispatcher.get_loop() is not loop:
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._refill()
+            while self._waiters and (self._waiters[0][2].done() or self._tokens >= 1):
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+                    self._tokens -= 1
+                    self.granted += 1
+            if not self._waiters:
+                return
+            pause = max(0.0, self._paused_until - self._clock())
+            await asyncio.sleep(pause + (1 - self._tokens) / self.rate)
+
+    def stats(self) -> Dict[str, float]:
+        """Token level, queue depth and counters of the bucket"""
+        return {
+            "tokens": round(self.tokens(), 3),
+            "queued": self.queued(),
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "granted": self.granted,
+            "waited": self.waited,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+        }
+
+
+def parse_retry_after(value: Optional[str], default: float) -> float:
+    """
+    Read a Retry-After header given in seconds or as an HTTP date
+
+    Args:
+        value: Header value, if any
+        default: Seconds to use when the header is missing or invalid
+
+    Returns:
+        Seconds to wait
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport that takes a token from the upstream's bucket before each request
+
+    When the upstream still answers 429, the bucket is paused for the
+    Retry-After period and the request is retried once if that fits in the
+    max wait of the call's priority.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, bucket: TokenBucket):
+        self._transport = transport
+        self.bucket = bucket
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(2):
+            await self.bucket.acquire(request_priority.get())
+            response = await self._transport.handle_async_request(request)
+            if response.status_code != 429:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"), 1.0)
+            self.bucket.pause(retry_after)
+            await response.aclose()
+        raise UpstreamRateLimitError(
+            f"{self.bucket.name} answered 429 Too Many Requests", retry_after=retry_after
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
@@ -0,0 +1,35 @@
+from app.services.metrics.registry import MetricsRegistry
+
+# Every metric exported by /metrics
+registry = MetricsRegistry()
+
+# Time spent in each stage of a /recommendations request
+stage_latency = registry.histogram(
+    "mwm_stage_duration_seconds",
+    "Time spent in each stage of a recommendation request",
+    labels=("stage",),
+)
+
+# Upstream calls as they leave the process, including retries and hedges;
+# the histogram count is the number of calls per status
+upstream_latency = registry.histogram(
+    "mwm_upstream_request_duration_seconds",
+    "Duration of upstream HTTP calls by upstream and status",
+    labels=("upstream", "status"),
+)
+upstream_in_flight = registry.gauge(
+    "mwm_upstream_requests_in_flight",
+    "Upstream HTTP calls currently waiting for an answer",
+    labels=("upstream",),
+)
+
+# Requests served by this process
+http_in_flight = registry.gauge(
+    "mwm_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+http_latency = registry.histogram(
+    "mwm_http_request_duration_seconds",
+    "Duration of served HTTP requests by route and status",
+    labels=("method", "route", "status"),
+)
@@ -0,0 +1,249 @@
+import abc
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Label values of one sample, in the order of the metric's label names
+LabelValues = Tuple[str, ...]
+
+# Callback returning the current (labels, value) samples of a collected metric
+SampleCallback = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+# Latency buckets in seconds, from cache hits to upstream timeouts
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(abc.ABC):
+    """Metric family with a fixed set of label names"""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abc.abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Render one exposition line per sample of the family"""
+
+    def render(self) -> List[str]:
+        """Render the family in the Prometheus text exposition format"""
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Add to the count of a label set"""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current count of a label set"""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """Subtract from the value of a label set"""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        """Replace the value of a label set"""
+        self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        """Count the enclosed block as in progress while it runs"""
+        self.inc(1, **labels)
+        try:
+            yield
+        finally:
+            self.dec(1, **labels)
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values per label set
+
+    Observations are counted in their own bucket only; the cumulative
+    counts Prometheus expects are summed up when the metric is rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count per bucket (plus +Inf), then the sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation"""
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe how long the enclosed block takes, in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Number of observations of a label set"""
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry is not None else 0
+
+    def samples(self) -> Iterator[str]:
+        bounds = [*(_format_value(bound) for bound in self.buckets), "+Inf"]
+        names = (*self.label_names, "le")
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(names, (*key, bound))} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {_format_value(total[0])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class CollectedMetric(_Metric):
+    """Metric whose samples are read from a callback when it is rendered"""
+
+    def __init__(self, name: str, help: str, kind: str, callback: SampleCallback):
+        super().__init__(name, help)
+        self.kind = kind
+        self._callback = callback
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._callback():
+            names = tuple(labels)
+            yield f"{self.name}{_format_labels(names, [str(labels[n]) for n in names])} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """
+    Set of metrics rendered together by the /metrics endpoint
+
+    Updates are plain in-memory arithmetic on the event loop thread, so
+    recording a sample never blocks or takes a lock.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        """Register a counter"""
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        """Register a gauge"""
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Register a histogram"""
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def collect(self, name: str, help: str, kind: str, callback: SampleCallback) -> CollectedMetric:
+        """
+        Register a metric read from existing counters when it is rendered
+
+        Args:
+            name: Metric name
+            help: Help text
+            kind: Prometheus type, "counter" or "gauge"
+            callback: Returns the current (labels, value) samples
+
+        Returns:
+            The registered metric
+        """
+        return self._register(CollectedMetric(name, help, kind, callback))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Look up a registered metric by name"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            The exposition text, ending with a newline
+        """
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
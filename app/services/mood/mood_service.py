@@ -1,42 +1,139 @@
+from typing import Dict, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.error.exceptions import MoodServiceError
 from app.services.mood.models import Mood
 from app.services.weather.config import MOOD_WEATHER_MAPPING
-from app.services.weather.models import WeatherData
+from app.services.weather.models import WeatherCondition, WeatherData, WeatherTemperature
+
+# Axis order of the compiled match table; integer codes index into these
+MOODS: Tuple[Mood, ...] = tuple(Mood)
+CONDITIONS: Tuple[WeatherCondition, ...] = tuple(WeatherCondition)
+TEMPERATURES: Tuple[WeatherTemperature, ...] = tuple(WeatherTemperature)
+
+_CONDITION_STRIDE = len(TEMPERATURES)
+_MOOD_STRIDE = len(CONDITIONS) * len(TEMPERATURES)
+
+
+def _matches(mood: Mood, condition: WeatherCondition, temperature: WeatherTemperature) -> bool:
+    """Evaluate MOOD_WEATHER_MAPPING for one (mood, condition, temperature) cell"""
+    # Get the mapping criteria for this mood
+    mapping = MOOD_WEATHER_MAPPING.get(mood.value, {
+        "conditions": [],
+        "temperature": [],
+        "match_all": False
+    })
+
+    condition_match = condition.value in mapping["conditions"]
+    temperature_match = temperature.value in mapping["temperature"]
+
+    if mapping["match_all"]:
+        # Must match both condition and temperature
+        return condition_match and temperature_match
+    # Must match either condition or temperature
+    return condition_match or temperature_match
+
+
+def _compile_match_table() -> Tuple[bool, ...]:
+    """
+    Compile MOOD_WEATHER_MAPPING into a flat table indexed by
+    mood * _MOOD_STRIDE + condition * _CONDITION_STRIDE + temperature
+    """
+    return tuple(
+        _matches(mood, condition, temperature)
+        for mood in MOODS
+        for condition in CONDITIONS
+        for temperature in TEMPERATURES
+    )
+
+
+# Compiled once at import; the tuple serves single lookups, the array batch lookups
+_MATCH_TABLE = _compile_match_table()
+_MATCH_ARRAY = np.array(_MATCH_TABLE, dtype=bool)
+
+# Offsets of each axis value in the flat table. String enums hash like their
+# values, so plain strings such as "happy" find the same entries.
+_MOOD_OFFSETS: Dict[Mood, int] = {mood: i * _MOOD_STRIDE for i, mood in enumerate(MOODS)}
+_CONDITION_OFFSETS: Dict[WeatherCondition, int] = {
+    condition: i * _CONDITION_STRIDE for i, condition in enumerate(CONDITIONS)
+}
+_TEMPERATURE_OFFSETS: Dict[WeatherTemperature, int] = {
+    temperature: i for i, temperature in enumerate(TEMPERATURES)
+}
 
 
 def match_mood_with_weather(mood: Mood, weather: WeatherData) -> bool:
     """
     Determine if the user's mood matches the current weather conditions
-    
+
     Args:
         mood: The user's current mood
         weather: Current weather data
-        
+
     Returns:
-        Tuple containing:
-          - Boolean indicating if the mood matches the weather
-          - String explanation of the match or mismatch
+        Boolean indicating if the mood matches the weather
     """
-    # Get the mapping criteria for this mood
-    mapping = MOOD_WEATHER_MAPPING.get(mood, {
-        "conditions": [],
-        "temperature": [],
-        "match_all": False
-    })
-    
-    # Check if weather condition matches the mood's associated conditions
-    condition_match = weather.condition in mapping["conditions"]
-    
-    # Check if temperature category matches the mood's associated temperature ranges
-    temperature_match = weather.temperature_category in mapping["temperature"]
-    
-    # Determine overall match based on matching criteria
-    if mapping["match_all"]:
-        # Must match both condition and temperature
-        matches = condition_match and temperature_match
-    else:
-        # Must match either condition or temperature
-        matches = condition_match or temperature_match
-    
-    return matches
+    mood_offset = _MOOD_OFFSETS.get(mood)
+    if mood_offset is None:
+        return False
+
+    return _MATCH_TABLE[
+        mood_offset
+        + _CONDITION_OFFSETS[weather.condition]
+        + _TEMPERATURE_OFFSETS[weather.temperature_category]
+    ]
+
 
+def _encode(values: Union[Sequence, np.ndarray], members: Tuple, name: str) -> np.ndarray:
+    """
+    Convert enum members, their string values or integer codes to an index array
+
+    Raises:
+        MoodServiceError: If a value is not a known member or code
+    """
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.integer):
+        codes = values.astype(np.intp, copy=False)
+        if codes.size and (codes.min() < 0 or codes.max() >= len(members)):
+            raise MoodServiceError(f"{name} codes must be between 0 and {len(members) - 1}")
+        return codes
+
+    index = {member: i for i, member in enumerate(members)}
+    try:
+        return np.fromiter((index[value] for value in values), dtype=np.intp, count=len(values))
+    except KeyError as e:
+        raise MoodServiceError(f"Unknown {name.lower()} {e.args[0]!r}")
+
+
+def match_moods_with_weather(
+    moods: Union[Sequence[Mood], np.ndarray],
+    conditions: Union[Sequence[WeatherCondition], np.ndarray],
+    temperature_categories: Union[Sequence[WeatherTemperature], np.ndarray],
+) -> np.ndarray:
+    """
+    Vectorized match_mood_with_weather for bulk scoring
+
+    Each argument is a sequence of enum members or their string values, or
+    an integer array of codes indexing MOODS, CONDITIONS and TEMPERATURES.
+    All three must have the same length.
+
+    Args:
+        moods: The moods to score
+        conditions: The weather condition of each observation
+        temperature_categories: The temperature category of each observation
+
+    Returns:
+        Boolean array, True where the mood matches the weather
+
+    Raises:
+        MoodServiceError: If the inputs differ in length or contain unknown values
+    """
+    if not len(moods) == len(conditions) == len(temperature_categories):
+        raise MoodServiceError("Moods and weather observations must have the same length")
 
+    flat_index = (
+        _encode(moods, MOODS, "Mood") * _MOOD_STRIDE
+        + _encode(conditions, CONDITIONS, "Condition") * _CONDITION_STRIDE
+        + _encode(temperature_categories, TEMPERATURES, "Temperature")
+    )
+    return _MATCH_ARRAY[flat_index]
@@ -3,9 +3,9 @@ import os
 
 LASTFM_API_KEY = os.getenv("LASTFM_API_KEY", "")
 
-# API Endpoints
+# API Endpoints, overridable to point at a local stand-in such as benchmarks/fake_upstreams.py
 
-LASTFM_BASE_URL = "https://ws.audioscrobbler.com/2.0"
+LASTFM_BASE_URL = os.getenv("LASTFM_BASE_URL", "https://ws.audioscrobbler.com/2.0")
 
 
 # Last.fm tags for mood-based music search
@@ -19,3 +19,28 @@ MOOD_MUSIC_TAGS = {
     "anxious": ["anxious", "tense", "dark", "experimental"],
     "relaxed": ["relaxed", "chill", "lounge", "acoustic"],
 }
+
+# Tag track pool cache: seconds a pool is fresh before a background refresh,
+# and seconds to wait before retrying a refresh that failed
+TAG_POOL_TTL = float(os.getenv("TAG_POOL_TTL", "3600"))
+TAG_POOL_RETRY_INTERVAL = float(os.getenv("TAG_POOL_RETRY_INTERVAL", "60"))
+
+# Seconds a tag that could not be loaded at all is answered with the same
+# error instead of asking Last.fm again (0 disables)
+TAG_FAILURE_TTL = float(os.getenv("TAG_FAILURE_TTL", "10"))
+
+# Snapshot file of tag track pools, read at startup and written at shutdown
+# so restarted workers serve without Last.fm. Empty disables the snapshot.
+TRACK_SNAPSHOT_PATH = os.getenv("TRACK_SNAPSHOT_PATH", "")
+
+# How get_song_recommendation picks tracks: "tag" samples one random tag of
+# the mood, "mood" merges every tag of the mood into one ranked pool
+SONG_POOL_MODE = os.getenv("SONG_POOL_MODE", "tag").strip().lower()
+
+# Rank offset of the reciprocal rank fusion that merges a mood's tag pools
+# in "mood" mode; larger values weigh the tags more evenly against rank
+MOOD_POOL_FUSION_OFFSET = float(os.getenv("MOOD_POOL_FUSION_OFFSET", "60"))
+
+# Songs are drawn from a whole pool, the track at rank r (0 = top) with
+# weight 1 / (TRACK_RANK_OFFSET + r); larger values flatten the ranking
+TRACK_RANK_OFFSET = float(os.getenv("TRACK_RANK_OFFSET", "5"))
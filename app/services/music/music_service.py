@@ -1,16 +1,57 @@
+import asyncio
 import httpx
 import random
 import logging
-from typing import Dict, Any, List
-from app.error.exceptions import MusicAPIError
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from app.error.exceptions import MusicAPIError, UpstreamUnavailableError
 from app.services.mood.models import Mood
-from app.services.music.config import LASTFM_API_KEY, LASTFM_BASE_URL, MOOD_MUSIC_TAGS
+from app.services.music.config import (
+    LASTFM_API_KEY,
+    LASTFM_BASE_URL,
+    MOOD_MUSIC_TAGS,
+    MOOD_POOL_FUSION_OFFSET,
+    SONG_POOL_MODE,
+    TAG_FAILURE_TTL,
+    TAG_POOL_RETRY_INTERVAL,
+    TAG_POOL_TTL,
+    TRACK_RANK_OFFSET,
+)
 from app.services.music.models import Song
+from app.services.http.clients import MUSIC_UPSTREAM, get_client
+from app.services.music.track_snapshot import (
+    TrackSnapshot,
+    decode_track_pool,
+    encode_track_pool,
+    write_snapshot,
+)
+from app.services.music.track_pool import TrackPool
+from app.services.cache.two_tier import l2_get_or_load
+from app.services.cache.swr_cache import StaleWhileRevalidateCache
+from app.services.cache.ttl_cache import AsyncTTLCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Parsed top tracks per tag, refreshed in the background once stale
+tag_pool_cache = StaleWhileRevalidateCache(
+    ttl=TAG_POOL_TTL, retry_interval=TAG_POOL_RETRY_INTERVAL
+)
+
+# Error message per tag whose first load failed, so the other items of a
+# batch do not ask Last.fm for it again; tags are limited to MOOD_MUSIC_TAGS
+failed_tag_cache = AsyncTTLCache(
+    max_size=sum(len(tags) for tags in MOOD_MUSIC_TAGS.values()), ttl=TAG_FAILURE_TTL
+)
+
+# Tag pools from the last snapshot, used when Last.fm cannot be reached
+track_snapshot: Optional[TrackSnapshot] = None
+
+# Merged pool per mood with the tag pools it was built from; rebuilt when
+# any of those pools is replaced in the tag pool cache
+_mood_pools: Dict[Mood, Tuple[Tuple[TrackPool, ...], TrackPool]] = {}
+
+
 async def get_song_recommendation(mood: Mood) -> Song:
     """
     Get a song recommendation based on the user's mood using the Last.fm API
@@ -30,20 +71,23 @@ async def get_song_recommendation(mood: Mood) -> Song:
     
     # Get tags associated with the mood
     mood_tags = MOOD_MUSIC_TAGS.get(mood, ["happy"])
+
+    if SONG_POOL_MODE == "mood":
+        return await _recommend_from_mood_pool(mood, mood_tags)
     
     # Randomly select one of the tags for variety
     selected_tag = random.choice(mood_tags)
     
     try:
         # Get tracks for the selected tag
-        tracks = await get_top_tracks_by_tag(selected_tag)
+        pool = await get_tag_pool(selected_tag)
         
-        if not tracks:
+        if not pool:
             # Try with a different tag if no tracks found
             alternative_tag = mood_tags[0] if len(mood_tags) > 0 else "pop"
-            tracks = await get_top_tracks_by_tag(alternative_tag)
+            pool = await get_tag_pool(alternative_tag)
             
-            if not tracks:
+            if not pool:
                 # Fallback to a generic recommendation if still no tracks
                 return Song(
                     title="Happy",
@@ -51,19 +95,237 @@ async def get_song_recommendation(mood: Mood) -> Song:
                     url="https://www.last.fm/music/Pharrell+Williams/_/Happy",
                 )
         
-        # Select a random track from the top tracks
-        track = random.choice(tracks[:10] if len(tracks) > 10 else tracks)
-        
-        return Song(
-            title=track.get("name", "Unknown Title"),
-            artist=track.get("artist", {}).get("name", "Unknown Artist"),
-            url=track.get("url", None),
-        )
+        # Draw a track, better ranked tracks more often
+        return pool.sample()
         
     except Exception as e:
         logger.error(f"Error getting song recommendation: {e}")
         raise MusicAPIError(f"Error getting song recommendation: {str(e)}")
 
+async def _recommend_from_mood_pool(mood: Mood, mood_tags: Sequence[str]) -> Song:
+    """Draw a song from the mood's merged pool"""
+    try:
+        pool = await get_mood_pool(mood, mood_tags)
+        if not pool:
+            return Song(
+                title="Happy",
+                artist="Pharrell Williams",
+                url="https://www.last.fm/music/Pharrell+Williams/_/Happy",
+            )
+        return pool.sample()
+    except Exception as e:
+        logger.error(f"Error getting song recommendation: {e}")
+        raise MusicAPIError(f"Error getting song recommendation: {str(e)}")
+
+async def get_mood_pool(mood: Mood, mood_tags: Sequence[str]) -> TrackPool:
+    """
+    Get the merged, ranked track pool of every tag of a mood
+
+    All tag pools are loaded concurrently, so an empty or failing tag costs
+    no extra round trip. Tags that fail are left out as long as one tag
+    loads. The merged pool is memoized until one of its tag pools changes.
+
+    Args:
+        mood: The user's current mood
+        mood_tags: The Last.fm tags of the mood
+
+    Returns:
+        TrackPool of the distinct tracks, best ranked first
+
+    Raises:
+        MusicAPIError: If every tag fails to load
+    """
+    results = await asyncio.gather(
+        *(get_tag_pool(tag) for tag in mood_tags), return_exceptions=True
+    )
+    pools = tuple(result for result in results if not isinstance(result, BaseException))
+    if not pools:
+        if results:
+            # Every tag failed, so report the first error
+            raise results[0]
+        return TrackPool((), TRACK_RANK_OFFSET)
+
+    cached = _mood_pools.get(mood)
+    if cached is not None and len(cached[0]) == len(pools) and all(
+        old is new for old, new in zip(cached[0], pools)
+    ):
+        return cached[1]
+
+    merged = merge_tag_pools(pools)
+    _mood_pools[mood] = (pools, merged)
+    return merged
+
+def merge_tag_pools(pools: Sequence[TrackPool]) -> TrackPool:
+    """
+    Merge tag pools into one pool without duplicates, ranked by reciprocal rank fusion
+
+    A track scores 1 / (MOOD_POOL_FUSION_OFFSET + rank) in every pool it
+    appears in, so tracks near the top of several tags rank first.
+
+    Args:
+        pools: Track pools of the tags
+
+    Returns:
+        TrackPool of the distinct tracks, best ranked first
+    """
+    scores: Dict[Tuple[str, str], float] = {}
+    songs: Dict[Tuple[str, str], Song] = {}
+    for pool in pools:
+        for rank, song in enumerate(pool.songs):
+            key = (song.title.casefold(), song.artist.casefold())
+            scores[key] = scores.get(key, 0.0) + 1 / (MOOD_POOL_FUSION_OFFSET + rank)
+            songs.setdefault(key, song)
+    ranked = sorted(scores, key=scores.__getitem__, reverse=True)
+    return TrackPool((songs[key] for key in ranked), TRACK_RANK_OFFSET)
+
+async def get_tag_pool(tag: str) -> TrackPool:
+    """
+    Get the cached top tracks for a tag
+
+    Only the first read of a tag waits on Last.fm. Later reads are served
+    from memory, and stale pools are refreshed in the background while the
+    last good pool keeps being served. If that first load fails, the error
+    is repeated for TAG_FAILURE_TTL seconds without asking Last.fm again.
+
+    Args:
+        tag: The music tag to search for
+
+    Returns:
+        TrackPool of the tag's tracks
+
+    Raises:
+        MusicAPIError: If the tag has never been loaded and Last.fm fails
+    """
+    if tag not in tag_pool_cache:
+        failure = failed_tag_cache.lookup(tag)
+        if failure is not None:
+            raise MusicAPIError(failure)
+    try:
+        return await tag_pool_cache.get_or_load(tag, lambda: load_tag_pool(tag))
+    except MusicAPIError as e:
+        failed_tag_cache.set(tag, str(e))
+        raise
+
+async def load_tag_pool(tag: str) -> Tuple[TrackPool, float]:
+    """
+    Load a tag's top tracks, falling back to the snapshot if Last.fm fails
+
+    The pool goes through the distributed (L2) cache, so only one worker in
+    the deployment downloads a given tag. A pool served from the snapshot is
+    only kept for the retry interval, so Last.fm is tried again soon.
+
+    Args:
+        tag: The music tag to search for
+
+    Returns:
+        Tuple of the TrackPool and the seconds it stays fresh
+
+    Raises:
+        MusicAPIError: If Last.fm fails and the snapshot has no pool for the tag
+    """
+    try:
+        return await l2_get_or_load(
+            f"tags:{tag}",
+            lambda: fetch_tag_pool(tag),
+            encode=_encode_pool,
+            decode=_decode_pool,
+            ttl=TAG_POOL_TTL,
+        )
+    except MusicAPIError as e:
+        pool = _snapshot_pool(tag)
+        if pool is None:
+            raise
+        logger.warning(f"Serving tag '{tag}' from the track snapshot: {e}")
+        return pool, TAG_POOL_RETRY_INTERVAL
+
+async def fetch_tag_pool(tag: str) -> TrackPool:
+    """
+    Download a tag's top tracks, keeping only the fields songs are built from
+
+    Args:
+        tag: The music tag to search for
+
+    Returns:
+        TrackPool of the tag's tracks
+
+    Raises:
+        MusicAPIError: If there's an error with the Last.fm API request
+    """
+    # The raw response dictionaries are dropped as soon as the pool is built
+    return TrackPool.from_tracks(await get_top_tracks_by_tag(tag), TRACK_RANK_OFFSET)
+
+def _snapshot_pool(tag: str) -> Optional[TrackPool]:
+    if track_snapshot is None:
+        return None
+    try:
+        fields = track_snapshot.track_fields(tag)
+    except ValueError as e:
+        logger.error(f"Ignoring corrupt pool of tag '{tag}' in track snapshot '{track_snapshot.path}': {e}")
+        return None
+    return None if fields is None else TrackPool.from_fields(fields, TRACK_RANK_OFFSET)
+
+def _encode_pool(pool: TrackPool) -> bytes:
+    return encode_track_pool(pool.fields())
+
+def _decode_pool(data: bytes) -> TrackPool:
+    return TrackPool.from_fields(decode_track_pool(data), TRACK_RANK_OFFSET)
+
+def load_track_snapshot(path: str) -> int:
+    """
+    Memory-map a snapshot file and seed the tag pool cache from it
+
+    Seeded pools are marked stale, so they are served immediately and
+    refreshed from Last.fm in the background.
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        Number of tags seeded, 0 if the snapshot is missing or unreadable
+    """
+    global track_snapshot
+    try:
+        snapshot = TrackSnapshot(path)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.error(f"Ignoring unreadable track snapshot '{path}': {e}")
+        return 0
+
+    if track_snapshot is not None:
+        track_snapshot.close()
+    track_snapshot = snapshot
+
+    seeded = 0
+    for tag in snapshot.tags():
+        if tag not in tag_pool_cache:
+            pool = _snapshot_pool(tag)
+            if pool is not None:
+                tag_pool_cache.set(tag, pool, stale=True)
+                seeded += 1
+    logger.info(f"Seeded {seeded} tag pools from track snapshot '{path}'")
+    return seeded
+
+def save_track_snapshot(path: str) -> int:
+    """
+    Write every cached tag pool to a snapshot file
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        Number of tags written
+    """
+    pools = {tag: pool.fields() for tag, pool in tag_pool_cache.items() if pool}
+    if not pools:
+        return 0
+    try:
+        write_snapshot(path, pools)
+    except OSError as e:
+        logger.error(f"Could not write track snapshot '{path}': {e}")
+        return 0
+    return len(pools)
+
 async def get_top_tracks_by_tag(tag: str) -> List[Dict[str, Any]]:
     """
     Get top tracks for a specific tag from Last.fm API
@@ -86,15 +348,18 @@ async def get_top_tracks_by_tag(tag: str) -> List[Dict[str, Any]]:
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(LASTFM_BASE_URL, params=params)
-            
+        client = get_client(MUSIC_UPSTREAM)
+        response = await client.get(LASTFM_BASE_URL, params=params)
+
         response.raise_for_status()
         data = response.json()
         
         # Extract tracks from the response
         return data.get("tracks", {}).get("track", [])
         
+    except UpstreamUnavailableError as e:
+        logger.warning(f"Last.fm unavailable: {e}")
+        raise MusicAPIError(f"Music service is unavailable: {str(e)}") from e
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error from Last.fm API: {e}")
         raise MusicAPIError(f"Music service returned status code {e.response.status_code}")
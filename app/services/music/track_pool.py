@@ -0,0 +1,114 @@
+import random
+from typing import Any, Iterable, List, Mapping, Sequence, Tuple
+
+from app.services.music.models import Song
+from app.services.music.track_snapshot import TrackFields, track_fields
+
+
+def _alias_table(weights: Sequence[float]) -> Tuple[Tuple[float, ...], Tuple[int, ...]]:
+    """
+    Build Vose's alias table for sampling indexes in proportion to `weights`
+
+    Returns:
+        Tuple of the probability of keeping each column's own index and the
+        index to take otherwise
+    """
+    count = len(weights)
+    total = sum(weights)
+    scaled = [weight * count / total for weight in weights]
+    probabilities = [1.0] * count
+    aliases = list(range(count))
+
+    small = [i for i, p in enumerate(scaled) if p < 1]
+    large = [i for i, p in enumerate(scaled) if p >= 1]
+    while small and large:
+        low, high = small.pop(), large.pop()
+        probabilities[low] = scaled[low]
+        aliases[low] = high
+        scaled[high] += scaled[low] - 1
+        (small if scaled[high] < 1 else large).append(high)
+    # Whatever is left is 1 up to rounding
+    return tuple(probabilities), tuple(aliases)
+
+
+class TrackPool:
+    """
+    Immutable, ranked pool of tracks ready for weighted sampling
+
+    Tracks are kept as prebuilt Song objects in rank order, and an alias
+    table over rank weights 1 / (rank_offset + rank) is computed once, so
+    drawing a song costs O(1) and creates no objects.
+    """
+
+    __slots__ = ("songs", "_probabilities", "_aliases")
+
+    def __init__(self, songs: Iterable[Song], rank_offset: float):
+        self.songs: Tuple[Song, ...] = tuple(songs)
+        if self.songs:
+            weights = [1 / (rank_offset + rank) for rank in range(len(self.songs))]
+            self._probabilities, self._aliases = _alias_table(weights)
+        else:
+            self._probabilities, self._aliases = (), ()
+
+    @classmethod
+    def from_fields(cls, tracks: Iterable[TrackFields], rank_offset: float) -> "TrackPool":
+        """
+        Build a pool from (title, artist, url) tuples in rank order
+
+        Args:
+            tracks: Track tuples, best ranked first
+            rank_offset: Rank weighting offset, see TRACK_RANK_OFFSET
+
+        Returns:
+            The track pool
+        """
+        return cls(
+            (Song(title=title, artist=artist, url=url) for title, artist, url in tracks),
+            rank_offset,
+        )
+
+    @classmethod
+    def from_tracks(cls, tracks: Iterable[Mapping[str, Any]], rank_offset: float) -> "TrackPool":
+        """
+        Build a pool from Last.fm track dictionaries, keeping only the song fields
+
+        Args:
+            tracks: Track data dictionaries as returned by Last.fm, best ranked first
+            rank_offset: Rank weighting offset, see TRACK_RANK_OFFSET
+
+        Returns:
+            The track pool
+        """
+        return cls.from_fields((track_fields(track) for track in tracks), rank_offset)
+
+    def fields(self) -> List[TrackFields]:
+        """The (title, artist, url) tuple of every track, in rank order"""
+        return [(song.title, song.artist, song.url) for song in self.songs]
+
+    def sample(self) -> Song:
+        """
+        Draw a song, better ranked songs more often
+
+        Returns:
+            One of the pool's songs
+
+        Raises:
+            IndexError: If the pool is empty
+        """
+        # One draw picks the column and, with its fractional part, the side
+        count = len(self.songs)
+        position = random.random() * count
+        # Rounding can turn random() * count into count itself
+        column = min(int(position), count - 1)
+        if position - column < self._probabilities[column]:
+            return self.songs[column]
+        return self.songs[self._aliases[column]]
+
+    def __len__(self) -> int:
+        return len(self.songs)
+
+    def __getitem__(self, rank: int) -> Song:
+        return self.songs[rank]
+
+    def __repr__(self) -> str:
+        return f"TrackPool({len(self.songs)} tracks)"
@@ -0,0 +1,213 @@
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# File layout, all integers little endian:
+#   magic | tag count (u32)
+#   per tag: tag length (u16), tag (utf-8), data offset (u64), track count (u32)
+#   per track: title, artist and url, each as length (u32) + utf-8 bytes
+SNAPSHOT_MAGIC = b"MWMTRK1\n"
+_COUNT = struct.Struct("<I")
+_TAG_LENGTH = struct.Struct("<H")
+_INDEX_ENTRY = struct.Struct("<QI")
+_STRING_LENGTH = struct.Struct("<I")
+
+# (title, artist, url) of a track; an empty url is stored for None
+TrackFields = Tuple[str, str, Optional[str]]
+
+
+def track_fields(track: Mapping[str, Any]) -> TrackFields:
+    """
+    Extract the fields kept in a snapshot from a Last.fm track dictionary
+
+    Args:
+        track: Track data dictionary as returned by Last.fm
+
+    Returns:
+        Tuple of title, artist and url
+    """
+    return (
+        track.get("name", "Unknown Title"),
+        track.get("artist", {}).get("name", "Unknown Artist"),
+        track.get("url", None),
+    )
+
+
+def _encode_string(value: Optional[str]) -> bytes:
+    data = (value or "").encode("utf-8")
+    return _STRING_LENGTH.pack(len(data)) + data
+
+
+def _unpack(layout: struct.Struct, buffer: Any, position: int) -> Tuple[int, ...]:
+    """Unpack a fixed-size field, raising ValueError if the data ends before it"""
+    if position + layout.size > len(buffer):
+        raise ValueError("Track data is truncated")
+    return layout.unpack_from(buffer, position)
+
+
+def _read_string(buffer: Any, position: int, length: int) -> str:
+    """Decode a UTF-8 string, raising ValueError if the data ends before it"""
+    if position + length > len(buffer):
+        raise ValueError("Track data is truncated")
+    return buffer[position : position + length].decode("utf-8")
+
+
+def _decode_records(buffer: Any, position: int, count: int) -> List[TrackFields]:
+    tracks = []
+    for _ in range(count):
+        fields = []
+        for _ in range(3):
+            (length,) = _unpack(_STRING_LENGTH, buffer, position)
+            position += _STRING_LENGTH.size
+            fields.append(_read_string(buffer, position, length))
+            position += length
+        title, artist, url = fields
+        tracks.append((title, artist, url or None))
+    return tracks
+
+
+def encode_track_pool(tracks: Iterable[TrackFields]) -> bytes:
+    """
+    Serialize one tag's tracks with the snapshot's record layout
+
+    Args:
+        tracks: (title, artist, url) tuples
+
+    Returns:
+        Track count (u32) followed by the track records
+    """
+    records = [
+        _encode_string(title) + _encode_string(artist) + _encode_string(url)
+        for title, artist, url in tracks
+    ]
+    return _COUNT.pack(len(records)) + b"".join(records)
+
+
+def decode_track_pool(data: bytes) -> List[TrackFields]:
+    """
+    Restore tracks serialized by encode_track_pool
+
+    Args:
+        data: Serialized track pool
+
+    Returns:
+        List of (title, artist, url) tuples
+
+    Raises:
+        ValueError: If the data is truncated or not valid UTF-8
+    """
+    (count,) = _unpack(_COUNT, data, 0)
+    return _decode_records(data, _COUNT.size, count)
+
+
+def write_snapshot(path: str, pools: Mapping[str, Iterable[TrackFields]]) -> None:
+    """
+    Atomically write tag track pools to a snapshot file
+
+    The file is written next to its destination and renamed over it, so
+    readers see either the old or the new snapshot, never a partial one.
+
+    Args:
+        path: Destination file
+        pools: Mapping of tag to (title, artist, url) tuples
+    """
+    tags = [(tag.encode("utf-8"), list(tracks)) for tag, tracks in pools.items()]
+
+    header_size = len(SNAPSHOT_MAGIC) + _COUNT.size + sum(
+        _TAG_LENGTH.size + len(tag) + _INDEX_ENTRY.size for tag, _ in tags
+    )
+    index = [SNAPSHOT_MAGIC, _COUNT.pack(len(tags))]
+    data: List[bytes] = []
+    offset = header_size
+    for tag, tracks in tags:
+        index.append(_TAG_LENGTH.pack(len(tag)) + tag + _INDEX_ENTRY.pack(offset, len(tracks)))
+        for title, artist, url in tracks:
+            record = _encode_string(title) + _encode_string(artist) + _encode_string(url)
+            data.append(record)
+            offset += len(record)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".track_snapshot.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.writelines(index)
+            f.writelines(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class TrackSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file
+
+    Only the tag index is parsed on open; a tag's tracks are decoded from the
+    mapping when they are first asked for. Truncated or corrupt data raises
+    ValueError, either on open or when the damaged tag is decoded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._index = self._read_index()
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _read_index(self) -> Dict[str, Tuple[int, int]]:
+        buffer = self._mmap
+        if buffer[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"'{self.path}' is not a track snapshot")
+        position = len(SNAPSHOT_MAGIC)
+        (tag_count,) = _unpack(_COUNT, buffer, position)
+        position += _COUNT.size
+
+        index = {}
+        for _ in range(tag_count):
+            (tag_length,) = _unpack(_TAG_LENGTH, buffer, position)
+            position += _TAG_LENGTH.size
+            tag = _read_string(buffer, position, tag_length)
+            position += tag_length
+            index[tag] = _unpack(_INDEX_ENTRY, buffer, position)
+            position += _INDEX_ENTRY.size
+        return index
+
+    def tags(self) -> List[str]:
+        """List the tags stored in the snapshot"""
+        return list(self._index)
+
+    def track_fields(self, tag: str) -> Optional[List[TrackFields]]:
+        """
+        Decode the (title, artist, url) tuples stored for a tag
+
+        Args:
+            tag: The music tag
+
+        Returns:
+            List of track tuples, or None if the tag is not in the snapshot
+
+        Raises:
+            ValueError: If the tag's records are truncated or corrupt
+        """
+        entry = self._index.get(tag)
+        if entry is None:
+            return None
+        position, count = entry
+        return _decode_records(self._mmap, position, count)
+
+    def close(self) -> None:
+        """Release the memory mapping"""
+        self._mmap.close()
@@ -0,0 +1,15 @@
+import os
+
+# Warm caches during startup before the app reports ready
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "false").lower() == "true"
+
+# Comma-separated list of cities whose weather is fetched during prewarm
+PREWARM_CITIES = [
+    city.strip() for city in os.getenv("PREWARM_CITIES", "").split(",") if city.strip()
+]
+
+# Max concurrent city fetches during prewarm
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "4"))
+
+# Seconds prewarm may take before startup continues without it
+PREWARM_TIMEOUT = float(os.getenv("PREWARM_TIMEOUT", "20"))
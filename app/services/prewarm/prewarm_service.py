@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List
+
+from app.services.http.rate_limit import Priority, use_priority
+from app.services.music import music_service
+from app.services.music.config import MOOD_MUSIC_TAGS
+from app.services.weather import weather_service
+from app.services.weather.city_index import canonical_city_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def mood_tags() -> List[str]:
+    """
+    Get every distinct tag used by any mood
+
+    Returns:
+        List of Last.fm tags in configuration order
+    """
+    return list(dict.fromkeys(tag for tags in MOOD_MUSIC_TAGS.values() for tag in tags))
+
+
+async def prewarm_tag_pools(tags: Iterable[str]) -> int:
+    """
+    Load the track pool of every tag concurrently
+
+    Args:
+        tags: Last.fm tags to load
+
+    Returns:
+        Number of tags loaded successfully
+    """
+    tags = list(tags)
+    results = await asyncio.gather(
+        *(music_service.get_tag_pool(tag) for tag in tags), return_exceptions=True
+    )
+    for tag, result in zip(tags, results):
+        if isinstance(result, Exception):
+            logger.error(f"Prewarm of tag '{tag}' failed: {result}")
+    return sum(not isinstance(result, Exception) for result in results)
+
+
+async def prewarm_cities(cities: Iterable[str], concurrency: int) -> int:
+    """
+    Load the weather of every city with at most `concurrency` calls in flight
+
+    Args:
+        cities: City names to load
+        concurrency: Maximum number of concurrent weather fetches
+
+    Returns:
+        Number of cities loaded successfully
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def warm(city: str) -> bool:
+        async with semaphore:
+            try:
+                await weather_service.get_weather_for_city(city)
+                return True
+            except Exception as e:
+                logger.error(f"Prewarm of city '{city}' failed: {e}")
+                return False
+
+    results = await asyncio.gather(*(warm(city) for city in cities))
+    return sum(results)
+
+
+async def prewarm(cities: Iterable[str], concurrency: int, timeout: float) -> Dict[str, int]:
+    """
+    Warm the tag pool and weather caches, giving up after `timeout` seconds
+
+    Work that finished before the timeout stays cached.
+
+    Args:
+        cities: City names whose weather should be loaded
+        concurrency: Maximum number of concurrent weather fetches
+        timeout: Overall time limit in seconds
+
+    Returns:
+        Dictionary with the number of tags and cities loaded and whether prewarm timed out
+    """
+    cities = list(cities)
+    tags = mood_tags()
+    summary = {"tags": 0, "cities": 0, "timed_out": 0}
+
+    async def warm_tags() -> None:
+        summary["tags"] = await prewarm_tag_pools(tags)
+
+    async def warm_cities() -> None:
+        summary["cities"] = await prewarm_cities(cities, concurrency)
+
+    try:
+        # Prewarm calls take rate limit tokens only when no request needs them
+        with use_priority(Priority.PREWARM):
+            await asyncio.wait_for(asyncio.gather(warm_tags(), warm_cities()), timeout)
+    except asyncio.TimeoutError:
+        summary["timed_out"] = 1
+        # Count what made it into the caches before the timeout
+        summary["tags"] = sum(tag in music_service.tag_pool_cache for tag in tags)
+        summary["cities"] = sum(
+            weather_service.weather_cache.get(canonical_city_key(city)) is not None
+            for city in cities
+        )
+        logger.warning(f"Prewarm timed out after {timeout:.1f}s, continuing with a partly warm cache")
+
+    logger.info(
+        f"Prewarm loaded {summary['tags']}/{len(tags)} tags and "
+        f"{summary['cities']}/{len(cities)} cities"
+    )
+    return summary
@@ -0,0 +1,11 @@
+import os
+
+# Seconds between stack samples of the sampling profiler
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.01"))
+
+# Seconds after which a forgotten profiler stops sampling on its own
+PROFILER_MAX_DURATION = float(os.getenv("PROFILER_MAX_DURATION", "300"))
+
+# Stack frames tracemalloc keeps per allocation, and snapshots kept for diffs
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "25"))
+TRACEMALLOC_MAX_SNAPSHOTS = int(os.getenv("TRACEMALLOC_MAX_SNAPSHOTS", "5"))
@@ -0,0 +1,90 @@
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from app.error.exceptions import ProfilingError
+from app.services.profiling.config import TRACEMALLOC_FRAMES, TRACEMALLOC_MAX_SNAPSHOTS
+
+# Snapshots taken since tracing started, by ID, oldest first
+_snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+_next_id = 1
+
+# Allocations made by tracemalloc itself and by imports are noise in a diff
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def start_tracemalloc(frames: int = TRACEMALLOC_FRAMES) -> None:
+    """
+    Start tracing allocations; every allocation costs extra until it is stopped
+
+    Args:
+        frames: Stack frames kept per allocation
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracemalloc() -> None:
+    """Stop tracing allocations and forget the snapshots"""
+    _snapshots.clear()
+    tracemalloc.stop()
+
+
+def take_snapshot() -> Dict[str, Any]:
+    """
+    Snapshot the traced allocations, keeping the latest TRACEMALLOC_MAX_SNAPSHOTS
+
+    Returns:
+        Dictionary with the snapshot ID, when it was taken and the traced
+        memory at that time
+
+    Raises:
+        ProfilingError: If tracemalloc is not tracing
+    """
+    global _next_id
+    if not tracemalloc.is_tracing():
+        raise ProfilingError("tracemalloc is not tracing, start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    snapshot_id, _next_id = _next_id, _next_id + 1
+    _snapshots[snapshot_id] = snapshot
+    while len(_snapshots) > TRACEMALLOC_MAX_SNAPSHOTS:
+        _snapshots.popitem(last=False)
+    current, peak = tracemalloc.get_traced_memory()
+    return {"id": snapshot_id, "taken_at": time.time(), "traced_bytes": current, "peak_bytes": peak}
+
+
+def compare_snapshots(old_id: int, new_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Diff two snapshots by allocating source line
+
+    Args:
+        old_id: ID of the earlier snapshot
+        new_id: ID of the later snapshot
+        limit: Number of lines to return
+
+    Returns:
+        The lines whose allocations grew or shrank the most, largest change first
+
+    Raises:
+        ProfilingError: If either snapshot is unknown
+    """
+    try:
+        old, new = _snapshots[old_id], _snapshots[new_id]
+    except KeyError as e:
+        raise ProfilingError(f"Unknown snapshot {e.args[0]}")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size": stat.size,
+            "count": stat.count,
+        }
+        for stat in new.compare_to(old, "lineno")[:limit]
+    ]
@@ -0,0 +1,116 @@
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, Optional
+
+from app.error.exceptions import ProfilingError
+from app.services.profiling.config import PROFILER_INTERVAL, PROFILER_MAX_DURATION
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling one thread's stack from a helper thread
+
+    The sampled thread is never interrupted, so the overhead is one stack
+    walk per interval, and nothing at all while the profiler is stopped.
+    Results are collapsed stacks ("outer;inner count" per line), the input
+    format of flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, max_duration: float = PROFILER_MAX_DURATION):
+        self.max_duration = max_duration
+        self.interval = PROFILER_INTERVAL
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._counts: Counter = Counter()
+        self._labels: Dict[CodeType, str] = {}
+        self._target: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """Whether samples are being taken"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None, thread_id: Optional[int] = None) -> None:
+        """
+        Start sampling
+
+        Args:
+            interval: Seconds between samples, defaults to PROFILER_INTERVAL
+            thread_id: Thread to sample, defaults to the calling thread,
+                i.e. the event loop when called from a request
+
+        Raises:
+            ProfilingError: If the profiler is already running
+        """
+        if self.running:
+            raise ProfilingError("The profiler is already running")
+        self.interval = interval or PROFILER_INTERVAL
+        self.samples = 0
+        self._counts = Counter()
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """
+        Stop sampling
+
+        Returns:
+            The collapsed stacks, most sampled first; also after the profiler
+            stopped on its own at max_duration
+
+        Raises:
+            ProfilingError: If the profiler was not started
+        """
+        thread, self._thread = self._thread, None
+        if thread is None:
+            raise ProfilingError("The profiler is not running")
+        self._stop.set()
+        thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self._counts.most_common())
+
+    def _run(self) -> None:
+        deadline = self.started_at + self.max_duration
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                break
+            self._counts[self._collapse(frame)] += 1
+            self.samples += 1
+            del frame
+            if time.monotonic() >= deadline:
+                break
+
+    def _collapse(self, frame: Optional[FrameType]) -> str:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                name = getattr(code, "co_qualname", code.co_name)
+                label = self._labels[code] = f"{name} ({code.co_filename}:{code.co_firstlineno})"
+            labels.append(label)
+            frame = frame.f_back
+        labels.reverse()
+        return ";".join(labels)
+
+    def stats(self) -> Dict[str, object]:
+        """Whether the profiler is running, for how long and how many samples it took"""
+        running = self.running
+        return {
+            "running": running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "elapsed": time.monotonic() - self.started_at if running else None,
+        }
+
+
+# Profiler of the worker's event loop thread, driven by the admin routes
+profiler = SamplingProfiler()
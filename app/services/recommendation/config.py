@@ -0,0 +1,21 @@
+import os
+
+# Maximum number of (mood, city) items accepted in one batch request
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# Maximum number of upstream calls a batch request keeps in flight
+BATCH_UPSTREAM_CONCURRENCY = int(os.getenv("BATCH_UPSTREAM_CONCURRENCY", "8"))
+
+# Per-stage time limit in seconds for batch and stream items. It is longer
+# than the interactive stage limits because batch calls queue behind
+# interactive ones for rate limit tokens; each upstream call is still
+# bounded by HTTP_TIMEOUT once it is sent
+BATCH_STAGE_TIMEOUT = float(os.getenv("BATCH_STAGE_TIMEOUT", "60"))
+
+# Streaming recommendations: items processed concurrently and max results
+# buffered before the producer waits for the client to read
+STREAM_CONCURRENCY = int(os.getenv("STREAM_CONCURRENCY", "8"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "64"))
+
+# Longest accepted NDJSON request line in bytes
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
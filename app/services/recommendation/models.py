@@ -0,0 +1,28 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+from app.services.mood.models import MoodRequest, MoodResponse
+from app.services.recommendation.config import BATCH_MAX_ITEMS
+
+
+class BatchRecommendationRequest(BaseModel):
+    """Model for a batch of mood and city requests"""
+
+    items: List[MoodRequest] = Field(
+        ..., description="Mood and city pairs to recommend songs for", max_length=BATCH_MAX_ITEMS
+    )
+
+
+class BatchItemResult(BaseModel):
+    """Result of a single item in a batch, either a recommendation or an error"""
+
+    index: int = Field(..., description="Position of the item in the request")
+    status_code: int = Field(..., description="HTTP status the item would have had on its own")
+    result: Optional[MoodResponse] = None
+    error: Optional[str] = Field(None, description="Error detail when the item failed")
+
+
+class BatchRecommendationResponse(BaseModel):
+    """Response model for a batch of recommendations, in request order"""
+
+    results: List[BatchItemResult]
@@ -0,0 +1,312 @@
+import asyncio
+import logging
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from pydantic import ValidationError
+
+from app.api.deadline import gather_stages, run_stage
+from app.error.exceptions import MusicAPIError, WeatherAPIError
+from app.services.explanation.music_explanation import generate_explanation
+from app.services.mood.models import Mood, MoodRequest, MoodResponse
+from app.services.mood.mood_service import match_mood_with_weather
+from app.services.music.config import MOOD_MUSIC_TAGS
+from app.services.music.models import Song
+from app.services.music.music_service import get_song_recommendation, get_tag_pool
+from app.services.http.rate_limit import Priority, use_priority
+from app.services.recommendation.config import BATCH_STAGE_TIMEOUT
+from app.services.recommendation.models import BatchItemResult
+from app.services.weather.city_index import canonical_city_key
+from app.services.weather.models import WeatherData
+from app.services.weather.weather_service import get_weather_for_city
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def build_mood_response(
+    mood: Mood, city: str, weather: WeatherData, song: Song
+) -> MoodResponse:
+    """
+    Assemble the recommendation response from already fetched weather and song
+
+    Args:
+        mood: The user's current mood
+        city: The city name as requested
+        weather: Current weather data for the city
+        song: The recommended song
+
+    Returns:
+        MoodResponse with the match status and explanation filled in
+    """
+    matches = match_mood_with_weather(mood, weather)
+    explanation = generate_explanation(
+        mood=mood.value,
+        weather=weather,
+        song=song,
+        city=city,
+        matches=matches,
+    )
+    return MoodResponse(
+        mood=mood,
+        city=city,
+        weather=weather,
+        mood_matches_weather=matches,
+        recommendation=song,
+        explanation=explanation,
+    )
+
+
+def describe_error(error: Exception) -> Tuple[int, str]:
+    """
+    Map a service error to the status code and detail the endpoint would return
+
+    Args:
+        error: The exception raised while building a recommendation
+
+    Returns:
+        Tuple of HTTP status code and error detail
+    """
+    if isinstance(error, WeatherAPIError):
+        return 503, f"Weather service error: {str(error)}"
+    if isinstance(error, MusicAPIError):
+        return 503, f"Music service error: {str(error)}"
+    return 500, f"An unexpected error occurred: {str(error)}"
+
+
+async def recommend_batch(
+    items: Sequence[MoodRequest], concurrency: int
+) -> List[BatchItemResult]:
+    """
+    Build recommendations for many (mood, city) pairs at once
+
+    Each distinct city and each distinct mood tag is fetched only once, with
+    at most `concurrency` upstream calls in flight. A failing item gets an
+    error result instead of failing the batch.
+
+    Args:
+        items: The mood and city requests
+        concurrency: Maximum number of concurrent upstream calls
+
+    Returns:
+        One BatchItemResult per item, in request order
+    """
+    # Upstream calls of a batch queue behind interactive requests
+    with use_priority(Priority.BATCH):
+        return await _recommend_batch(items, concurrency)
+
+
+async def _recommend_batch(
+    items: Sequence[MoodRequest], concurrency: int
+) -> List[BatchItemResult]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(call: Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await call()
+
+    # Load the pools of every tag the requested moods use, once per tag
+    tags = list(dict.fromkeys(
+        tag for mood in dict.fromkeys(item.mood for item in items)
+        for tag in MOOD_MUSIC_TAGS.get(mood, [])
+    ))
+    tag_loads = [
+        asyncio.ensure_future(bounded(lambda tag=tag: get_tag_pool(tag))) for tag in tags
+    ]
+
+    # Start one weather fetch per distinct city
+    weather_fetches: Dict[str, asyncio.Future] = {}
+    for item in items:
+        key = canonical_city_key(item.city)
+        if key not in weather_fetches:
+            weather_fetches[key] = asyncio.ensure_future(bounded(
+                lambda city=item.city: run_stage(
+                    get_weather_for_city(city), BATCH_STAGE_TIMEOUT, WeatherAPIError, "Weather lookup"
+                )
+            ))
+
+    await asyncio.gather(*tag_loads, return_exceptions=True)
+
+    async def recommend(index: int, item: MoodRequest) -> BatchItemResult:
+        try:
+            weather = await asyncio.shield(weather_fetches[canonical_city_key(item.city)])
+            song = await bounded(lambda: run_stage(
+                get_song_recommendation(item.mood), BATCH_STAGE_TIMEOUT, MusicAPIError, "Song lookup"
+            ))
+            response = build_mood_response(item.mood, item.city, weather, song)
+            return BatchItemResult(index=index, status_code=200, result=response)
+        except Exception as e:
+            status_code, detail = describe_error(e)
+            return BatchItemResult(index=index, status_code=status_code, error=detail)
+
+    try:
+        return await asyncio.gather(*(recommend(index, item) for index, item in enumerate(items)))
+    finally:
+        for fetch in weather_fetches.values():
+            fetch.cancel()
+
+
+async def recommend_item(index: int, item: MoodRequest) -> BatchItemResult:
+    """
+    Build the recommendation for a single item, turning failures into an error result
+
+    Args:
+        index: Position of the item in the stream
+        item: The mood and city request
+
+    Returns:
+        BatchItemResult with either the recommendation or the error
+    """
+    try:
+        weather, song = await gather_stages(
+            run_stage(
+                get_weather_for_city(item.city), BATCH_STAGE_TIMEOUT, WeatherAPIError, "Weather lookup"
+            ),
+            run_stage(
+                get_song_recommendation(item.mood), BATCH_STAGE_TIMEOUT, MusicAPIError, "Song lookup"
+            ),
+        )
+        response = build_mood_response(item.mood, item.city, weather, song)
+        return BatchItemResult(index=index, status_code=200, result=response)
+    except Exception as e:
+        status_code, detail = describe_error(e)
+        return BatchItemResult(index=index, status_code=status_code, error=detail)
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a stream of byte chunks into newline-delimited lines
+
+    Blank lines are skipped. A line longer than `max_line_bytes` is discarded
+    without being buffered and yielded as None, so memory stays bounded.
+
+    Args:
+        chunks: Raw request body chunks
+        max_line_bytes: Longest line kept in memory
+
+    Yields:
+        Each non-blank line, or None for a line that was too long
+    """
+    buffer = bytearray()
+    skipping = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline < 0:
+                if not skipping:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        buffer.clear()
+                        skipping = True
+                break
+            if skipping:
+                skipping = False
+                yield None
+            else:
+                buffer += chunk[start:newline]
+                if len(buffer) > max_line_bytes:
+                    yield None
+                elif buffer.strip():
+                    yield bytes(buffer)
+                buffer.clear()
+            start = newline + 1
+    if skipping:
+        yield None
+    elif buffer.strip():
+        yield bytes(buffer)
+
+
+async def _recommend_line(index: int, line: Optional[bytes], max_line_bytes: int) -> BatchItemResult:
+    if line is None:
+        return BatchItemResult(
+            index=index, status_code=413, error=f"Item exceeds {max_line_bytes} bytes"
+        )
+    try:
+        item = MoodRequest.model_validate_json(line)
+    except ValidationError as e:
+        error = e.errors(include_url=False)[0]
+        location = ".".join(str(part) for part in error["loc"])
+        detail = f"Invalid item: {location}: {error['msg']}" if location else f"Invalid item: {error['msg']}"
+        return BatchItemResult(index=index, status_code=422, error=detail)
+    return await recommend_item(index, item)
+
+
+async def stream_recommendations(
+    chunks: AsyncIterator[bytes],
+    concurrency: int,
+    queue_size: int,
+    max_line_bytes: int,
+) -> AsyncIterator[BatchItemResult]:
+    """
+    Build recommendations for an NDJSON stream of mood and city requests
+
+    Items are read from the body only as fast as workers take them, and
+    workers pause when `queue_size` results are waiting for the client, so
+    memory use does not grow with the number of items. Results are yielded
+    in completion order and carry their input index.
+
+    Args:
+        chunks: Raw NDJSON request body chunks, one MoodRequest per line
+        concurrency: Number of items processed at the same time
+        queue_size: Maximum number of queued items and of unread results
+        max_line_bytes: Longest accepted request line
+
+    Yields:
+        One BatchItemResult per input line
+    """
+    workers = max(1, concurrency)
+    pending: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    finished: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+
+    async def read() -> None:
+        try:
+            index = 0
+            async for line in iter_ndjson_lines(chunks, max_line_bytes):
+                await pending.put((index, line))
+                index += 1
+        except Exception as e:
+            logger.error(f"Error reading recommendation stream: {e}")
+        for _ in range(workers):
+            await pending.put(None)
+
+    async def work() -> None:
+        while True:
+            entry = await pending.get()
+            if entry is None:
+                break
+            index, line = entry
+            await finished.put(await _recommend_line(index, line, max_line_bytes))
+        await finished.put(None)
+
+    # Tasks copy the context they are created in, so their upstream calls
+    # queue behind interactive requests
+    with use_priority(Priority.BATCH):
+        tasks = [asyncio.ensure_future(read())]
+        tasks += [asyncio.ensure_future(work()) for _ in range(workers)]
+    try:
+        running = workers
+        while running:
+            result = await finished.get()
+            if result is None:
+                running -= 1
+                continue
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,26 @@
+import os
+
+# Where sampled spans go: "file", "otlp" or empty to disable tracing
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").strip().lower()
+
+# Share of requests traced
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+
+# Follow the sampled flag of a caller's traceparent header instead of the
+# sample rate; only enable when every caller is a trusted internal service,
+# since otherwise any client can have all of its requests traced
+TRACE_TRUST_PARENT = os.getenv("TRACE_TRUST_PARENT", "false").lower() == "true"
+
+# OTLP/JSON lines file written by the "file" exporter
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "traces.jsonl")
+
+# OTLP/HTTP traces endpoint of a collector, used by the "otlp" exporter
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+
+# Seconds between exports, and max finished spans buffered in between;
+# spans beyond the buffer are dropped rather than slowing requests down
+TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", "5"))
+TRACE_MAX_QUEUE = int(os.getenv("TRACE_MAX_QUEUE", "2048"))
+
+# service.name resource attribute of exported spans
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "mood-weather-music")
@@ -0,0 +1,164 @@
+import abc
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from app.services.tracing.config import (
+    TRACE_FILE_PATH,
+    TRACE_OTLP_ENDPOINT,
+    TRACE_SERVICE_NAME,
+)
+from app.services.tracing.tracer import Span, tracer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in attributes.items()]
+
+
+def encode_spans(spans: Sequence[Span], service_name: str) -> Dict[str, Any]:
+    """
+    Encode finished spans as an OTLP/JSON ExportTraceServiceRequest
+
+    Args:
+        spans: Finished spans
+        service_name: Value of the service.name resource attribute
+
+    Returns:
+        JSON-compatible dictionary accepted by OTLP/HTTP collectors
+    """
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _attributes(span.attributes),
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        if span.error is not None:
+            item["status"] = {"code": 2, "message": span.error}
+        encoded.append(item)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _attributes({"service.name": service_name})},
+                "scopeSpans": [{"scope": {"name": "app"}, "spans": encoded}],
+            }
+        ]
+    }
+
+
+class SpanExporter(abc.ABC):
+    """Destination of finished spans"""
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+
+    @abc.abstractmethod
+    async def export(self, spans: Sequence[Span]) -> None:
+        """Send a batch of finished spans"""
+
+    async def close(self) -> None:
+        """Release the exporter's resources"""
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Append each batch as one OTLP/JSON line, the format the OpenTelemetry
+    collector's otlpjsonfile receiver reads
+    """
+
+    def __init__(self, path: str, service_name: str):
+        super().__init__(service_name)
+        self.path = path
+
+    def _write(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    async def export(self, spans: Sequence[Span]) -> None:
+        line = json.dumps(encode_spans(spans, self.service_name), separators=(",", ":")) + "\n"
+        # Keep file I/O off the event loop
+        await asyncio.to_thread(self._write, line)
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Post each batch to an OTLP/HTTP collector as JSON"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5):
+        super().__init__(service_name)
+        self.endpoint = endpoint
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def export(self, spans: Sequence[Span]) -> None:
+        response = await self._client.post(
+            self.endpoint, json=encode_spans(spans, self.service_name)
+        )
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_exporter(kind: str) -> Optional[SpanExporter]:
+    """
+    Create the span exporter named by TRACE_EXPORTER
+
+    Args:
+        kind: "file", "otlp", or empty for no tracing
+
+    Returns:
+        The exporter, or None if tracing is disabled
+
+    Raises:
+        ValueError: If the exporter is unknown
+    """
+    if not kind:
+        return None
+    if kind == "file":
+        return FileSpanExporter(TRACE_FILE_PATH, TRACE_SERVICE_NAME)
+    if kind == "otlp":
+        return OTLPHttpSpanExporter(TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME)
+    raise ValueError(f"Unknown trace exporter '{kind}'")
+
+
+def open_tracing(kind: str) -> None:
+    """
+    Start exporting sampled spans of the shared tracer
+
+    Args:
+        kind: Exporter name, see create_exporter
+    """
+    try:
+        exporter = create_exporter(kind)
+    except ValueError as e:
+        logger.error(f"{e}, continuing without tracing")
+        return
+    if exporter is not None:
+        tracer.start(exporter)
+
+
+async def close_tracing() -> None:
+    """Export the remaining spans and stop tracing"""
+    await tracer.aclose()
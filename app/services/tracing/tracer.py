@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.services.tracing.config import (
+    TRACE_EXPORT_INTERVAL,
+    TRACE_MAX_QUEUE,
+    TRACE_SAMPLE_RATE,
+    TRACE_TRUST_PARENT,
+)
+
+if TYPE_CHECKING:
+    from app.services.tracing.exporters import SpanExporter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+# W3C traceparent: version, trace ID, parent span ID and flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    """One timed operation of a trace"""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "kind",
+        "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(
+        self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: Dict[str, Any]
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach a string, bool, int or float attribute"""
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        """W3C traceparent header identifying this span as a sampled parent"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+# Innermost open span of the current request; None when it is not traced
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Parse a W3C traceparent header
+
+    Args:
+        header: Header value, if any
+
+    Returns:
+        Tuple of trace ID, parent span ID and the sampled flag, or None if
+        the header is missing or malformed
+    """
+    match = _TRACEPARENT.match(header.strip().lower()) if header else None
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class Tracer:
+    """
+    Records sampled requests as OpenTelemetry-compatible spans
+
+    The sampling decision is made once per request. Unsampled requests get
+    no span objects at all, and finished spans are only queued here, so
+    tracing costs requests almost nothing; a background task hands them to
+    the exporter in batches.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = TRACE_SAMPLE_RATE,
+        max_queue: int = TRACE_MAX_QUEUE,
+        interval: float = TRACE_EXPORT_INTERVAL,
+        trust_parent: bool = TRACE_TRUST_PARENT,
+    ):
+        self.sample_rate = sample_rate
+        self.trust_parent = trust_parent
+        self.interval = interval
+        self.exporter: Optional["SpanExporter"] = None
+        self._finished: Deque[Span] = deque(maxlen=max(1, max_queue))
+        self._flush_task: Optional[asyncio.Task] = None
+        self.exported = 0
+        self.dropped = 0
+
+    @contextmanager
+    def trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Open the root span of a request if the request is sampled
+
+        Requests are sampled at sample_rate, or by the sampled flag of the
+        caller's traceparent header if trust_parent is set. A sampled
+        request continues the caller's trace either way.
+
+        Args:
+            name: Span name
+            traceparent: The request's W3C traceparent header, if any
+            attributes: Span attributes
+
+        Yields:
+            The span, or None if the request is not traced
+        """
+        if self.exporter is None:
+            yield None
+            return
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, parent_sampled = parent
+        else:
+            trace_id, parent_id, parent_sampled = f"{random.getrandbits(128):032x}", None, False
+        if parent is not None and self.trust_parent:
+            sampled = parent_sampled
+        else:
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            yield None
+            return
+        with self._open(Span(name, trace_id, parent_id, SPAN_KIND_SERVER, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Open a child of the current span, if the request is traced
+
+        Args:
+            name: Span name
+            attributes: Span attributes
+
+        Yields:
+            The span, or None if the request is not traced
+        """
+        parent = current_span.get()
+        if parent is None:
+            yield None
+            return
+        with self._open(Span(name, parent.trace_id, parent.span_id, SPAN_KIND_INTERNAL, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def _open(self, span: Span) -> Iterator[Span]:
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if len(self._finished) == self._finished.maxlen:
+                self.dropped += 1
+            self._finished.append(span)
+
+    def start(self, exporter: "SpanExporter") -> None:
+        """
+        Send finished spans to an exporter from a background task
+
+        Args:
+            exporter: Destination of the spans
+        """
+        self.exporter = exporter
+        self._flush_task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Export every finished span queued so far"""
+        if self.exporter is None or not self._finished:
+            return
+        spans: List[Span] = list(self._finished)
+        self._finished.clear()
+        try:
+            await self.exporter.export(spans)
+            self.exported += len(spans)
+        except Exception as e:
+            self.dropped += len(spans)
+            logger.warning(f"Could not export {len(spans)} spans: {e}")
+
+    async def aclose(self) -> None:
+        """Stop the background task, export what is left and close the exporter"""
+        task, self._flush_task = self._flush_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+        exporter, self.exporter = self.exporter, None
+        if exporter is not None:
+            await exporter.close()
+
+
+# Tracer shared by every request, exporting once the app lifespan opens it
+tracer = Tracer()
@@ -0,0 +1,182 @@
+import gzip
+import json
+import logging
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.services.weather.config import CITY_INDEX_PATH
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class City(NamedTuple):
+    """A city from the offline index"""
+
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+
+
+def _read_tsv(path: str) -> Iterator[Tuple[City, List[str]]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            city = City(
+                id=int(fields[0]),
+                name=fields[1],
+                country=fields[2],
+                lat=float(fields[3]),
+                lon=float(fields[4]),
+            )
+            aliases = [a for a in fields[5].split("|") if a] if len(fields) > 5 else []
+            yield city, aliases
+
+
+def _read_city_list(path: str) -> Iterator[Tuple[City, List[str]]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        entries = json.load(f)
+    for entry in entries:
+        city = City(
+            id=int(entry["id"]),
+            name=entry["name"],
+            country=entry.get("country", ""),
+            lat=float(entry["coord"]["lat"]),
+            lon=float(entry["coord"]["lon"]),
+        )
+        yield city, []
+
+
+def read_cities(path: str) -> Iterator[Tuple[City, List[str]]]:
+    """
+    Read the cities of an index file
+
+    Two formats are understood: the bundled tab-separated list of id, name,
+    country code, latitude, longitude and |-separated aliases, and
+    OpenWeather's city.list.json export (optionally gzipped), which has no
+    aliases.
+
+    Args:
+        path: Index file; ".json" and ".json.gz" files are read as city.list
+
+    Returns:
+        Iterator of each city with its aliases
+    """
+    if path.endswith((".json", ".json.gz")):
+        return _read_city_list(path)
+    return _read_tsv(path)
+
+
+def normalize_city(city: str) -> str:
+    """
+    Normalize a city name so spelling variants share one key
+
+    Args:
+        city: Name of the city as given by the user, optionally followed by
+            a country code, e.g. "London, GB"
+
+    Returns:
+        Lower-cased city name with surrounding and repeated whitespace removed
+    """
+    return ",".join(" ".join(part.split()) for part in city.split(",")).casefold()
+
+
+class CityIndex:
+    """
+    Lookup of normalized city names and aliases to OpenWeather city IDs
+
+    The data file is read with read_cities. The app loads it at startup in
+    a worker thread; a lookup before that loads it on first use.
+
+    A name or "name,cc" shared by several cities, e.g. "london" in
+    OpenWeather's full city list, is left out of the index rather than
+    picking one of them, so it falls back to OpenWeather's own q= lookup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._cities: Optional[Dict[str, City]] = None
+
+    def _load(self) -> Dict[str, City]:
+        # None marks a name that more than one city answers to
+        cities: Dict[str, Optional[City]] = {}
+        try:
+            for city, aliases in read_cities(self.path):
+                for name in [city.name, *aliases]:
+                    for key in (normalize_city(name), normalize_city(f"{name},{city.country}")):
+                        known = cities.get(key, city)
+                        cities[key] = city if known is not None and known.id == city.id else None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"City index '{self.path}' could not be read: {e}")
+        ambiguous = sum(city is None for city in cities.values())
+        if ambiguous:
+            logger.info(f"Left {ambiguous} names shared by several cities out of the city index")
+        return {key: city for key, city in cities.items() if city is not None}
+
+    def load(self) -> int:
+        """
+        Read the data file, replacing any index loaded before
+
+        A full OpenWeather city list takes a while to parse, so the app calls
+        this through asyncio.to_thread rather than on the event loop.
+
+        Returns:
+            Number of names in the index
+        """
+        self._cities = self._load()
+        logger.info(f"Loaded city index with {len(self._cities)} names from '{self.path}'")
+        return len(self._cities)
+
+    def _index(self) -> Dict[str, City]:
+        if self._cities is None:
+            self.load()
+        return self._cities
+
+    def resolve(self, city: str) -> Optional[City]:
+        """
+        Resolve a city name or alias
+
+        Args:
+            city: Name of the city, optionally followed by a country code
+
+        Returns:
+            The matching City, or None if the name is not in the index
+        """
+        return self._index().get(normalize_city(city))
+
+
+# Shared index, loaded by the app lifespan or else on first lookup
+city_index = CityIndex(CITY_INDEX_PATH)
+
+
+def resolve_city_key(city: str) -> Tuple[Optional[City], str]:
+    """
+    Resolve a city through the index and get the key every cache layer uses for it
+
+    Args:
+        city: Name of the city as given by the user
+
+    Returns:
+        Tuple of the indexed City, or None if it is not indexed, and the key:
+        "id:<OpenWeather city ID>" for indexed cities, otherwise the normalized name
+    """
+    resolved = city_index.resolve(city)
+    return resolved, f"id:{resolved.id}" if resolved is not None else normalize_city(city)
+
+
+def canonical_city_key(city: str) -> str:
+    """
+    Get the key every cache layer uses for a city
+
+    Args:
+        city: Name of the city as given by the user
+
+    Returns:
+        "id:<OpenWeather city ID>" for indexed cities, otherwise the normalized name
+    """
+    return resolve_city_key(city)[1]
@@ -3,8 +3,8 @@ import os
 # API Key
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
 
-# Base url
-OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
+# Base url, overridable to point at a local stand-in such as benchmarks/fake_upstreams.py
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5")
 
 # Temperature ranges in Celsius
 TEMPERATURE_RANGES = {
@@ -78,4 +78,25 @@ MOOD_WEATHER_MAPPING = {
         "temperature": ["mild", "warm"],
         "match_all": True,
     },
-}
\ No newline at end of file
+}
+
+# Weather cache: seconds a city's weather is reused (0 disables) and max cities kept
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "300"))
+WEATHER_CACHE_MAX_SIZE = int(os.getenv("WEATHER_CACHE_MAX_SIZE", "1024"))
+
+# Negative cache of cities OpenWeather does not know: seconds a miss is
+# remembered (0 disables) and max cities kept
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "60"))
+NEGATIVE_CACHE_MAX_SIZE = int(os.getenv("NEGATIVE_CACHE_MAX_SIZE", "4096"))
+
+# Seconds expired weather is kept to answer while OpenWeather's circuit breaker is open
+WEATHER_STALE_TTL = float(os.getenv("WEATHER_STALE_TTL", "1800"))
+
+# Offline city index used to resolve names to OpenWeather city IDs: the
+# bundled TSV, or OpenWeather's city.list.json / city.list.json.gz export
+CITY_INDEX_PATH = os.getenv(
+    "CITY_INDEX_PATH", os.path.join(os.path.dirname(__file__), "data", "cities.tsv")
+)
+
+# Reject cities missing from the index before calling OpenWeather
+CITY_INDEX_STRICT = os.getenv("CITY_INDEX_STRICT", "false").lower() == "true"
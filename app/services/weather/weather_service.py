@@ -1,32 +1,197 @@
-from typing import Dict, Any
+import struct
+from bisect import bisect_right
+from typing import Dict, Any, Optional, Sequence, Tuple
 import httpx
 import logging
+import numpy as np
 from app.services.weather.config import (
     OPENWEATHER_API_KEY,
     OPENWEATHER_BASE_URL,
     TEMPERATURE_RANGES,
+    CITY_INDEX_STRICT,
+    NEGATIVE_CACHE_MAX_SIZE,
+    NEGATIVE_CACHE_TTL,
+    WEATHER_CACHE_MAX_SIZE,
+    WEATHER_CACHE_TTL,
     WEATHER_MAIN_MAPPING,
+    WEATHER_STALE_TTL,
+)
+from app.services.weather.models import WeatherCondition, WeatherData, WeatherTemperature
+from app.services.weather.city_index import City, resolve_city_key
+from app.services.cache.two_tier import l2_get_or_load
+from app.services.cache.ttl_cache import AsyncTTLCache
+from app.services.http.clients import WEATHER_UPSTREAM, get_client
+from app.error.exceptions import (
+    CircuitOpenError,
+    CityNotFoundError,
+    UpstreamUnavailableError,
+    WeatherAPIError,
+    find_upstream_unavailable_error,
 )
-from app.services.weather.models import WeatherData, WeatherTemperature
-from app.error.exceptions import WeatherAPIError
 
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Temperature categories in enum order; batch results are codes into this tuple
+TEMPERATURE_CATEGORIES: Tuple[WeatherTemperature, ...] = tuple(WeatherTemperature)
+
+
+def _compile_temperature_ranges() -> Tuple[Tuple[float, ...], Tuple[WeatherTemperature, ...]]:
+    """
+    Sort TEMPERATURE_RANGES into ascending lower bounds and their categories
+    """
+    ranges = sorted(TEMPERATURE_RANGES.items(), key=lambda item: item[1][0])
+    bounds = tuple(float(min_temp) for _, (min_temp, _) in ranges)
+    categories = tuple(WeatherTemperature(category) for category, _ in ranges)
+    return bounds, categories
+
+
+_TEMPERATURE_BOUNDS, _BOUND_CATEGORIES = _compile_temperature_ranges()
+_TEMPERATURE_BOUNDS_ARRAY = np.array(_TEMPERATURE_BOUNDS)
+_BOUND_CODES = np.array(
+    [TEMPERATURE_CATEGORIES.index(category) for category in _BOUND_CATEGORIES], dtype=np.intp
+)
+_MILD_CODE = TEMPERATURE_CATEGORIES.index(WeatherTemperature.MILD)
+
+# Recent weather per canonical city key, shared by all requests (L1)
+weather_cache = AsyncTTLCache(
+    max_size=WEATHER_CACHE_MAX_SIZE, ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_STALE_TTL
+)
+
+# Canonical keys of cities OpenWeather answered 404 for, so repeated bad
+# names are refused without an upstream call
+negative_city_cache = AsyncTTLCache(max_size=NEGATIVE_CACHE_MAX_SIZE, ttl=NEGATIVE_CACHE_TTL)
+
+# Compact L2 encoding: condition and category codes, temperature, humidity,
+# wind speed, then the description as UTF-8
+_WEATHER_RECORD = struct.Struct("<BBddd")
+_CONDITIONS: Tuple[WeatherCondition, ...] = tuple(WeatherCondition)
+
 
 async def get_weather_for_city(city: str) -> WeatherData:
     """
     Retrieve current weather data for a specified city
 
+    The city is resolved through the offline city index so weather is
+    fetched by OpenWeather city ID. Results are cached per canonical city
+    key, and concurrent requests for the same city share a single upstream
+    call. Cities OpenWeather does not know are remembered for a short while
+    and refused without another upstream call. While OpenWeather's circuit
+    breaker is open, recently expired weather is served instead of an error.
+
+    Args:
+        city: Name of the city
+
+    Returns:
+        WeatherData object containing the current weather information
+
+    Raises:
+        CityNotFoundError: If the city is unknown
+        WeatherAPIError: If there's an error retrieving data from the weather API
+    """
+    resolved, key = resolve_city_key(city)
+    if resolved is None and CITY_INDEX_STRICT:
+        raise CityNotFoundError(f"City '{city}' not found")
+
+    if negative_city_cache.lookup(key) is not None:
+        raise CityNotFoundError(f"City '{city}' not found")
+
+    try:
+        return await weather_cache.get_or_load(
+            key, lambda: load_weather_for_city(key, city, resolved)
+        )
+    except CityNotFoundError:
+        negative_city_cache.set(key, True)
+        raise
+    except WeatherAPIError as e:
+        # While OpenWeather's breaker is open, recent weather beats an error
+        stale = weather_cache.get_stale(key)
+        if stale is None or not isinstance(find_upstream_unavailable_error(e), CircuitOpenError):
+            raise
+        logger.warning(f"Serving stale weather for '{city}': {e}")
+        return stale
+
+
+async def load_weather_for_city(
+    key: str, city: str, resolved: Optional[City]
+) -> Tuple[WeatherData, float]:
+    """
+    Load weather through the distributed (L2) cache, so only one worker in
+    the deployment calls OpenWeather for a city
+
+    Args:
+        key: Canonical city key
+        city: Name of the city
+        resolved: The city from the offline index, if known
+
+    Returns:
+        Tuple of the weather data and the seconds it stays valid
+    """
+    return await l2_get_or_load(
+        f"weather:{key}",
+        lambda: fetch_weather_for_city(city, resolved),
+        encode=encode_weather,
+        decode=decode_weather,
+        ttl=WEATHER_CACHE_TTL,
+    )
+
+
+def encode_weather(weather: WeatherData) -> bytes:
+    """
+    Serialize weather data for the L2 cache
+
+    Args:
+        weather: Weather data to store
+
+    Returns:
+        Fixed-size record followed by the UTF-8 description
+    """
+    return _WEATHER_RECORD.pack(
+        _CONDITIONS.index(weather.condition),
+        TEMPERATURE_CATEGORIES.index(weather.temperature_category),
+        weather.temperature,
+        weather.humidity,
+        weather.wind_speed,
+    ) + weather.description.encode("utf-8")
+
+
+def decode_weather(data: bytes) -> WeatherData:
+    """
+    Restore weather data serialized by encode_weather
+
+    Args:
+        data: Serialized weather data
+
+    Returns:
+        WeatherData object
+    """
+    condition, category, temperature, humidity, wind_speed = _WEATHER_RECORD.unpack_from(data)
+    return WeatherData(
+        condition=_CONDITIONS[condition],
+        temperature=temperature,
+        temperature_category=TEMPERATURE_CATEGORIES[category],
+        humidity=humidity,
+        wind_speed=wind_speed,
+        description=data[_WEATHER_RECORD.size :].decode("utf-8"),
+    )
+
+
+async def fetch_weather_for_city(city: str, resolved: Optional[City] = None) -> WeatherData:
+    """
+    Fetch current weather data for a city from the OpenWeather API
+
     Args:
         city: Name of the city
+        resolved: The city from the offline index, if known, so the weather
+            is requested by ID instead of by name
 
     Returns:
         WeatherData object containing the current weather information
 
     Raises:
+        CityNotFoundError: If OpenWeather does not know the city
         WeatherAPIError: If there's an error retrieving data from the weather API
     """
     if not OPENWEATHER_API_KEY:
@@ -34,20 +199,23 @@ async def get_weather_for_city(city: str) -> WeatherData:
         raise WeatherAPIError("OpenWeather API key is not configured")
 
     params = {
-        "q": city,
         "appid": OPENWEATHER_API_KEY,
         "units": "metric",  # Use metric units (Celsius)
     }
+    if resolved is not None:
+        params["id"] = resolved.id
+    else:
+        params["q"] = " ".join(city.split())
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{OPENWEATHER_BASE_URL}/weather", params=params
-            )
+        client = get_client(WEATHER_UPSTREAM)
+        response = await client.get(
+            f"{OPENWEATHER_BASE_URL}/weather", params=params
+        )
 
         if response.status_code == 404:
             logger.error(f"City '{city}' not found in OpenWeather API")
-            raise WeatherAPIError(f"City '{city}' not found")
+            raise CityNotFoundError(f"City '{city}' not found")
 
         response.raise_for_status()
         data = response.json()
@@ -55,6 +223,11 @@ async def get_weather_for_city(city: str) -> WeatherData:
         # Process the weather data
         return process_weather_data(data)
 
+    except CityNotFoundError:
+        raise
+    except UpstreamUnavailableError as e:
+        logger.warning(f"OpenWeather unavailable: {e}")
+        raise WeatherAPIError(f"Weather service is unavailable: {str(e)}") from e
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error from OpenWeather API: {e}")
         raise WeatherAPIError(
@@ -101,15 +274,38 @@ def categorize_temperature(temp: float) -> WeatherTemperature:
     """
     Categorize temperature into predefined ranges
 
+    Ranges include their lower bound and exclude their upper bound. Readings
+    below the coldest range count as its category and readings above the
+    hottest range as the hottest category.
+
     Args:
         temp: Temperature in Celsius
 
     Returns:
         WeatherTemperature category
     """
-    for category, (min_temp, max_temp) in TEMPERATURE_RANGES.items():
-        if min_temp <= temp < max_temp:
-            return category
+    # NaN falls in no range
+    if temp != temp:
+        return WeatherTemperature.MILD
 
-    # Default to "mild" if outside of our defined ranges
-    return WeatherTemperature.MILD
+    index = bisect_right(_TEMPERATURE_BOUNDS, temp) - 1
+    return _BOUND_CATEGORIES[max(index, 0)]
+
+
+def categorize_temperatures(temps: Sequence[float]) -> np.ndarray:
+    """
+    Vectorized categorize_temperature for bulk imports and analytics
+
+    Args:
+        temps: Temperatures in Celsius
+
+    Returns:
+        Integer array of codes into TEMPERATURE_CATEGORIES, which can be passed
+        straight to match_moods_with_weather
+    """
+    temps = np.asarray(temps, dtype=float)
+    bins = np.searchsorted(_TEMPERATURE_BOUNDS_ARRAY, temps, side="right") - 1
+    np.clip(bins, 0, len(_TEMPERATURE_BOUNDS) - 1, out=bins)
+    codes = _BOUND_CODES[bins]
+    codes[np.isnan(temps)] = _MILD_CODE
+    return codes
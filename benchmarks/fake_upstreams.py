@@ -0,0 +1,190 @@
+"""
+Local stand-ins for the OpenWeather and Last.fm endpoints the app calls
+
+Answers are deterministic per city and tag, so runs are comparable, while
+latency, jitter and error rates are configurable to mimic a slow or flaky
+upstream. Run standalone to benchmark a separately started API:
+
+    python -m benchmarks.fake_upstreams --port 9000 --latency 80 --jitter 30
+
+and point the API at it with
+OPENWEATHER_BASE_URL=http://127.0.0.1:9000/data/2.5 and
+LASTFM_BASE_URL=http://127.0.0.1:9000/2.0.
+"""
+import argparse
+import asyncio
+import random
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+from app.services.weather.city_index import read_cities
+from app.services.weather.config import CITY_INDEX_PATH
+
+# Cities whose name starts with this are answered with 404, like typos
+UNKNOWN_CITY_PREFIX = "nowhere"
+
+_WEATHER = [
+    ("Clear", "clear sky"),
+    ("Clouds", "scattered clouds"),
+    ("Rain", "light rain"),
+    ("Drizzle", "light intensity drizzle"),
+    ("Thunderstorm", "thunderstorm"),
+    ("Snow", "light snow"),
+    ("Mist", "mist"),
+]
+
+
+@dataclass
+class UpstreamBehaviour:
+    """How a fake upstream answers"""
+
+    # Mean and standard deviation of the added latency, in milliseconds
+    latency: float = 50
+    jitter: float = 20
+    # Share of calls answered with a 5xx error
+    error_rate: float = 0.0
+
+    async def delay(self) -> Optional[JSONResponse]:
+        """Sleep for one call's latency, then maybe fail it"""
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)) / 1000)
+        if random.random() < self.error_rate:
+            return JSONResponse(status_code=503, content={"message": "Service unavailable"})
+        return None
+
+
+def load_city_names(path: str = CITY_INDEX_PATH) -> Dict[int, str]:
+    """
+    Read the city IDs and names of the offline city index
+
+    Args:
+        path: The index TSV file
+
+    Returns:
+        Mapping of OpenWeather city ID to city name
+    """
+    return {city.id: city.name for city, _ in read_cities(path)}
+
+
+def _seed(value: str) -> int:
+    return zlib.crc32(value.casefold().encode("utf-8"))
+
+
+def weather_payload(city_id: int, name: str) -> Dict:
+    """Deterministic OpenWeather current weather answer for a city"""
+    seed = _seed(name)
+    main, description = _WEATHER[seed % len(_WEATHER)]
+    return {
+        "weather": [{"id": 800, "main": main, "description": description, "icon": "01d"}],
+        "main": {
+            "temp": round((seed % 550) / 10 - 15, 1),
+            "humidity": seed % 100,
+        },
+        "wind": {"speed": round((seed >> 8) % 150 / 10, 1)},
+        "id": city_id,
+        "name": name,
+        "cod": 200,
+    }
+
+
+def top_tracks_payload(tag: str, limit: int) -> Dict:
+    """Deterministic Last.fm tag.gettoptracks answer for a tag"""
+    tracks: List[Dict] = []
+    for rank in range(1, limit + 1):
+        title = f"{tag.title()} Song {rank}"
+        artist = f"Artist {_seed(tag) % 97 + rank % 7}"
+        tracks.append(
+            {
+                "name": title,
+                "artist": {"name": artist},
+                "url": f"https://www.last.fm/music/{artist.replace(' ', '+')}/_/{title.replace(' ', '+')}",
+                "@attr": {"rank": str(rank)},
+            }
+        )
+    return {"tracks": {"track": tracks, "@attr": {"tag": tag}}}
+
+
+def create_fake_upstreams(
+    weather: Optional[UpstreamBehaviour] = None,
+    music: Optional[UpstreamBehaviour] = None,
+) -> FastAPI:
+    """
+    Create the ASGI app serving both fake upstreams
+
+    Args:
+        weather: Behaviour of the OpenWeather stand-in
+        music: Behaviour of the Last.fm stand-in
+
+    Returns:
+        App serving /data/2.5/weather and /2.0
+    """
+    weather = weather or UpstreamBehaviour()
+    music = music or UpstreamBehaviour()
+    city_names = load_city_names()
+    app = FastAPI(title="Fake OpenWeather and Last.fm")
+    app.state.calls = {"weather": 0, "music": 0}
+
+    @app.get("/data/2.5/weather")
+    async def current_weather(q: Optional[str] = None, id: Optional[int] = None):
+        app.state.calls["weather"] += 1
+        failure = await weather.delay()
+        if failure is not None:
+            return failure
+        name = city_names.get(id) if id is not None else q
+        if not name or name.strip().casefold().startswith(UNKNOWN_CITY_PREFIX):
+            return JSONResponse(status_code=404, content={"cod": "404", "message": "city not found"})
+        return weather_payload(id or _seed(name), name)
+
+    @app.get("/2.0")
+    @app.get("/2.0/")
+    async def lastfm(method: str, tag: str = "", limit: int = Query(50, ge=1, le=1000)):
+        app.state.calls["music"] += 1
+        failure = await music.delay()
+        if failure is not None:
+            return failure
+        if method != "tag.gettoptracks":
+            return JSONResponse(status_code=400, content={"error": 3, "message": "Invalid Method"})
+        return top_tracks_payload(tag, limit)
+
+    return app
+
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the latency, jitter and error rate options of both fake upstreams"""
+    for upstream in ("weather", "music"):
+        parser.add_argument(f"--{upstream}-latency", type=float, default=50, help="Mean latency in ms")
+        parser.add_argument(f"--{upstream}-jitter", type=float, default=20, help="Latency std deviation in ms")
+        parser.add_argument(f"--{upstream}-error-rate", type=float, default=0.0, help="Share of 503 answers")
+
+
+def behaviours_from_arguments(args: argparse.Namespace) -> Dict[str, UpstreamBehaviour]:
+    """Build both upstream behaviours from parsed options"""
+    return {
+        upstream: UpstreamBehaviour(
+            latency=getattr(args, f"{upstream}_latency"),
+            jitter=getattr(args, f"{upstream}_jitter"),
+            error_rate=getattr(args, f"{upstream}_error_rate"),
+        )
+        for upstream in ("weather", "music")
+    }
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    behaviours = behaviours_from_arguments(args)
+    app = create_fake_upstreams(behaviours["weather"], behaviours["music"])
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
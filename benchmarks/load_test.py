@@ -0,0 +1,297 @@
+"""
+Load generator reporting throughput and tail latency of /recommendations
+
+By default the real app runs in this process with its upstream clients
+routed to the fake upstreams, so no API quota is used and no server needs
+to be started:
+
+    python -m benchmarks.load_test --concurrency 50 --duration 20
+
+Settings of the app under test are read from the environment as usual,
+e.g. RESPONSE_CACHE_TTL=30 or WEATHER_CACHE_TTL=0. To include the
+network, uvicorn and worker processes, start the fake upstreams and the API
+separately and pass --url:
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --json run.json
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --compare run.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+# Default what the in-process app needs before it is imported; the fake
+# upstreams ignore the API keys, and the per-upstream rate limits are lifted
+# because they model the real quotas. Values already set in the environment win.
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+os.environ.setdefault("LASTFM_API_KEY", "benchmark")
+os.environ.setdefault("OPENWEATHER_RATE_PER_MINUTE", "0")
+os.environ.setdefault("LASTFM_RATE_PER_MINUTE", "0")
+
+from benchmarks.fake_upstreams import (  # noqa: E402
+    UNKNOWN_CITY_PREFIX,
+    add_behaviour_arguments,
+    behaviours_from_arguments,
+    create_fake_upstreams,
+    load_city_names,
+)
+
+# App settings recorded with every report, so runs can be told apart
+REPORTED_SETTINGS = (
+    "RESPONSE_CACHE_TTL",
+    "WEATHER_CACHE_TTL",
+    "CACHE_BACKEND",
+    "SONG_POOL_MODE",
+    "HTTP_MAX_CONNECTIONS",
+    "HTTP_HEDGING",
+    "HTTP_BREAKER_ENABLED",
+    "UVICORN_WORKERS",
+)
+
+MOODS = ("happy", "sad", "calm", "energetic", "romantic", "angry", "anxious", "relaxed")
+
+
+@dataclass
+class LoadResult:
+    """Outcome of one load run"""
+
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+
+    def record(self, latency: float, status: str) -> None:
+        self.latencies.append(latency)
+        self.statuses[status] += 1
+
+
+def percentile(ordered: Sequence[float], p: float) -> float:
+    """
+    Nearest-rank percentile of sorted values
+
+    Args:
+        ordered: Values in ascending order
+        p: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or NaN without values
+    """
+    if not ordered:
+        return math.nan
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def build_targets(cities: int, unknown_ratio: float, seed: int) -> List[Tuple[str, str]]:
+    """
+    Build the mood and city pairs requests are drawn from
+
+    Args:
+        cities: Number of indexed cities to use
+        unknown_ratio: Share of pairs whose city the weather upstream does not know
+        seed: Random seed, so runs draw the same pairs
+
+    Returns:
+        List of (mood, city) pairs
+    """
+    names = sorted(load_city_names().values())[:cities]
+    pairs = [(mood, city) for city in names for mood in MOODS]
+    unknown = round(len(pairs) * unknown_ratio / max(1e-9, 1 - unknown_ratio))
+    pairs += [(MOODS[i % len(MOODS)], f"{UNKNOWN_CITY_PREFIX} {i}") for i in range(unknown)]
+    random.Random(seed).shuffle(pairs)
+    return pairs
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    targets: Sequence[Tuple[str, str]],
+    method: str,
+    concurrency: int,
+    duration: float,
+    rate: Optional[float] = None,
+) -> LoadResult:
+    """
+    Send requests for a fixed time and record their latencies
+
+    Without a rate, each of `concurrency` workers sends its next request as
+    soon as the previous one completes. With a rate, requests are scheduled
+    at fixed intervals and latency is measured from the scheduled time, so
+    a stalled server is not hidden by workers waiting on it.
+
+    Args:
+        client: Client bound to the app under test
+        targets: (mood, city) pairs, used round-robin
+        method: "post" or "get"
+        concurrency: Number of concurrent workers
+        duration: Seconds to run
+        rate: Requests per second to schedule, or None for closed-loop load
+
+    Returns:
+        The recorded latencies in milliseconds and response statuses
+    """
+    result = LoadResult()
+    started = time.perf_counter()
+    deadline = started + duration
+    sent = 0
+
+    async def worker() -> None:
+        nonlocal sent
+        while True:
+            index = sent
+            sent += 1
+            if rate:
+                scheduled = started + index / rate
+                if scheduled >= deadline:
+                    return
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            else:
+                scheduled = time.perf_counter()
+                if scheduled >= deadline:
+                    return
+            mood, city = targets[index % len(targets)]
+            try:
+                if method == "get":
+                    response = await client.get(
+                        "/api/v1/recommendations", params={"mood": mood, "city": city}
+                    )
+                else:
+                    response = await client.post(
+                        "/api/v1/recommendations", json={"mood": mood, "city": city}
+                    )
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            result.record((time.perf_counter() - scheduled) * 1000, status)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def summarize(result: LoadResult) -> Dict[str, float]:
+    """
+    Reduce a run to throughput and latency percentiles
+
+    Args:
+        result: The run
+
+    Returns:
+        Dictionary of requests, rps, error share and p50/p95/p99/max in ms
+    """
+    ordered = sorted(result.latencies)
+    requests = len(ordered)
+    ok = result.statuses.get("200", 0)
+    return {
+        "requests": requests,
+        "rps": requests / result.elapsed if result.elapsed else 0.0,
+        "error_ratio": (requests - ok) / requests if requests else 0.0,
+        "p50_ms": percentile(ordered, 50),
+        "p95_ms": percentile(ordered, 95),
+        "p99_ms": percentile(ordered, 99),
+        "max_ms": ordered[-1] if ordered else math.nan,
+    }
+
+
+def print_report(summary: Dict[str, float], statuses: Counter, baseline: Optional[Dict] = None) -> None:
+    """Print a run's summary, with the change against a baseline report if given"""
+    print(f"{'metric':<12}{'value':>12}" + (f"{'baseline':>12}{'change':>10}" if baseline else ""))
+    for key, value in summary.items():
+        line = f"{key:<12}{value:>12.2f}" if isinstance(value, float) else f"{key:<12}{value:>12}"
+        if baseline and key in baseline["summary"]:
+            before = baseline["summary"][key]
+            change = (value - before) / before * 100 if before else math.nan
+            line += f"{before:>12.2f}{change:>9.1f}%"
+        print(line)
+    print("statuses    " + ", ".join(f"{status}: {count}" for status, count in statuses.most_common()))
+
+
+async def main_async(args: argparse.Namespace) -> Dict:
+    targets = build_targets(args.cities, args.unknown_ratio, args.seed)
+    async with AsyncExitStack() as stack:
+        fake = None
+        if args.url:
+            client = httpx.AsyncClient(
+                base_url=args.url,
+                timeout=args.timeout,
+                limits=httpx.Limits(max_connections=args.concurrency),
+            )
+        else:
+            from app import create_app
+            from app.services.http.clients import MUSIC_UPSTREAM, WEATHER_UPSTREAM
+
+            # Writing a log line per failed request would skew the results
+            logging.getLogger().setLevel(args.log_level)
+
+            behaviours = behaviours_from_arguments(args)
+            fake = create_fake_upstreams(behaviours["weather"], behaviours["music"])
+            fake_transport = httpx.ASGITransport(app=fake)
+            app = create_app({WEATHER_UPSTREAM: fake_transport, MUSIC_UPSTREAM: fake_transport})
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=args.timeout
+            )
+        await stack.enter_async_context(client)
+
+        if args.warmup > 0:
+            await run_load(client, targets, args.method, args.concurrency, args.warmup, args.rate)
+        result = await run_load(
+            client, targets, args.method, args.concurrency, args.duration, args.rate
+        )
+
+    report = {
+        "summary": summarize(result),
+        "statuses": dict(result.statuses),
+        "options": {
+            key: value for key, value in vars(args).items() if key not in ("json", "compare")
+        },
+        "settings": {name: os.environ[name] for name in REPORTED_SETTINGS if name in os.environ},
+    }
+    if fake is not None:
+        report["upstream_calls"] = dict(fake.state.calls)
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running API; the app runs in-process if omitted")
+    parser.add_argument("--method", choices=("post", "get"), default="post")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to measure")
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds of unrecorded load first")
+    parser.add_argument("--rate", type=float, help="Scheduled requests per second (open loop)")
+    parser.add_argument("--cities", type=int, default=20, help="Number of indexed cities to request")
+    parser.add_argument("--unknown-ratio", type=float, default=0.0, help="Share of unknown cities")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="CRITICAL", help="Log level of the in-process app")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--compare", help="Report file of an earlier run to compare against")
+    add_behaviour_arguments(parser)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(main_async(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report["summary"], Counter(report["statuses"]), baseline)
+    if "upstream_calls" in report:
+        print("upstreams   " + ", ".join(f"{k}: {v}" for k, v in report["upstream_calls"].items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
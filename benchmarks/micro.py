@@ -0,0 +1,136 @@
+"""
+Timing and baseline helpers for the microbenchmarks in tests/test_microbenchmarks.py
+
+Timings are stored relative to a fixed pure-Python calibration workload
+measured in the same run, so a baseline recorded on one machine remains
+meaningful on a faster or slower one.
+"""
+import json
+import os
+import platform
+import statistics
+import timeit
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Baseline file shared by every run, committed with the code it measures
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _calibration_workload() -> int:
+    total = 0
+    for i in range(1000):
+        total += i * i % 7
+    return total
+
+
+def _calls_per_round(timer: timeit.Timer, min_time: float) -> int:
+    number, elapsed = timer.autorange()
+    return max(1, int(number * min_time / elapsed)) if elapsed else number
+
+
+def measure(fn: Callable[[], Any], repeat: int = 7, min_time: float = 0.02) -> float:
+    """
+    Time a function call
+
+    The number of calls per round is chosen so a round takes about
+    `min_time`; the fastest of `repeat` rounds is kept, since slower rounds
+    only add scheduler and GC noise.
+
+    Args:
+        fn: Zero-argument function to time
+        repeat: Number of rounds
+        min_time: Seconds per round
+
+    Returns:
+        Nanoseconds per call
+    """
+    timer = timeit.Timer(fn)
+    number = _calls_per_round(timer, min_time)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def measure_relative(fn: Callable[[], Any], rounds: int = 15, min_time: float = 0.02) -> Tuple[float, float]:
+    """
+    Time a function call relative to the calibration workload
+
+    Rounds of the function and of the calibration workload alternate, so
+    both see the same CPU frequency and load; the median ratio is kept.
+
+    Args:
+        fn: Zero-argument function to time
+        rounds: Number of alternating rounds
+        min_time: Seconds per round
+
+    Returns:
+        Tuple of the fastest nanoseconds per call and the relative time
+    """
+    timer = timeit.Timer(fn)
+    calibration = timeit.Timer(_calibration_workload)
+    number = _calls_per_round(timer, min_time)
+    calibration_number = _calls_per_round(calibration, min_time)
+    timings, ratios = [], []
+    for _ in range(rounds):
+        seconds = timer.timeit(number) / number
+        calibration_seconds = calibration.timeit(calibration_number) / calibration_number
+        timings.append(seconds * 1e9)
+        ratios.append(seconds / calibration_seconds)
+    return min(timings), statistics.median(ratios)
+
+
+def load_baseline(path: str = DEFAULT_BASELINE_PATH) -> Dict[str, float]:
+    """
+    Read stored relative timings
+
+    Args:
+        path: Baseline file
+
+    Returns:
+        Mapping of benchmark name to its time relative to the calibration
+        workload, empty if there is no baseline yet
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["relative"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: Dict[str, Tuple[float, float]], path: str = DEFAULT_BASELINE_PATH) -> None:
+    """
+    Store relative timings as the new baseline
+
+    Nanoseconds per call are stored alongside for reference only; just the
+    relative times are compared.
+
+    Args:
+        results: Mapping of benchmark name to nanoseconds per call and relative time
+        path: Baseline file
+    """
+    ordered = sorted(results.items())
+    baseline = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "ns_per_call": {name: round(ns, 1) for name, (ns, _) in ordered},
+        "relative": {name: round(relative, 5) for name, (_, relative) in ordered},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def regression(relative: float, baseline: Optional[float], threshold: float) -> Optional[float]:
+    """
+    Check a timing against its baseline
+
+    Args:
+        relative: Measured time relative to the calibration workload
+        baseline: Baseline relative time, if one is stored
+        threshold: Allowed slowdown in percent
+
+    Returns:
+        The slowdown in percent if it exceeds the threshold, otherwise None
+    """
+    if not baseline:
+        return None
+    slowdown = (relative / baseline - 1) * 100
+    return slowdown if slowdown > threshold else None
@@ -1,11 +1,20 @@
+import os
 import uvicorn
-from app import create_app
 from dotenv import load_dotenv
 
+# Load .env before importing the app, whose config modules read the environment
 load_dotenv()
 
+from app import create_app
+
 
 app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000)
+    # Workers on one host can share upstream results through SHARED_CACHE_PATH
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+    )
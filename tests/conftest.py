@@ -0,0 +1,25 @@
+import pytest
+from app.api.response_cache import response_cache
+from app.services.http.clients import circuit_breakers
+from app.services.music.music_service import failed_tag_cache, tag_pool_cache
+from app.services.weather.weather_service import negative_city_cache, weather_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty in-process caches and closed circuit breakers"""
+    weather_cache.clear()
+    negative_city_cache.clear()
+    tag_pool_cache.clear()
+    failed_tag_cache.clear()
+    response_cache.clear()
+    for breaker in circuit_breakers.values():
+        breaker.reset()
+    yield
+    weather_cache.clear()
+    negative_city_cache.clear()
+    tag_pool_cache.clear()
+    failed_tag_cache.clear()
+    response_cache.clear()
+    for breaker in circuit_breakers.values():
+        breaker.reset()
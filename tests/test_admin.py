@@ -0,0 +1,88 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app import create_app
+from app.services.profiling.sampler import SamplingProfiler
+
+TOKEN = "s3cret"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+
+
+@pytest.fixture
+def admin_client(monkeypatch):
+    monkeypatch.setattr("app.ADMIN_ENABLED", True)
+    monkeypatch.setattr("app.ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr("app.api.admin.ADMIN_TOKEN", TOKEN)
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def test_admin_routes_are_not_mounted_by_default():
+    """Test that the admin surface does not exist unless enabled"""
+    assert TestClient(create_app()).get("/admin/profiler", headers=AUTH).status_code == 404
+
+
+def test_admin_routes_require_the_token(admin_client):
+    """Test that requests without the right bearer token are refused"""
+    assert admin_client.get("/admin/profiler").status_code == 401
+    assert admin_client.get("/admin/profiler", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert admin_client.get("/admin/profiler", headers=AUTH).json()["running"] is False
+
+
+def test_profiler_produces_collapsed_stacks(admin_client):
+    """Test a start/stop cycle of the sampling profiler"""
+    started = admin_client.post("/admin/profiler/start", params={"interval": 0.005}, headers=AUTH)
+    assert started.json()["running"] is True
+    assert admin_client.post("/admin/profiler/start", headers=AUTH).status_code == 409
+    time.sleep(0.1)
+
+    response = admin_client.post("/admin/profiler/stop", headers=AUTH)
+    assert response.status_code == 200
+    assert "profile.folded" in response.headers["content-disposition"]
+    lines = response.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+    assert admin_client.post("/admin/profiler/stop", headers=AUTH).status_code == 409
+
+
+def test_profiler_collapses_stacks_outermost_first():
+    """Test the collapsed format of a sampled stack"""
+    profiler = SamplingProfiler()
+
+    def inner():
+        import sys
+        return profiler._collapse(sys._getframe())
+
+    def outer():
+        return inner()
+
+    frames = outer().split(";")
+    assert frames[-1].startswith("test_profiler_collapses_stacks_outermost_first.<locals>.inner (")
+    assert frames[-2].startswith("test_profiler_collapses_stacks_outermost_first.<locals>.outer (")
+
+
+def test_tracemalloc_snapshots_diff(admin_client):
+    """Test taking and diffing tracemalloc snapshots"""
+    assert admin_client.post("/admin/tracemalloc/snapshots", headers=AUTH).status_code == 409
+    assert admin_client.post("/admin/tracemalloc/start", headers=AUTH).status_code == 204
+    try:
+        first = admin_client.post("/admin/tracemalloc/snapshots", headers=AUTH).json()
+        retained = [bytearray(1024) for _ in range(1000)]
+        second = admin_client.post("/admin/tracemalloc/snapshots", headers=AUTH).json()
+
+        diff = admin_client.get(
+            "/admin/tracemalloc/diff",
+            params={"from": first["id"], "to": second["id"], "limit": 5},
+            headers=AUTH,
+        )
+        assert diff.status_code == 200
+        lines = diff.json()["lines"]
+        assert any("test_admin.py" in line["location"] and line["size_diff"] >= 1024 * 1000 for line in lines)
+        assert admin_client.get(
+            "/admin/tracemalloc/diff", params={"from": 999, "to": second["id"]}, headers=AUTH
+        ).status_code == 404
+        del retained
+    finally:
+        assert admin_client.post("/admin/tracemalloc/stop", headers=AUTH).status_code == 204
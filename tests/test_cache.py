@@ -0,0 +1,321 @@
+import asyncio
+import sqlite3
+import pytest
+from app.error.exceptions import CacheBackendError
+from app.services.cache import two_tier
+from app.services.cache.backends import InMemoryBackend, SQLiteBackend
+from app.services.cache.redis_backend import RedisReplyError, encode_command, read_reply
+from app.services.cache.shared_cache import SQLiteSharedCache
+from app.services.cache.swr_cache import StaleWhileRevalidateCache
+from app.services.cache.ttl_cache import AsyncTTLCache
+
+
+class FakeClock:
+    """Manually advanced clock for expiry tests"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_expires_entries():
+    """Test that entries are refetched once their TTL has passed"""
+    clock = FakeClock()
+    cache = AsyncTTLCache(max_size=10, ttl=60, clock=clock)
+    calls = []
+
+    async def fetch():
+        calls.append(clock.now)
+        return len(calls)
+
+    assert await cache.get_or_fetch("london", fetch) == 1
+    clock.now = 59
+    assert await cache.get_or_fetch("london", fetch) == 1
+    clock.now = 61
+    assert await cache.get_or_fetch("london", fetch) == 2
+
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted when the cache is full"""
+    cache = AsyncTTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_coalesces_concurrent_misses():
+    """Test that concurrent misses for one key share a single fetch"""
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "sunny"
+
+    results = await asyncio.gather(*(cache.get_or_fetch("london", fetch) for _ in range(10)))
+
+    assert results == ["sunny"] * 10
+    assert calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_does_not_cache_failures():
+    """Test that a failed fetch is raised to every waiter and not stored"""
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+
+    async def failing_fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(
+        cache.get_or_fetch("london", failing_fetch),
+        cache.get_or_fetch("london", failing_fetch),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_swr_cache_serves_stale_value_while_refreshing():
+    """Test that stale reads return immediately and refresh in the background"""
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache(ttl=60, retry_interval=10, clock=clock)
+    refresh_started = asyncio.Event()
+    release_refresh = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            refresh_started.set()
+            await release_refresh.wait()
+        return f"pool-{calls}"
+
+    assert await cache.get_or_fetch("happy", fetch) == "pool-1"
+
+    clock.now = 61
+    # The stale pool is served without waiting for the refresh
+    assert await cache.get_or_fetch("happy", fetch) == "pool-1"
+    await asyncio.wait_for(refresh_started.wait(), timeout=1)
+    assert await cache.get_or_fetch("happy", fetch) == "pool-1"
+
+    release_refresh.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert await cache.get_or_fetch("happy", fetch) == "pool-2"
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_swr_cache_keeps_last_good_value_when_refresh_fails():
+    """Test that a failed refresh keeps serving the previous value"""
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache(ttl=60, retry_interval=10, clock=clock)
+    cache.set("happy", "pool-1")
+
+    async def failing_fetch():
+        raise RuntimeError("Last.fm down")
+
+    clock.now = 61
+    assert await cache.get_or_fetch("happy", failing_fetch) == "pool-1"
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert cache.refresh_failures == 1
+    # The failed refresh is not retried before the retry interval
+    assert await cache.get_or_fetch("happy", failing_fetch) == "pool-1"
+    assert cache.stats()["hits"] == 1
+
+
+def test_sqlite_shared_cache_values_expire(tmp_path):
+    """Test that shared values are visible to other connections until they expire"""
+    clock = FakeClock()
+    path = str(tmp_path / "shared.db")
+    writer = SQLiteSharedCache(path, clock=clock)
+    reader = SQLiteSharedCache(path, clock=clock)
+
+    writer.set("weather:id:2643743", b"sunny", ttl=60)
+    assert reader.get("weather:id:2643743") == (b"sunny", 60)
+
+    clock.now = 61
+    assert reader.get("weather:id:2643743") is None
+    writer.close()
+    reader.close()
+
+
+def test_sqlite_shared_cache_lease_has_one_holder(tmp_path):
+    """Test that only one worker holds a key's refresh lease until it is released or expires"""
+    clock = FakeClock()
+    path = str(tmp_path / "shared.db")
+    first = SQLiteSharedCache(path, clock=clock)
+    second = SQLiteSharedCache(path, clock=clock)
+
+    assert first.acquire_lease("tags:happy", ttl=10) is True
+    assert second.acquire_lease("tags:happy", ttl=10) is False
+
+    first.release_lease("tags:happy")
+    assert second.acquire_lease("tags:happy", ttl=10) is True
+
+    clock.now = 11
+    assert first.acquire_lease("tags:happy", ttl=10) is True
+    first.close()
+    second.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_does_not_wait_for_a_busy_writer(tmp_path):
+    """Test that writes skip quickly while another worker holds the write lock"""
+    path = str(tmp_path / "shared.db")
+    backend = SQLiteBackend(path, busy_timeout=0.005)
+    await backend.set("weather:id:2643743", b"sunny", ttl=60)
+    assert (await backend.get("weather:id:2643743"))[0] == b"sunny"
+
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    other_worker.execute("BEGIN EXCLUSIVE")
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await backend.set("weather:id:2988507", b"rain", ttl=60)
+    assert loop.time() - started < 0.5
+    # WAL readers do not wait for the writer
+    assert (await backend.get("weather:id:2643743"))[0] == b"sunny"
+    other_worker.rollback()
+    other_worker.close()
+
+    assert await backend.get("weather:id:2988507") is None
+    assert backend.stats() == {"hits": 2, "misses": 1, "hit_ratio": 2 / 3}
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_l2_get_or_load_waits_for_lease_holder(tmp_path, monkeypatch):
+    """Test that a worker without the lease picks up the value the holder stored"""
+    path = str(tmp_path / "shared.db")
+    holder = SQLiteSharedCache(path)
+    monkeypatch.setattr(two_tier, "cache_backend", SQLiteBackend(path))
+    monkeypatch.setattr(two_tier, "CACHE_KEY_PREFIX", "")
+    monkeypatch.setattr(two_tier, "SHARED_CACHE_POLL_INTERVAL", 0.01)
+    assert holder.acquire_lease("tags:happy", ttl=10)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return "fetched here"
+
+    async def holder_finishes():
+        await asyncio.sleep(0.05)
+        holder.set("tags:happy", b"fetched by holder", ttl=60)
+        holder.release_lease("tags:happy")
+
+    (result, ttl), _ = await asyncio.gather(
+        two_tier.l2_get_or_load("tags:happy", fetch, str.encode, bytes.decode, ttl=60),
+        holder_finishes(),
+    )
+
+    assert result == "fetched by holder"
+    assert 0 < ttl <= 60
+    assert calls == 0
+    await two_tier.cache_backend.close()
+    holder.close()
+
+
+@pytest.mark.asyncio
+async def test_l1_expires_with_remaining_l2_ttl(monkeypatch):
+    """Test that a value loaded from L2 only stays in L1 as long as it has left in L2"""
+    clock = FakeClock()
+    backend = InMemoryBackend(clock=clock)
+    monkeypatch.setattr(two_tier, "cache_backend", backend)
+    await backend.set(two_tier.CACHE_KEY_PREFIX + "weather:id:1", b"from another node", ttl=20)
+    clock.now = 15
+
+    l1 = AsyncTTLCache(max_size=10, ttl=300, clock=clock)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return "fetched here"
+
+    def load():
+        return two_tier.l2_get_or_load("weather:id:1", fetch, str.encode, bytes.decode, ttl=300)
+
+    assert await l1.get_or_load("weather:id:1", load) == "from another node"
+    clock.now = 19
+    assert l1.get("weather:id:1") == "from another node"
+
+    # Both tiers expire together, so the next read fetches and fills L2 again
+    clock.now = 21
+    assert await l1.get_or_load("weather:id:1", load) == "fetched here"
+    assert calls == 1
+    assert (await backend.get(two_tier.CACHE_KEY_PREFIX + "weather:id:1"))[0] == b"fetched here"
+    assert backend.stats()["hits"] == 2
+
+
+class FailingBackend(InMemoryBackend):
+    """Backend whose store is unreachable"""
+
+    async def get(self, key):
+        raise CacheBackendError("connection refused")
+
+
+@pytest.mark.asyncio
+async def test_l2_get_or_load_bypasses_unreachable_backend(monkeypatch):
+    """Test that an unreachable backend degrades to fetching directly"""
+    monkeypatch.setattr(two_tier, "cache_backend", FailingBackend())
+
+    async def fetch():
+        return "fetched here"
+
+    result = await two_tier.l2_get_or_load("tags:happy", fetch, str.encode, bytes.decode, ttl=60)
+    assert result == ("fetched here", 60)
+
+
+def test_create_backend_rejects_unknown_kind():
+    """Test that a misspelled backend name is reported instead of ignored"""
+    with pytest.raises(CacheBackendError):
+        two_tier.create_backend("memcached")
+    assert isinstance(two_tier.create_backend("memory"), InMemoryBackend)
+
+
+def test_encode_command_uses_resp_bulk_strings():
+    """Test that commands are sent as RESP arrays of bulk strings"""
+    assert encode_command("SET", "k", b"\x00v", "PX", 1500) == (
+        b"*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n\x00v\r\n$2\r\nPX\r\n$4\r\n1500\r\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_read_reply_parses_resp_types():
+    """Test that every RESP reply type is decoded"""
+    reader = asyncio.StreamReader()
+    reader.feed_data(b"+OK\r\n:42\r\n$5\r\nhe\r\no\r\n$-1\r\n*2\r\n$1\r\na\r\n:-2\r\n-ERR nope\r\n")
+    reader.feed_eof()
+
+    assert await read_reply(reader) == "OK"
+    assert await read_reply(reader) == 42
+    assert await read_reply(reader) == b"he\r\no"
+    assert await read_reply(reader) is None
+    assert await read_reply(reader) == [b"a", -2]
+    error = await read_reply(reader)
+    assert isinstance(error, RedisReplyError) and str(error) == "ERR nope"
+    with pytest.raises(ConnectionError):
+        await read_reply(reader)
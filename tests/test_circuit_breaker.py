@@ -0,0 +1,193 @@
+import asyncio
+import httpx
+import pytest
+from unittest.mock import patch
+from app.error.exceptions import CircuitOpenError, WeatherAPIError
+from app.services.http.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerTransport,
+    CircuitState,
+)
+from app.services.http.hedging import Hedger, HedgingTransport
+from app.services.weather.models import WeatherCondition, WeatherData, WeatherTemperature
+from app.services.weather.weather_service import get_weather_for_city, weather_cache
+
+
+class FakeClock:
+    """Manually advanced clock for breaker timing tests"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock):
+    return CircuitBreaker(
+        "lastfm",
+        window=4,
+        min_calls=4,
+        failure_ratio=0.5,
+        slow_ratio=0.75,
+        slow_call=1.0,
+        open_duration=30,
+        probes=2,
+        clock=clock,
+    )
+
+
+def test_breaker_opens_on_failures_and_closes_after_probes():
+    """Test the closed, open, half-open and closed cycle of the breaker"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    for failed in (False, True, False, True):
+        breaker.before_call()
+        breaker.record(failed, 0.1)
+    assert breaker.state is CircuitState.OPEN
+
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 30
+
+    # After the open period a limited number of probes get through
+    clock.now = 31
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.stats()["rejected"] == 2
+
+
+def test_breaker_reopens_when_a_probe_is_slow():
+    """Test that slow calls open the breaker and a slow probe opens it again"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record(False, 1.5)
+    assert breaker.state is CircuitState.OPEN
+
+    clock.now = 31
+    breaker.before_call()
+    breaker.record(False, 1.5)
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.opened == 2
+
+
+@pytest.mark.asyncio
+async def test_breaker_transport_fails_fast_while_open():
+    """Test that upstream 5xx answers open the breaker and later calls skip the upstream"""
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(502)
+
+    breaker = make_breaker(FakeClock())
+    transport = CircuitBreakerTransport(httpx.MockTransport(handler), breaker)
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(4):
+            assert (await client.get("https://ws.audioscrobbler.com/2.0/")).status_code == 502
+        with pytest.raises(CircuitOpenError):
+            await client.get("https://ws.audioscrobbler.com/2.0/")
+
+    assert calls == 4
+
+
+@pytest.mark.asyncio
+async def test_hedged_get_takes_the_faster_answer():
+    """Test that a slow first attempt is raced by a hedge and the hedge's answer wins"""
+    attempts = 0
+
+    async def handler(request):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            await asyncio.sleep(1)
+            return httpx.Response(200, json={"attempt": 1})
+        return httpx.Response(200, json={"attempt": 2})
+
+    hedger = Hedger(percentile=95, min_samples=1, min_delay=0.01)
+    hedger.record(0.02)
+    transport = HedgingTransport(httpx.MockTransport(handler), hedger)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get("https://api.openweathermap.org/data/2.5/weather")
+
+    assert response.json() == {"attempt": 2}
+    assert hedger.stats() == {"hedge_delay": 0.02, "hedged": 1, "hedge_wins": 1}
+
+
+@pytest.mark.asyncio
+async def test_hedging_records_the_first_attempt_when_the_hedge_wins():
+    """Test that a first attempt beaten by its hedge still raises the latency estimate"""
+    attempts = 0
+
+    async def handler(request):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            await asyncio.sleep(1)
+        return httpx.Response(200)
+
+    hedger = Hedger(percentile=50, min_samples=1, min_delay=0.001, refresh_every=1)
+    hedger.record(0.02)
+    transport = HedgingTransport(httpx.MockTransport(handler), hedger)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        await client.get("https://api.openweathermap.org/data/2.5/weather")
+    # The cancelled first attempt is recorded once its cancellation completes
+    await asyncio.sleep(0.01)
+
+    assert hedger.hedge_wins == 1
+    # The hedge's quick answer would have pulled the median down to it
+    assert hedger.delay() >= 0.02
+
+
+@pytest.mark.asyncio
+async def test_hedging_waits_for_enough_samples():
+    """Test that no hedge is sent before a latency estimate exists"""
+    hedger = Hedger(percentile=95, min_samples=3, min_delay=0.01)
+    transport = HedgingTransport(httpx.MockTransport(lambda request: httpx.Response(200)), hedger)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        await client.get("https://api.openweathermap.org/data/2.5/weather")
+
+    assert hedger.delay() is None
+    assert hedger.hedged == 0
+
+
+@pytest.mark.asyncio
+@patch("app.services.weather.weather_service.load_weather_for_city")
+async def test_stale_weather_served_while_circuit_is_open(mock_load):
+    """Test that expired weather answers while OpenWeather's breaker is open, but not for other errors"""
+    weather = WeatherData(
+        condition=WeatherCondition.RAIN,
+        temperature=12.0,
+        temperature_category=WeatherTemperature.COOL,
+        humidity=80,
+        wind_speed=4.0,
+        description="light rain",
+    )
+    weather_cache.set("id:2643743", weather, ttl=0.001)
+    await asyncio.sleep(0.01)
+
+    async def circuit_open(*args):
+        try:
+            raise CircuitOpenError("openweather circuit is open", retry_after=30)
+        except CircuitOpenError as e:
+            raise WeatherAPIError(f"Weather service is unavailable: {e}") from e
+
+    mock_load.side_effect = circuit_open
+    assert await get_weather_for_city("London") == weather
+
+    mock_load.side_effect = WeatherAPIError("Weather service returned status code 500")
+    with pytest.raises(WeatherAPIError):
+        await get_weather_for_city("London")
@@ -1,7 +1,10 @@
+import asyncio
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, AsyncMock
 from app import create_app
+from app.api.response_cache import response_cache
 from app.error.exceptions import WeatherAPIError
 from app.services.music.models import Song
 from app.services.weather.models import (
@@ -85,3 +88,240 @@ async def test_recommendations_endpoint_invalid_mood():
 
     # Verify response
     assert response.status_code == 422  # Validation error
+
+
+@pytest.mark.asyncio
+@patch("app.api.endpoints.WEATHER_STAGE_TIMEOUT", 0.05)
+@patch("app.api.endpoints.get_weather_for_city")
+@patch("app.api.endpoints.get_song_recommendation", new_callable=AsyncMock)
+async def test_recommendations_endpoint_weather_timeout(mock_get_song, mock_get_weather):
+    """Test that a weather stage exceeding its timeout is cancelled and mapped to 503"""
+    cancelled = asyncio.Event()
+
+    async def slow_weather(city):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    mock_get_weather.side_effect = slow_weather
+    mock_get_song.return_value = mock_song
+
+    response = client.post(
+        "/api/v1/recommendations", json={"mood": "happy", "city": "London"}
+    )
+
+    assert response.status_code == 503
+    assert "Weather service error" in response.json()["detail"]
+    assert "timed out" in response.json()["detail"]
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+@patch("app.api.endpoints.RECOMMENDATION_DEADLINE", 0.05)
+@patch("app.api.endpoints.get_weather_for_city", new_callable=AsyncMock)
+@patch("app.api.endpoints.get_song_recommendation")
+async def test_recommendations_endpoint_deadline_caps_stages(mock_get_song, mock_get_weather):
+    """Test that the request deadline ends a stage still within its own timeout"""
+    async def slow_song(mood):
+        await asyncio.sleep(5)
+
+    mock_get_weather.return_value = mock_weather_data
+    mock_get_song.side_effect = slow_song
+
+    response = client.post(
+        "/api/v1/recommendations", json={"mood": "happy", "city": "London"}
+    )
+
+    assert response.status_code == 503
+    assert "Song lookup timed out after 0.05s" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_recommendations_endpoint_runs_stages_concurrently():
+    """Test that weather and song lookups overlap instead of running back to back"""
+    both_started = asyncio.Event()
+    started = []
+
+    async def stage(result):
+        started.append(result)
+        if len(started) == 2:
+            both_started.set()
+        # Each stage only finishes once the other one has started
+        await asyncio.wait_for(both_started.wait(), timeout=1)
+        return result
+
+    async def get_weather(city):
+        return await stage(mock_weather_data)
+
+    async def get_song(mood):
+        return await stage(mock_song)
+
+    with patch("app.api.endpoints.get_weather_for_city", new=get_weather), patch(
+        "app.api.endpoints.get_song_recommendation", new=get_song
+    ):
+        response = client.post(
+            "/api/v1/recommendations", json={"mood": "happy", "city": "London"}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["recommendation"]["title"] == "Happy"
+
+
+@pytest.mark.asyncio
+@patch(
+    "app.services.recommendation.recommendation_service.get_weather_for_city",
+    new_callable=AsyncMock,
+)
+@patch(
+    "app.services.recommendation.recommendation_service.get_song_recommendation",
+    new_callable=AsyncMock,
+)
+@patch(
+    "app.services.recommendation.recommendation_service.get_tag_pool",
+    new_callable=AsyncMock,
+)
+async def test_batch_recommendations_endpoint(mock_get_tag_pool, mock_get_song, mock_get_weather):
+    """Test that a batch fetches each city once and reports per-item errors"""
+
+    async def get_weather(city):
+        if city == "NonExistentCity":
+            raise WeatherAPIError("City 'NonExistentCity' not found")
+        return mock_weather_data
+
+    mock_get_weather.side_effect = get_weather
+    mock_get_song.return_value = mock_song
+    mock_get_tag_pool.return_value = []
+
+    response = client.post(
+        "/api/v1/recommendations/batch",
+        json={
+            "items": [
+                {"mood": "happy", "city": "London"},
+                {"mood": "sad", "city": "london "},
+                {"mood": "happy", "city": "NonExistentCity"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["status_code"] == 200
+    assert results[0]["result"]["recommendation"]["title"] == "Happy"
+    assert results[1]["result"]["city"] == "london "
+    assert results[2]["status_code"] == 503
+    assert "Weather service error" in results[2]["error"]
+
+    # "London" and "london " share one weather fetch
+    assert mock_get_weather.call_count == 2
+    fetched_tags = [call.args[0] for call in mock_get_tag_pool.call_args_list]
+    assert len(fetched_tags) == len(set(fetched_tags))
+
+
+@pytest.mark.asyncio
+@patch(
+    "app.services.recommendation.recommendation_service.get_weather_for_city",
+    new_callable=AsyncMock,
+)
+@patch(
+    "app.services.recommendation.recommendation_service.get_song_recommendation",
+    new_callable=AsyncMock,
+)
+async def test_stream_recommendations_endpoint(mock_get_song, mock_get_weather):
+    """Test that NDJSON items are answered with one NDJSON result per line"""
+    mock_get_weather.return_value = mock_weather_data
+    mock_get_song.return_value = mock_song
+
+    body = (
+        b'{"mood": "happy", "city": "London"}\n'
+        b'{"mood": "invalid_mood", "city": "London"}\n'
+        b'\n'
+        b'{"mood": "calm", "city": "Paris"}\n'
+    )
+    response = client.post(
+        "/api/v1/recommendations/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = sorted(
+        (json.loads(line) for line in response.text.splitlines()), key=lambda r: r["index"]
+    )
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["result"]["recommendation"]["title"] == "Happy"
+    assert results[1]["status_code"] == 422
+    assert results[2]["result"]["city"] == "Paris"
+
+
+@pytest.mark.asyncio
+@patch("app.api.endpoints.get_song_recommendation", new_callable=AsyncMock)
+@patch("app.services.weather.weather_service.fetch_weather_for_city", new_callable=AsyncMock)
+async def test_get_recommendations_endpoint_is_cacheable(mock_fetch_weather, mock_get_song, monkeypatch):
+    """Test that the GET variant is served from the response cache and honours If-None-Match"""
+    monkeypatch.setattr(response_cache, "ttl", 30)
+    monkeypatch.setattr("app.api.endpoints.RESPONSE_CACHE_TTL", 30)
+    mock_fetch_weather.return_value = mock_weather_data
+    mock_get_song.return_value = mock_song
+
+    params = {"mood": "happy", "city": "London"}
+    first = client.get("/api/v1/recommendations", params=params)
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "public, max-age=30"
+    assert first.json()["recommendation"]["title"] == "Happy"
+
+    # The same mood, city and weather reuse the rendered response
+    second = client.get("/api/v1/recommendations", params=params)
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert mock_get_song.call_count == 1
+
+    # The POST endpoint shares the cache and its ETags
+    not_modified = client.post(
+        "/api/v1/recommendations",
+        json=params,
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert mock_get_song.call_count == 1
+
+
+@pytest.mark.asyncio
+@patch("app.api.endpoints.get_song_recommendation", new_callable=AsyncMock)
+@patch("app.api.endpoints.get_weather_for_city", new_callable=AsyncMock)
+async def test_recommendations_endpoint_without_response_cache(mock_get_weather, mock_get_song):
+    """Test that responses are rebuilt but still revalidate when the response cache is off"""
+    mock_get_weather.return_value = mock_weather_data
+    # Every rebuild draws a different song
+    mock_get_song.side_effect = [
+        mock_song,
+        Song(title="Walking on Sunshine", artist="Katrina & The Waves"),
+        mock_song,
+    ]
+
+    params = {"mood": "happy", "city": "London"}
+    first = client.get("/api/v1/recommendations", params=params)
+    second = client.get(
+        "/api/v1/recommendations", params=params, headers={"If-None-Match": first.headers["etag"]}
+    )
+
+    assert first.headers["cache-control"] == "no-cache"
+    assert first.headers["etag"].startswith('W/"')
+    assert second.status_code == 304
+    assert second.headers["etag"] == first.headers["etag"]
+    assert mock_get_song.call_count == 2
+    assert response_cache.stats()["size"] == 0
+
+    # Once the weather moves to another bucket the client gets a new response
+    mock_get_weather.return_value = mock_weather_data.model_copy(
+        update={"condition": WeatherCondition.RAIN}
+    )
+    third = client.get(
+        "/api/v1/recommendations", params=params, headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert third.status_code == 200
+    assert third.headers["etag"] != first.headers["etag"]
@@ -0,0 +1,37 @@
+import httpx
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app import create_app
+from app.services.http.clients import MUSIC_UPSTREAM, WEATHER_UPSTREAM
+from benchmarks.fake_upstreams import UpstreamBehaviour, create_fake_upstreams
+
+
+@patch("app.services.weather.weather_service.OPENWEATHER_API_KEY", "test")
+@patch("app.services.music.music_service.LASTFM_API_KEY", "test")
+def test_app_runs_against_fake_upstreams():
+    """Test that the load-test wiring serves recommendations without the real APIs"""
+    fake = create_fake_upstreams(
+        UpstreamBehaviour(latency=0, jitter=0), UpstreamBehaviour(latency=0, jitter=0)
+    )
+    transport = httpx.ASGITransport(app=fake)
+    with TestClient(create_app({WEATHER_UPSTREAM: transport, MUSIC_UPSTREAM: transport})) as client:
+        for _ in range(3):
+            response = client.post("/api/v1/recommendations", json={"mood": "happy", "city": "Paris"})
+            assert response.status_code == 200
+            assert response.json()["recommendation"]["artist"].startswith("Artist ")
+
+        unknown = client.post("/api/v1/recommendations", json={"mood": "happy", "city": "Nowhere 1"})
+        assert unknown.status_code == 503
+        assert "not found" in unknown.json()["detail"]
+
+    # Each city's weather is fetched once, then cached
+    assert fake.state.calls["weather"] == 2
+    assert fake.state.calls["music"] >= 1
+
+
+def test_fake_upstreams_inject_errors():
+    """Test that the configured error rate turns answers into 503s"""
+    fake = create_fake_upstreams(weather=UpstreamBehaviour(latency=0, jitter=0, error_rate=1.0))
+    client = TestClient(fake)
+    assert client.get("/data/2.5/weather", params={"id": 2643743}).status_code == 503
+    assert client.get("/2.0/", params={"method": "tag.gettoptracks", "tag": "happy"}).status_code == 200
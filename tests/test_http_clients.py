@@ -0,0 +1,93 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock
+from app import create_app
+from app.services.http import clients
+from app.services.http.clients import (
+    MUSIC_UPSTREAM,
+    WEATHER_UPSTREAM,
+    CachingDNSBackend,
+    get_client,
+)
+
+# Mock OpenWeather API response
+mock_weather_response = {
+    "weather": [{"main": "Clear", "description": "clear sky"}],
+    "main": {"temp": 22.5, "humidity": 45},
+    "wind": {"speed": 3.2},
+}
+
+# Mock Last.fm API response
+mock_lastfm_response = {
+    "tracks": {
+        "track": [
+            {
+                "name": "Happy",
+                "artist": {"name": "Pharrell Williams"},
+                "url": "https://www.last.fm/music/Pharrell+Williams/_/Happy",
+            }
+        ]
+    }
+}
+
+
+def test_lifespan_routes_upstream_calls_through_injected_transports(monkeypatch):
+    """Test that the app lifespan opens one client per upstream with the given transports"""
+    monkeypatch.setattr("app.services.weather.weather_service.OPENWEATHER_API_KEY", "test")
+    monkeypatch.setattr("app.services.music.music_service.LASTFM_API_KEY", "test")
+
+    weather_calls = []
+    music_calls = []
+
+    def weather_handler(request: httpx.Request) -> httpx.Response:
+        weather_calls.append(request)
+        return httpx.Response(200, json=mock_weather_response)
+
+    def music_handler(request: httpx.Request) -> httpx.Response:
+        music_calls.append(request)
+        return httpx.Response(200, json=mock_lastfm_response)
+
+    app = create_app(
+        transports={
+            WEATHER_UPSTREAM: httpx.MockTransport(weather_handler),
+            MUSIC_UPSTREAM: httpx.MockTransport(music_handler),
+        }
+    )
+
+    with TestClient(app) as client:
+        weather_client = get_client(WEATHER_UPSTREAM)
+        for _ in range(2):
+            response = client.post(
+                "/api/v1/recommendations", json={"mood": "happy", "city": "London"}
+            )
+            assert response.status_code == 200
+            assert response.json()["recommendation"]["title"] == "Happy"
+
+        # The same pooled client serves every request
+        assert get_client(WEATHER_UPSTREAM) is weather_client
+
+    assert len(weather_calls) >= 1
+    assert weather_calls[0].url.params["id"] == "2643743"
+    assert len(music_calls) >= 1
+
+    # Clients are closed when the app shuts down
+    assert weather_client.is_closed
+    assert WEATHER_UPSTREAM not in clients._clients
+
+
+@pytest.mark.asyncio
+async def test_caching_dns_backend_reuses_resolved_addresses():
+    """Test that host names are only resolved once while the cache entry is fresh"""
+    backend = CachingDNSBackend(ttl=60)
+    address_info = [(2, 1, 6, "", ("203.0.113.7", 443))]
+
+    with patch("asyncio.BaseEventLoop.getaddrinfo", new_callable=AsyncMock) as mock_getaddrinfo:
+        mock_getaddrinfo.return_value = address_info
+
+        first = await backend.resolve("api.example.com", 443)
+        second = await backend.resolve("api.example.com", 443)
+
+    assert first == ["203.0.113.7"]
+    assert second == first
+    assert mock_getaddrinfo.call_count == 1
@@ -0,0 +1,114 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock
+from app import create_app
+from app.services.http.instrumentation import InstrumentedTransport
+from app.services.metrics.metrics import http_latency, upstream_in_flight, upstream_latency
+from app.services.metrics.registry import MetricsRegistry
+from app.services.music.models import Song
+from app.services.weather.models import WeatherCondition, WeatherData, WeatherTemperature
+
+
+def test_registry_renders_prometheus_text():
+    """Test counters, gauges and cumulative histogram buckets in the exposition format"""
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls", labels=("upstream",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    latency = registry.histogram("latency_seconds", "Latency", labels=("stage",), buckets=(0.1, 1))
+    registry.collect("ratio", "Ratio", "gauge", lambda: [({"cache": 'we"ird'}, 0.5)])
+
+    calls.inc(upstream="lastfm")
+    calls.inc(2, upstream="lastfm")
+    with in_flight.track_inprogress():
+        assert in_flight.value() == 1
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, stage="weather")
+
+    assert registry.render().splitlines() == [
+        "# HELP calls_total Calls",
+        "# TYPE calls_total counter",
+        'calls_total{upstream="lastfm"} 3',
+        "# HELP in_flight In flight",
+        "# TYPE in_flight gauge",
+        "in_flight 0",
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{stage="weather",le="0.1"} 2',
+        'latency_seconds_bucket{stage="weather",le="1"} 3',
+        'latency_seconds_bucket{stage="weather",le="+Inf"} 4',
+        'latency_seconds_sum{stage="weather"} 3.65',
+        'latency_seconds_count{stage="weather"} 4',
+        "# HELP ratio Ratio",
+        "# TYPE ratio gauge",
+        'ratio{cache="we\\"ird"} 0.5',
+    ]
+
+    with pytest.raises(ValueError):
+        calls.inc(upstream="lastfm", status="200")
+
+
+@pytest.mark.asyncio
+async def test_instrumented_transport_counts_calls_by_status():
+    """Test that upstream calls are timed per status, including failed connections"""
+    def handler(request):
+        if request.url.path == "/down":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(404 if request.url.path == "/missing" else 200)
+
+    before = {
+        status: upstream_latency.count(upstream="test", status=status)
+        for status in ("200", "404", "error")
+    }
+    transport = InstrumentedTransport(httpx.MockTransport(handler), "test")
+    async with httpx.AsyncClient(transport=transport) as client:
+        await client.get("http://upstream/ok")
+        await client.get("http://upstream/missing")
+        with pytest.raises(httpx.ConnectError):
+            await client.get("http://upstream/down")
+
+    for status in ("200", "404", "error"):
+        assert upstream_latency.count(upstream="test", status=status) == before[status] + 1
+    assert upstream_in_flight.value(upstream="test") == 0
+
+
+@patch("app.api.endpoints.get_song_recommendation", new_callable=AsyncMock)
+@patch("app.api.endpoints.get_weather_for_city", new_callable=AsyncMock)
+def test_metrics_endpoint_reports_stages_requests_and_caches(mock_get_weather, mock_get_song):
+    """Test that a recommendation shows up in the stage, request and cache metrics"""
+    mock_get_weather.return_value = WeatherData(
+        condition=WeatherCondition.CLEAR,
+        temperature=22.5,
+        temperature_category=WeatherTemperature.MILD,
+        humidity=45.0,
+        wind_speed=3.2,
+        description="clear sky",
+    )
+    mock_get_song.return_value = Song(title="Happy", artist="Pharrell Williams")
+
+    client = TestClient(create_app())
+    assert client.post("/api/v1/recommendations", json={"mood": "happy", "city": "London"}).status_code == 200
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    for stage in ("weather", "song", "match", "explanation", "serialization"):
+        assert f'mwm_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'route="/api/v1/recommendations",status="200"' in text
+    assert "mwm_http_requests_in_flight 1" in text
+    assert 'mwm_cache_hit_ratio{cache="negative_city"}' in text
+    for name in ("waited", "upstream_429", "rejected"):
+        assert f'mwm_rate_limit_{name}_total{{upstream="openweather"}}' in text
+
+
+def test_metrics_middleware_labels_unknown_methods_as_other():
+    """Test that client-chosen methods and paths cannot create new series"""
+    client = TestClient(create_app())
+    before = http_latency.count(method="other", route="unmatched", status="404")
+
+    for method in ("FOO", "BAR"):
+        client.request(method, "/no-such-path")
+
+    assert http_latency.count(method="other", route="unmatched", status="404") == before + 2
+    assert 'method="FOO"' not in client.get("/metrics").text
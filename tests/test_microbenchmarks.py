@@ -0,0 +1,93 @@
+import os
+import pytest
+from benchmarks.micro import (
+    DEFAULT_BASELINE_PATH,
+    load_baseline,
+    measure_relative,
+    regression,
+    save_baseline,
+)
+from app.api.serialization import render_mood_response
+from app.services.explanation.music_explanation import generate_explanation
+from app.services.mood.models import Mood, MoodResponse
+from app.services.mood.mood_service import match_mood_with_weather
+from app.services.music.models import Song
+from app.services.weather.models import WeatherCondition, WeatherData, WeatherTemperature
+from app.services.weather.weather_service import categorize_temperature, process_weather_data
+
+# Timing is noisy on shared runners, so the suite only runs when asked:
+#   RUN_BENCHMARKS=1 pytest tests/test_microbenchmarks.py
+# BENCHMARK_THRESHOLD is the allowed slowdown in percent, and
+# BENCHMARK_UPDATE_BASELINE=1 records the run as the new baseline.
+pytestmark = pytest.mark.skipif(
+    os.getenv("RUN_BENCHMARKS", "").lower() not in ("1", "true"),
+    reason="set RUN_BENCHMARKS=1 to run the microbenchmarks",
+)
+BENCHMARK_THRESHOLD = float(os.getenv("BENCHMARK_THRESHOLD", "30"))
+BENCHMARK_UPDATE_BASELINE = os.getenv("BENCHMARK_UPDATE_BASELINE", "").lower() in ("1", "true")
+BENCHMARK_BASELINE = os.getenv("BENCHMARK_BASELINE", DEFAULT_BASELINE_PATH)
+
+raw_weather = {
+    "weather": [{"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}],
+    "main": {"temp": 12.4, "humidity": 81},
+    "wind": {"speed": 4.6},
+}
+weather = process_weather_data(raw_weather)
+song = Song(title="Happy", artist="Pharrell Williams", url="https://www.last.fm/music/Pharrell+Williams/_/Happy")
+weather_fields = dict(
+    condition=WeatherCondition.RAIN,
+    temperature=12.4,
+    temperature_category=WeatherTemperature.COOL,
+    humidity=81.0,
+    wind_speed=4.6,
+    description="light rain",
+)
+response_fields = dict(
+    mood=Mood.HAPPY,
+    city="London",
+    weather=weather,
+    mood_matches_weather=False,
+    recommendation=song,
+    explanation="Your happy mood doesn't quite match the current cool and rain weather in London.",
+)
+response = MoodResponse(**response_fields)
+
+BENCHMARKS = {
+    "process_weather_data": lambda: process_weather_data(raw_weather),
+    "categorize_temperature": lambda: categorize_temperature(12.4),
+    "match_mood_with_weather": lambda: match_mood_with_weather(Mood.HAPPY, weather),
+    "generate_explanation": lambda: generate_explanation(
+        mood="happy", weather=weather, song=song, city="London", matches=False
+    ),
+    "song_construction": lambda: Song(title="Happy", artist="Pharrell Williams", url=None),
+    "weather_data_construction": lambda: WeatherData(**weather_fields),
+    "mood_response_construction": lambda: MoodResponse(**response_fields),
+    "mood_response_serialization": lambda: render_mood_response(response),
+}
+
+
+@pytest.fixture(scope="module")
+def benchmark_session():
+    """Collect every result and store them as the baseline if asked to"""
+    session = {"baseline": load_baseline(BENCHMARK_BASELINE), "results": {}}
+    yield session
+    if BENCHMARK_UPDATE_BASELINE and session["results"]:
+        save_baseline(session["results"], BENCHMARK_BASELINE)
+
+
+@pytest.mark.parametrize("name", list(BENCHMARKS))
+def test_microbenchmark(name, benchmark_session):
+    """Test that a hot-path function is not slower than its baseline allows"""
+    ns, relative = measure_relative(BENCHMARKS[name])
+    benchmark_session["results"][name] = (ns, relative)
+    if BENCHMARK_UPDATE_BASELINE:
+        return
+
+    baseline = benchmark_session["baseline"].get(name)
+    if baseline is None:
+        pytest.skip(f"No baseline for {name}, run with BENCHMARK_UPDATE_BASELINE=1")
+    slowdown = regression(relative, baseline, BENCHMARK_THRESHOLD)
+    assert slowdown is None, (
+        f"{name} is {slowdown:.0f}% slower than its baseline "
+        f"({ns:.0f} ns per call), the threshold is {BENCHMARK_THRESHOLD:.0f}%"
+    )
@@ -1,6 +1,16 @@
+import numpy as np
+import pytest
+from app.error.exceptions import MoodServiceError
 from app.services.explanation.music_explanation import generate_explanation
 from app.services.mood.models import Mood
-from app.services.mood.mood_service import match_mood_with_weather
+from app.services.mood.mood_service import (
+    CONDITIONS,
+    MOODS,
+    TEMPERATURES,
+    match_mood_with_weather,
+    match_moods_with_weather,
+)
+from app.services.weather.config import MOOD_WEATHER_MAPPING
 from app.services.weather.models import (
     WeatherCondition,
     WeatherData,
@@ -98,3 +108,45 @@ def test_generate_explanation():
     assert "sad mood doesn't quite match" in explanation
     assert "warm and clear" in explanation
     assert "Paris" in explanation
+
+
+def test_match_table_agrees_with_mapping_for_every_combination():
+    """Test that the compiled table gives the mapping's answer for every cell"""
+    for mood in Mood:
+        mapping = MOOD_WEATHER_MAPPING[mood.value]
+        for condition in WeatherCondition:
+            for temperature in WeatherTemperature:
+                condition_match = condition.value in mapping["conditions"]
+                temperature_match = temperature.value in mapping["temperature"]
+                expected = (
+                    condition_match and temperature_match
+                    if mapping["match_all"]
+                    else condition_match or temperature_match
+                )
+                weather = clear_warm_weather.model_copy(
+                    update={"condition": condition, "temperature_category": temperature}
+                )
+                assert match_mood_with_weather(mood, weather) is expected
+
+
+def test_match_moods_with_weather_batch():
+    """Test the vectorized matcher against the single-item matcher"""
+    moods = [Mood.HAPPY, Mood.SAD, "relaxed", Mood.RELAXED]
+    conditions = [WeatherCondition.RAIN, WeatherCondition.RAIN, "clear", WeatherCondition.CLEAR]
+    temperatures = ["cold", WeatherTemperature.COLD, "warm", WeatherTemperature.COLD]
+
+    result = match_moods_with_weather(moods, conditions, temperatures)
+
+    assert result.dtype == np.bool_
+    assert result.tolist() == [False, True, True, False]
+
+    # Integer codes index MOODS, CONDITIONS and TEMPERATURES
+    codes = match_moods_with_weather(
+        np.array([MOODS.index(Mood.SAD)]),
+        np.array([CONDITIONS.index(WeatherCondition.RAIN)]),
+        np.array([TEMPERATURES.index(WeatherTemperature.COLD)]),
+    )
+    assert codes.tolist() == [True]
+
+    with pytest.raises(MoodServiceError):
+        match_moods_with_weather(["bored"], ["clear"], ["warm"])
@@ -3,7 +3,9 @@ from unittest.mock import patch, AsyncMock, MagicMock
 from app.error.exceptions import MusicAPIError
 from app.services.mood.models import Mood
 from app.services.music.music_service import (
+    get_mood_pool,
     get_song_recommendation,
+    get_tag_pool,
     get_top_tracks_by_tag,
 )
 
@@ -109,3 +111,79 @@ async def test_get_top_tracks_by_tag_success(mock_get):
     assert len(result) == 1
     assert result[0]["name"] == "Happy"
     assert result[0]["artist"]["name"] == "Pharrell Williams"
+
+
+@pytest.mark.asyncio
+@patch("app.services.music.music_service.get_top_tracks_by_tag", new_callable=AsyncMock)
+async def test_get_tag_pool_serves_repeat_reads_from_memory(mock_get_tracks):
+    """Test that a tag's track pool is only downloaded once while fresh"""
+    mock_get_tracks.return_value = mock_lastfm_response["tracks"]["track"]
+
+    first = await get_tag_pool("happy")
+    second = await get_tag_pool("happy")
+
+    assert first == second
+    assert mock_get_tracks.call_count == 1
+
+
+@pytest.mark.asyncio
+@patch("app.services.music.music_service.LASTFM_API_KEY", "test")
+@patch("app.services.music.music_service.SONG_POOL_MODE", "mood")
+@patch("app.services.music.music_service.get_top_tracks_by_tag", new_callable=AsyncMock)
+async def test_mood_pool_mode_loads_every_tag_once_and_skips_empty_tags(mock_get_tracks):
+    """Test that mood mode merges all tags concurrently and needs no retry for an empty tag"""
+    pools = {
+        "happy": [
+            {"name": "Happy", "artist": {"name": "Pharrell Williams"}, "url": None},
+            {"name": "Walking on Sunshine", "artist": {"name": "Katrina & The Waves"}, "url": None},
+        ],
+        "upbeat": [
+            {"name": "HAPPY", "artist": {"name": "pharrell williams"}, "url": None},
+            {"name": "Shake It Off", "artist": {"name": "Taylor Swift"}, "url": None},
+        ],
+    }
+    mock_get_tracks.side_effect = lambda tag: pools.get(tag, [])
+
+    with patch.dict("app.services.music.music_service.MOOD_MUSIC_TAGS", {"happy": ["happy", "upbeat", "empty"]}):
+        song = await get_song_recommendation(Mood.HAPPY)
+        pool = await get_mood_pool(Mood.HAPPY, ["happy", "upbeat", "empty"])
+
+    assert mock_get_tracks.call_count == 3
+    # The track both tags rank first comes first, and only once
+    assert [song.title for song in pool.songs] == ["Happy", "Walking on Sunshine", "Shake It Off"]
+    assert song.title in {"Happy", "Walking on Sunshine", "Shake It Off"}
+    # The merged pool is reused while its tag pools are unchanged
+    assert await get_mood_pool(Mood.HAPPY, ["happy", "upbeat", "empty"]) is pool
+
+
+@pytest.mark.asyncio
+@patch("app.services.music.music_service.get_top_tracks_by_tag", new_callable=AsyncMock)
+async def test_failed_tag_is_not_fetched_again_for_every_batch_item(mock_get_tracks):
+    """Test that a tag Last.fm fails for is asked for once across a batch"""
+    pools = {"happy": [{"name": "Happy", "artist": {"name": "Pharrell Williams"}, "url": None}]}
+
+    async def get_tracks(tag):
+        if tag == "broken":
+            raise MusicAPIError("Music service returned status code 500")
+        return pools[tag]
+
+    mock_get_tracks.side_effect = get_tracks
+
+    # Items of a batch run one after another once the first has finished
+    for _ in range(5):
+        pool = await get_mood_pool(Mood.HAPPY, ["happy", "broken"])
+        assert [song.title for song in pool.songs] == ["Happy"]
+
+    assert [call.args[0] for call in mock_get_tracks.call_args_list] == ["happy", "broken"]
+    with pytest.raises(MusicAPIError, match="status code 500"):
+        await get_tag_pool("broken")
+
+
+@pytest.mark.asyncio
+@patch("app.services.music.music_service.get_top_tracks_by_tag", new_callable=AsyncMock)
+async def test_mood_pool_raises_when_every_tag_fails(mock_get_tracks):
+    """Test that a mood pool fails only when no tag could be loaded"""
+    mock_get_tracks.side_effect = MusicAPIError("Music service returned status code 500")
+
+    with pytest.raises(MusicAPIError):
+        await get_mood_pool(Mood.SAD, ["sad", "melancholy"])
@@ -0,0 +1,98 @@
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock
+from app import create_app
+from app.services.http.clients import (
+    MUSIC_UPSTREAM,
+    WEATHER_UPSTREAM,
+    _create_rate_limiters,
+    rate_limiters,
+)
+from app.services.music.music_service import tag_pool_cache
+from app.services.prewarm.prewarm_service import mood_tags, prewarm
+from app.services.weather.city_index import canonical_city_key
+from app.services.weather.weather_service import weather_cache
+from benchmarks.fake_upstreams import UpstreamBehaviour, create_fake_upstreams, load_city_names
+
+
+@pytest.mark.asyncio
+@patch("app.services.weather.weather_service.get_weather_for_city", new_callable=AsyncMock)
+@patch("app.services.music.music_service.get_tag_pool", new_callable=AsyncMock)
+async def test_prewarm_loads_every_tag_and_city(mock_get_tag_pool, mock_get_weather):
+    """Test that prewarm fetches every mood tag once and every configured city"""
+    mock_get_tag_pool.return_value = []
+
+    summary = await prewarm(["London", "Paris"], concurrency=2, timeout=5)
+
+    fetched_tags = [call.args[0] for call in mock_get_tag_pool.call_args_list]
+    assert sorted(fetched_tags) == sorted(mood_tags())
+    assert len(fetched_tags) == len(set(fetched_tags))
+    assert mock_get_weather.call_count == 2
+    assert summary == {"tags": len(mood_tags()), "cities": 2, "timed_out": 0}
+
+
+@pytest.mark.asyncio
+@patch("app.services.weather.weather_service.get_weather_for_city")
+@patch("app.services.music.music_service.get_tag_pool", new_callable=AsyncMock)
+async def test_prewarm_respects_concurrency_cap_and_timeout(mock_get_tag_pool, mock_get_weather):
+    """Test that city fetches are capped and prewarm gives up at the timeout"""
+    in_flight = 0
+    peak = 0
+
+    async def slow_weather(city):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(1)
+        finally:
+            in_flight -= 1
+
+    mock_get_weather.side_effect = slow_weather
+
+    summary = await prewarm([f"city-{i}" for i in range(10)], concurrency=3, timeout=0.1)
+
+    assert summary["timed_out"] == 1
+    assert peak == 3
+    assert in_flight == 0
+
+
+def test_readiness_reported_after_prewarm():
+    """Test that the readiness probe only succeeds once startup has finished"""
+    app = create_app()
+    client = TestClient(app)
+    assert client.get("/health/ready").status_code == 503
+
+    with patch("app.PREWARM_ENABLED", True), patch("app.prewarm", new_callable=AsyncMock) as mock_prewarm:
+        with TestClient(app) as started_client:
+            assert mock_prewarm.await_count == 1
+            response = started_client.get("/health/ready")
+            assert response.status_code == 200
+            assert response.json() == {"status": "ready"}
+
+
+@patch("app.services.weather.weather_service.OPENWEATHER_API_KEY", "test")
+@patch("app.services.music.music_service.LASTFM_API_KEY", "test")
+def test_prewarm_completes_under_default_quotas():
+    """Test that prewarm queues for rate limit tokens and warms every tag and city"""
+    fake = create_fake_upstreams(
+        UpstreamBehaviour(latency=0, jitter=0), UpstreamBehaviour(latency=0, jitter=0)
+    )
+    transport = httpx.ASGITransport(app=fake)
+    buckets = _create_rate_limiters()
+    cities = sorted(load_city_names().values())[: buckets[WEATHER_UPSTREAM].burst + 2]
+    app = create_app({WEATHER_UPSTREAM: transport, MUSIC_UPSTREAM: transport})
+
+    with patch.dict(rate_limiters, buckets), patch("app.PREWARM_ENABLED", True), patch(
+        "app.PREWARM_CITIES", cities
+    ), patch("app.prewarm", wraps=prewarm) as mock_prewarm:
+        with TestClient(app) as client:
+            assert client.get("/health/ready").status_code == 200
+            assert all(tag in tag_pool_cache for tag in mood_tags())
+            assert all(weather_cache.get(canonical_city_key(city)) is not None for city in cities)
+
+    assert mock_prewarm.call_count == 1
+    assert buckets[WEATHER_UPSTREAM].rejected == 0
+    assert buckets[MUSIC_UPSTREAM].rejected == 0
@@ -0,0 +1,164 @@
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app import create_app
+from app.error.exceptions import UpstreamRateLimitError, WeatherAPIError
+from app.services.http.clients import (
+    MUSIC_UPSTREAM,
+    WEATHER_UPSTREAM,
+    _create_rate_limiters,
+    rate_limiters,
+)
+from app.services.http.rate_limit import (
+    Priority,
+    RateLimitedTransport,
+    TokenBucket,
+    parse_retry_after,
+    use_priority,
+)
+from benchmarks.fake_upstreams import UpstreamBehaviour, create_fake_upstreams, load_city_names
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_queues_until_refill():
+    """Test that a caller finding the bucket empty waits for the next token"""
+    bucket = TokenBucket("openweather", rate=50, burst=1, max_wait=1)
+    loop = asyncio.get_running_loop()
+
+    await bucket.acquire()
+    started = loop.time()
+    await bucket.acquire()
+
+    assert loop.time() - started >= 0.015
+    assert bucket.granted == 2
+    assert bucket.waited == 1
+    assert bucket.queued() == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_serves_higher_priority_first():
+    """Test that queued interactive calls get tokens before batch and prewarm calls"""
+    bucket = TokenBucket("lastfm", rate=100, burst=1, max_wait=1)
+    await bucket.acquire()
+    order = []
+
+    async def call(priority):
+        await bucket.acquire(priority)
+        order.append(priority)
+
+    tasks = [asyncio.ensure_future(call(Priority.PREWARM))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(call(Priority.BATCH)))
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(call(Priority.INTERACTIVE)))
+    await asyncio.sleep(0)
+    assert bucket.queued() == 3
+
+    await asyncio.gather(*tasks)
+    assert order == [Priority.INTERACTIVE, Priority.BATCH, Priority.PREWARM]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_rejects_when_wait_exceeds_limit():
+    """Test that a call that cannot get a token in time fails fast with a retry hint"""
+    bucket = TokenBucket("openweather", rate=1, burst=1, max_wait=0.1)
+    await bucket.acquire()
+
+    with pytest.raises(UpstreamRateLimitError) as error:
+        await bucket.acquire()
+
+    assert error.value.retry_after == pytest.approx(1, abs=0.05)
+    assert bucket.stats()["rejected"] == 1
+    assert bucket.stats()["waited"] == 0
+    assert bucket.queued() == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_lets_background_calls_queue_longer():
+    """Test that batch and prewarm calls queue past the interactive max wait"""
+    bucket = TokenBucket("openweather", rate=10, burst=1, max_wait=0.05, background_max_wait=1)
+    await bucket.acquire()
+
+    with pytest.raises(UpstreamRateLimitError):
+        await bucket.acquire(Priority.INTERACTIVE)
+    await bucket.acquire(Priority.BATCH)
+    await bucket.acquire(Priority.PREWARM)
+
+    assert bucket.granted == 3
+    assert bucket.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_transport_pauses_and_retries_after_429():
+    """Test that an upstream 429 empties the bucket and the call is retried once"""
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"ok": True}),
+    ]
+    bucket = TokenBucket("lastfm", rate=100, burst=5, max_wait=1)
+    transport = RateLimitedTransport(httpx.MockTransport(lambda request: responses.pop(0)), bucket)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        with use_priority(Priority.BATCH):
+            response = await client.get("https://ws.audioscrobbler.com/2.0/")
+
+    assert response.status_code == 200
+    assert bucket.throttled == 1
+    assert bucket.granted == 2
+
+
+def test_parse_retry_after():
+    """Test that Retry-After is read in seconds or as an HTTP date"""
+    assert parse_retry_after("7", default=1) == 7
+    assert parse_retry_after(None, default=1) == 1
+    assert parse_retry_after("soon", default=1) == 1
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", default=1) == 0
+
+
+@patch("app.api.endpoints.get_song_recommendation")
+@patch("app.api.endpoints.get_weather_for_city")
+def test_rate_limited_upstream_returns_retry_after(mock_get_weather, mock_get_song):
+    """Test that a rate limited upstream tells the client when to retry"""
+
+    async def rate_limited(city):
+        try:
+            raise UpstreamRateLimitError("openweather rate limit reached", retry_after=2.5)
+        except UpstreamRateLimitError as e:
+            raise WeatherAPIError(f"Weather service is unavailable: {e}") from e
+
+    mock_get_weather.side_effect = rate_limited
+
+    with TestClient(create_app()) as client:
+        response = client.post("/api/v1/recommendations", json={"mood": "happy", "city": "London"})
+        stats = client.get("/health/upstreams")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert stats.status_code == 200
+    assert set(stats.json()["rate_limiters"]) == {"openweather", "lastfm"}
+    assert stats.json()["rate_limiters"]["openweather"]["burst"] == 10
+    assert stats.json()["circuit_breakers"]["lastfm"]["state"] == "closed"
+
+
+@patch("app.services.weather.weather_service.OPENWEATHER_API_KEY", "test")
+@patch("app.services.music.music_service.LASTFM_API_KEY", "test")
+def test_batch_larger_than_burst_succeeds_under_default_quotas():
+    """Test that a batch needing more weather calls than the burst queues instead of failing"""
+    fake = create_fake_upstreams(
+        UpstreamBehaviour(latency=0, jitter=0), UpstreamBehaviour(latency=0, jitter=0)
+    )
+    transport = httpx.ASGITransport(app=fake)
+    buckets = _create_rate_limiters()
+    cities = sorted(load_city_names().values())[: buckets[WEATHER_UPSTREAM].burst + 4]
+    items = [{"mood": "happy", "city": city} for city in cities]
+
+    with patch.dict(rate_limiters, buckets):
+        with TestClient(create_app({WEATHER_UPSTREAM: transport, MUSIC_UPSTREAM: transport})) as client:
+            response = client.post("/api/v1/recommendations/batch", json={"items": items})
+
+    assert response.status_code == 200
+    assert [result["status_code"] for result in response.json()["results"]] == [200] * len(cities)
+    assert fake.state.calls["weather"] == len(cities)
+    assert buckets[WEATHER_UPSTREAM].rejected == 0
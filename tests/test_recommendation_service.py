@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.services.music.models import Song
+from app.services.recommendation.recommendation_service import (
+    iter_ndjson_lines,
+    stream_recommendations,
+)
+from app.services.weather.models import (
+    WeatherCondition,
+    WeatherData,
+    WeatherTemperature,
+)
+
+mock_weather_data = WeatherData(
+    condition=WeatherCondition.CLEAR,
+    temperature=22.5,
+    temperature_category=WeatherTemperature.MILD,
+    humidity=45.0,
+    wind_speed=3.2,
+    description="clear sky",
+)
+
+mock_song = Song(title="Happy", artist="Pharrell Williams")
+
+
+async def as_chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_iter_ndjson_lines_handles_split_and_oversized_lines():
+    """Test that lines split across chunks are joined and oversized lines are skipped"""
+    chunks = as_chunks(b'{"a":', b' 1}\n\n', b"x" * 20, b"x" * 20 + b"\n", b'{"b": 2}')
+
+    lines = [line async for line in iter_ndjson_lines(chunks, max_line_bytes=16)]
+
+    assert lines == [b'{"a": 1}', None, b'{"b": 2}']
+
+
+@pytest.mark.asyncio
+@patch(
+    "app.services.recommendation.recommendation_service.get_weather_for_city",
+    new_callable=AsyncMock,
+)
+@patch(
+    "app.services.recommendation.recommendation_service.get_song_recommendation",
+    new_callable=AsyncMock,
+)
+async def test_stream_recommendations_applies_backpressure(mock_get_song, mock_get_weather):
+    """Test that the body is only read as fast as results are consumed"""
+    mock_get_weather.return_value = mock_weather_data
+    mock_get_song.return_value = mock_song
+    lines_read = 0
+
+    async def body():
+        nonlocal lines_read
+        for _ in range(10_000):
+            lines_read += 1
+            yield b'{"mood": "happy", "city": "London"}\n'
+
+    results = stream_recommendations(body(), concurrency=2, queue_size=4, max_line_bytes=1024)
+    first = await results.__anext__()
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    assert first.status_code == 200
+    # Only the bounded queues and in-flight workers hold items
+    assert lines_read <= 4 + 4 + 2 + 2
+    await results.aclose()
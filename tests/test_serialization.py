@@ -0,0 +1,62 @@
+import json
+import random
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.api.serialization import render_mood_response
+from app.services.mood.models import Mood, MoodResponse
+from app.services.music.models import Song
+from app.services.weather.models import WeatherCondition, WeatherData, WeatherTemperature
+
+
+def make_response(temperature, humidity=45.0, wind_speed=3.2, city="London", title="Happy"):
+    weather = WeatherData(
+        condition=WeatherCondition.CLEAR,
+        temperature=temperature,
+        temperature_category=WeatherTemperature.MILD,
+        humidity=humidity,
+        wind_speed=wind_speed,
+        description="clear sky",
+    )
+    return MoodResponse(
+        mood=Mood.HAPPY,
+        city=city,
+        weather=weather,
+        mood_matches_weather=True,
+        recommendation=Song(title=title, artist="Pharrell Williams", url=None),
+        explanation=f"It is {temperature}°C in {city}",
+    )
+
+
+@pytest.mark.parametrize(
+    "temperature",
+    [22.5, 0.0, -0.0, -12.0, 0.1 + 0.2, 1e-4, 1e15, 123456789.125],
+)
+def test_render_mood_response_matches_json_response(temperature):
+    """Test that pydantic's encoder writes the same bytes as FastAPI's JSONResponse"""
+    response = make_response(temperature)
+
+    assert render_mood_response(response) == JSONResponse(jsonable_encoder(response)).body
+
+
+@pytest.mark.parametrize("temperature", [1e-5, 1e16])
+def test_render_mood_response_matches_json_response_in_exponent_notation(temperature):
+    """Test that floats written in exponent notation decode to the same values"""
+    response = make_response(temperature)
+    expected = JSONResponse(jsonable_encoder(response)).body
+
+    assert json.loads(render_mood_response(response)) == json.loads(expected)
+
+
+def test_render_mood_response_matches_json_response_for_random_weather():
+    """Test byte compatibility over realistic readings and unusual text"""
+    rng = random.Random(20)
+    for _ in range(2000):
+        response = make_response(
+            temperature=round(rng.uniform(-60, 60), rng.randint(0, 3)),
+            humidity=float(rng.randint(0, 100)),
+            wind_speed=round(rng.uniform(0, 40), rng.randint(0, 4)),
+            city=rng.choice(["São Paulo", "Zürich", 'New "York"', "東京", "line\nbreak "]),
+            title=rng.choice(["Señorita", "\x7f\x01", "emoji 😀", "back\\slash"]),
+        )
+        assert render_mood_response(response) == JSONResponse(jsonable_encoder(response)).body
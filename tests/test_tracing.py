@@ -0,0 +1,118 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock
+from app import create_app
+from app.services.music.models import Song
+from app.services.tracing.exporters import FileSpanExporter
+from app.services.tracing.tracer import Tracer, parse_traceparent, tracer
+from app.services.weather.models import WeatherCondition, WeatherData, WeatherTemperature
+
+mock_weather_data = WeatherData(
+    condition=WeatherCondition.CLEAR,
+    temperature=22.5,
+    temperature_category=WeatherTemperature.MILD,
+    humidity=45.0,
+    wind_speed=3.2,
+    description="clear sky",
+)
+mock_song = Song(title="Happy", artist="Pharrell Williams")
+STAGES = ["weather", "song", "match", "explanation", "serialization"]
+
+
+def test_parse_traceparent():
+    """Test that only well-formed W3C traceparent headers are accepted"""
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    assert parse_traceparent(f"00-{trace_id}-{parent_id}-01") == (trace_id, parent_id, True)
+    assert parse_traceparent(f"00-{trace_id}-{parent_id}-00") == (trace_id, parent_id, False)
+    assert parse_traceparent(f"00-{'0' * 32}-{parent_id}-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+@pytest.mark.asyncio
+async def test_unsampled_requests_create_no_spans(tmp_path):
+    """Test that requests outside the sample produce nothing to export"""
+    local = Tracer(sample_rate=0)
+    local.start(FileSpanExporter(str(tmp_path / "traces.jsonl"), "test"))
+    with local.trace("recommendation") as span:
+        with local.span("weather") as child:
+            assert span is None and child is None
+    await local.aclose()
+    assert not (tmp_path / "traces.jsonl").exists()
+
+
+@pytest.mark.asyncio
+async def test_caller_sampled_flag_needs_trust(tmp_path):
+    """Test that a caller can only force sampling when its traceparent is trusted"""
+    traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    untrusted = Tracer(sample_rate=0)
+    untrusted.start(FileSpanExporter(str(tmp_path / "untrusted.jsonl"), "test"))
+    with untrusted.trace("recommendation", traceparent) as span:
+        assert span is None
+    await untrusted.aclose()
+
+    trusted = Tracer(sample_rate=0, trust_parent=True)
+    trusted.start(FileSpanExporter(str(tmp_path / "trusted.jsonl"), "test"))
+    with trusted.trace("recommendation", traceparent) as span:
+        assert span.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert span.parent_id == "00f067aa0ba902b7"
+    await trusted.aclose()
+
+
+@patch("app.api.endpoints.SERVER_TIMING", True)
+@patch("app.api.endpoints.get_song_recommendation", new_callable=AsyncMock)
+@patch("app.api.endpoints.get_weather_for_city", new_callable=AsyncMock)
+def test_recommendation_reports_server_timing_and_spans(mock_get_weather, mock_get_song, tmp_path, monkeypatch):
+    """Test the Server-Timing header and the exported spans of a traced request"""
+    mock_get_weather.return_value = mock_weather_data
+    mock_get_song.return_value = mock_song
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr("app.services.tracing.exporters.TRACE_FILE_PATH", str(path))
+    monkeypatch.setattr("app.TRACE_EXPORTER", "file")
+    monkeypatch.setattr(tracer, "sample_rate", 0)
+    monkeypatch.setattr(tracer, "trust_parent", True)
+
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    with TestClient(create_app()) as client:
+        response = client.post(
+            "/api/v1/recommendations",
+            json={"mood": "happy", "city": "London"},
+            headers={"traceparent": f"00-{trace_id}-{parent_id}-01"},
+        )
+        # Not sampled by the caller and outside the sample rate
+        client.post("/api/v1/recommendations", json={"mood": "happy", "city": "Paris"})
+
+    assert response.status_code == 200
+    timings = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert sorted(timings) == sorted(STAGES)
+
+    batches = [json.loads(line) for line in path.read_text().splitlines()]
+    spans = [
+        span
+        for batch in batches
+        for resource in batch["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+    root = next(span for span in spans if span["name"] == "recommendation")
+    assert root["traceId"] == trace_id
+    assert root["parentSpanId"] == parent_id
+    assert {"key": "city", "value": {"stringValue": "London"}} in root["attributes"]
+    children = [span for span in spans if span is not root]
+    assert sorted(span["name"] for span in children) == sorted(STAGES)
+    assert all(span["parentSpanId"] == root["spanId"] for span in children)
+    assert all(span["traceId"] == trace_id for span in children)
+
+
+@patch("app.api.endpoints.get_song_recommendation", new_callable=AsyncMock)
+@patch("app.api.endpoints.get_weather_for_city", new_callable=AsyncMock)
+def test_server_timing_is_off_by_default(mock_get_weather, mock_get_song):
+    """Test that responses carry no Server-Timing header unless it is enabled"""
+    mock_get_weather.return_value = mock_weather_data
+    mock_get_song.return_value = mock_song
+
+    response = TestClient(create_app()).post(
+        "/api/v1/recommendations", json={"mood": "happy", "city": "London"}
+    )
+    assert "server-timing" not in response.headers
@@ -0,0 +1,61 @@
+import random
+import pytest
+from app.services.music.models import Song
+from app.services.music.track_pool import TrackPool, _alias_table
+
+
+def test_alias_table_preserves_weights():
+    """Test that the alias table gives every index exactly its share of the weight"""
+    weights = [1 / (5 + rank) for rank in range(50)]
+    probabilities, aliases = _alias_table(weights)
+
+    # Each column holds 1/n of the mass, split between itself and its alias
+    shares = [0.0] * len(weights)
+    for column, (probability, alias) in enumerate(zip(probabilities, aliases)):
+        shares[column] += probability / len(weights)
+        shares[alias] += (1 - probability) / len(weights)
+
+    total = sum(weights)
+    assert shares == pytest.approx([weight / total for weight in weights])
+
+
+def test_sample_favours_better_ranked_tracks():
+    """Test that sampling draws every track, the top ranked ones more often"""
+    pool = TrackPool.from_fields(
+        [(f"Song {rank}", "Artist", None) for rank in range(20)], rank_offset=2
+    )
+    random.seed(7)
+    counts = {}
+    for _ in range(20000):
+        song = pool.sample()
+        counts[song.title] = counts.get(song.title, 0) + 1
+
+    assert len(counts) == 20
+    assert counts["Song 0"] > counts["Song 5"] > counts["Song 19"]
+    # Rank 0 has weight 1/2 out of a total of about 2.02
+    assert counts["Song 0"] / 20000 == pytest.approx(0.5 / sum(1 / (2 + r) for r in range(20)), abs=0.02)
+
+
+def test_from_tracks_keeps_only_song_fields():
+    """Test that Last.fm dictionaries are reduced to prebuilt songs"""
+    pool = TrackPool.from_tracks(
+        [
+            {
+                "name": "Happy",
+                "artist": {"name": "Pharrell Williams", "mbid": "x"},
+                "url": "https://www.last.fm/music/Pharrell+Williams/_/Happy",
+                "image": [{"#text": "https://example.com/a.png", "size": "small"}],
+            },
+            {"artist": {}},
+        ],
+        rank_offset=5,
+    )
+
+    assert pool[0] == Song(
+        title="Happy",
+        artist="Pharrell Williams",
+        url="https://www.last.fm/music/Pharrell+Williams/_/Happy",
+    )
+    assert pool.fields()[1] == ("Unknown Title", "Unknown Artist", None)
+    assert pool.sample() in pool.songs
+    assert not TrackPool((), rank_offset=5)
@@ -0,0 +1,116 @@
+import os
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.error.exceptions import MusicAPIError
+from app.services.mood.models import Mood
+from app.services.music import music_service
+from app.services.music.config import MOOD_MUSIC_TAGS
+from app.services.music.music_service import (
+    get_song_recommendation,
+    load_track_snapshot,
+    save_track_snapshot,
+    tag_pool_cache,
+)
+from app.services.music.track_pool import TrackPool
+from app.services.music.track_snapshot import (
+    TrackSnapshot,
+    decode_track_pool,
+    encode_track_pool,
+    write_snapshot,
+)
+
+pools = {
+    "happy": [
+        ("Happy", "Pharrell Williams", "https://www.last.fm/music/Pharrell+Williams/_/Happy"),
+        ("Walking on Sunshine", "Katrina & The Waves", None),
+    ],
+    "feel good": [("Señorita", "Shawn Mendes", "https://www.last.fm/music/Shawn+Mendes/_/Se%C3%B1orita")],
+}
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that pools written to a snapshot read back unchanged"""
+    path = tmp_path / "tracks.snapshot"
+    write_snapshot(str(path), pools)
+
+    snapshot = TrackSnapshot(str(path))
+    try:
+        assert snapshot.tags() == ["happy", "feel good"]
+        assert snapshot.track_fields("happy") == pools["happy"]
+        assert snapshot.track_fields("feel good") == pools["feel good"]
+        assert snapshot.track_fields("sad") is None
+    finally:
+        snapshot.close()
+
+    # The temporary file is renamed into place, nothing is left behind
+    assert os.listdir(tmp_path) == ["tracks.snapshot"]
+
+
+def test_track_pool_codec_round_trip():
+    """Test that a single pool encoded for the L2 cache decodes unchanged"""
+    assert decode_track_pool(encode_track_pool(pools["happy"])) == pools["happy"]
+    assert decode_track_pool(encode_track_pool([])) == []
+
+
+def test_snapshot_rejects_foreign_files(tmp_path):
+    """Test that a file without the snapshot header is refused"""
+    path = tmp_path / "tracks.snapshot"
+    path.write_bytes(b"not a snapshot")
+
+    with pytest.raises(ValueError):
+        TrackSnapshot(str(path))
+    assert load_track_snapshot(str(path)) == 0
+
+
+@pytest.mark.asyncio
+@patch("app.services.music.music_service.LASTFM_API_KEY", "test")
+@patch("app.services.music.music_service.get_top_tracks_by_tag", new_callable=AsyncMock)
+async def test_recommendations_served_from_snapshot_when_lastfm_is_down(mock_get_tracks, tmp_path, monkeypatch):
+    """Test that a new worker recommends from the snapshot without reaching Last.fm"""
+    monkeypatch.setattr(music_service, "track_snapshot", None)
+    mock_get_tracks.side_effect = MusicAPIError("Error connecting to music service")
+
+    path = str(tmp_path / "tracks.snapshot")
+    for tag in MOOD_MUSIC_TAGS["happy"]:
+        tag_pool_cache.set(tag, TrackPool.from_fields([("Happy", "Pharrell Williams", None)], rank_offset=5))
+    assert save_track_snapshot(path) == len(MOOD_MUSIC_TAGS["happy"])
+    tag_pool_cache.clear()
+
+    assert load_track_snapshot(path) == len(MOOD_MUSIC_TAGS["happy"])
+    song = await get_song_recommendation(Mood.HAPPY)
+    assert song.title == "Happy"
+    assert song.artist == "Pharrell Williams"
+
+    # Once the seeded pool is gone, the snapshot still answers for the tag
+    tag_pool_cache.clear()
+    assert (await music_service.get_tag_pool("happy"))[0].title == "Happy"
+    music_service.track_snapshot.close()
+
+
+@pytest.mark.asyncio
+@patch("app.services.music.music_service.LASTFM_API_KEY", "test")
+@patch("app.services.music.music_service.get_top_tracks_by_tag", new_callable=AsyncMock)
+async def test_truncated_snapshot_falls_back_to_last_fm(mock_get_tracks, tmp_path, monkeypatch):
+    """Test that a partly copied snapshot is ignored instead of failing startup"""
+    monkeypatch.setattr(music_service, "track_snapshot", None)
+    path = tmp_path / "tracks.snapshot"
+    write_snapshot(str(path), pools)
+    data = path.read_bytes()
+
+    # Cut inside the tag index: nothing can be read
+    path.write_bytes(data[:20])
+    with pytest.raises(ValueError):
+        TrackSnapshot(str(path))
+    assert load_track_snapshot(str(path)) == 0
+
+    # Cut inside the last tag's records: the intact tag is still seeded
+    path.write_bytes(data[:-10])
+    assert load_track_snapshot(str(path)) == 1
+    assert "happy" in tag_pool_cache
+    assert "feel good" not in tag_pool_cache
+
+    # The damaged tag is not served from the snapshot when Last.fm fails
+    mock_get_tracks.side_effect = MusicAPIError("Error connecting to music service")
+    with pytest.raises(MusicAPIError):
+        await music_service.get_tag_pool("feel good")
+    music_service.track_snapshot.close()
@@ -1,10 +1,23 @@
+import asyncio
+import gzip
+import json
+import numpy as np
 import pytest
 import httpx
 from unittest.mock import patch, MagicMock
-from app.error.exceptions import WeatherAPIError
+from fastapi.testclient import TestClient
+from app import create_app
+from app.error.exceptions import CityNotFoundError, WeatherAPIError
+from app.services.weather.city_index import CityIndex, canonical_city_key, city_index
+from app.services.weather.config import TEMPERATURE_RANGES
 from app.services.weather.weather_service import (
+    TEMPERATURE_CATEGORIES,
     categorize_temperature,
+    categorize_temperatures,
+    decode_weather,
+    encode_weather,
     get_weather_for_city,
+    negative_city_cache,
     process_weather_data,
 )
 
@@ -107,3 +120,205 @@ def test_categorize_temperature():
     assert categorize_temperature(20) == "mild"
     assert categorize_temperature(27) == "warm"
     assert categorize_temperature(35) == "hot"
+
+
+@pytest.mark.asyncio
+@patch("app.services.weather.weather_service.fetch_weather_for_city")
+async def test_get_weather_for_city_shares_cache_across_spellings(mock_fetch):
+    """Test that spelling variants of a city share one upstream fetch"""
+    mock_fetch.return_value = process_weather_data(mock_weather_response)
+
+    first = await get_weather_for_city("London")
+    second = await get_weather_for_city("  london ")
+
+    assert first == second
+    assert mock_fetch.call_count == 1
+
+
+def test_city_index_resolves_names_and_aliases():
+    """Test that names, aliases and country-qualified names share one city ID"""
+    assert city_index.resolve("London").id == 2643743
+    assert city_index.resolve("  london ,  gb ").id == 2643743
+    assert city_index.resolve("Bombay") == city_index.resolve("mumbai")
+    assert city_index.resolve("NonExistentCity") is None
+
+    assert canonical_city_key("NYC") == canonical_city_key("New York")
+    assert canonical_city_key("Springfield ") == "springfield"
+
+
+def test_city_index_reads_openweather_city_list(tmp_path):
+    """Test that OpenWeather's city.list.json export, plain or gzipped, can be the index"""
+    entries = [
+        {"id": 2643743, "name": "London", "state": "", "country": "GB", "coord": {"lon": -0.1257, "lat": 51.5085}},
+        {"id": 4119617, "name": "London", "state": "AR", "country": "US", "coord": {"lon": -93.2532, "lat": 35.3289}},
+    ]
+    plain = tmp_path / "city.list.json"
+    plain.write_text(json.dumps(entries), encoding="utf-8")
+    packed = tmp_path / "city.list.json.gz"
+    packed.write_bytes(gzip.compress(json.dumps(entries).encode("utf-8")))
+
+    for path in (plain, packed):
+        index = CityIndex(str(path))
+        assert index.resolve("London, GB").id == 2643743
+        assert index.resolve("London, US").id == 4119617
+        assert index.resolve("London, US").lat == 35.3289
+
+
+def test_city_index_leaves_out_names_shared_by_several_cities(tmp_path):
+    """Test that ambiguous names are not resolved to an arbitrary namesake"""
+    path = tmp_path / "cities.tsv"
+    path.write_text(
+        "2643743\tLondon\tGB\t51.5085\t-0.1257\t\n"
+        "6058560\tLondon\tCA\t42.9834\t-81.2330\t\n"
+        "4409896\tSpringfield\tUS\t37.2153\t-93.2982\t\n"
+        "4250542\tSpringfield\tUS\t39.8017\t-89.6437\t\n"
+        "2988507\tParis\tFR\t48.8534\t2.3488\tlutetia\n",
+        encoding="utf-8",
+    )
+    index = CityIndex(str(path))
+
+    # Several cities answer to the name, so the upstream q= lookup decides
+    assert index.resolve("London") is None
+    assert index.resolve("Springfield, US") is None
+    # A country code or an unambiguous name still resolves exactly
+    assert index.resolve("London, CA").id == 6058560
+    assert index.resolve("London, GB").id == 2643743
+    assert index.resolve("Lutetia").id == index.resolve("Paris").id == 2988507
+
+
+def test_city_index_is_loaded_off_the_event_loop_at_startup():
+    """Test that the app parses the city index in a worker thread before serving"""
+    index = CityIndex(city_index.path)
+    on_event_loop = []
+    load = index._load
+
+    def recording_load():
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return load()
+
+    with patch.object(index, "_load", recording_load), patch("app.city_index", index):
+        with TestClient(create_app()):
+            assert index.resolve("London").id == 2643743
+
+    assert on_event_loop == [False]
+
+
+@pytest.mark.asyncio
+@patch("app.services.weather.weather_service.CITY_INDEX_STRICT", True)
+@patch("httpx.AsyncClient.get")
+async def test_get_weather_for_city_strict_index_rejects_unknown_city(mock_get):
+    """Test that unknown cities are rejected before any network call in strict mode"""
+    with pytest.raises(WeatherAPIError) as excinfo:
+        await get_weather_for_city("NonExistentCity")
+
+    assert "not found" in str(excinfo.value)
+    mock_get.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch("app.services.weather.weather_service.OPENWEATHER_API_KEY", "test")
+@patch("httpx.AsyncClient.get")
+async def test_get_weather_for_city_fetches_indexed_city_by_id(mock_get):
+    """Test that indexed cities are requested by OpenWeather city ID"""
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = mock_weather_response
+    mock_get.return_value = mock_response
+
+    await get_weather_for_city("london")
+
+    params = mock_get.call_args.kwargs["params"]
+    assert params["id"] == 2643743
+    assert "q" not in params
+
+
+@pytest.mark.asyncio
+@patch("app.services.weather.weather_service.OPENWEATHER_API_KEY", "test")
+@patch("httpx.AsyncClient.get")
+async def test_get_weather_for_city_remembers_unknown_cities(mock_get):
+    """Test that a repeated unknown city is refused without another upstream call"""
+    mock_response = MagicMock()
+    mock_response.status_code = 404
+    mock_get.return_value = mock_response
+
+    for city in ("Londn", " londn ", "LONDN"):
+        with pytest.raises(CityNotFoundError) as excinfo:
+            await get_weather_for_city(city)
+        assert "not found" in str(excinfo.value)
+
+    assert mock_get.call_count == 1
+    stats = negative_city_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+    # Once the entry expires, the city is tried again
+    negative_city_cache.invalidate("londn")
+    with pytest.raises(CityNotFoundError):
+        await get_weather_for_city("Londn")
+    assert mock_get.call_count == 2
+
+    caches = TestClient(create_app()).get("/health/caches").json()["caches"]
+    assert caches["negative_city"]["size"] == 1
+    assert caches["negative_city"]["hits"] == 2
+
+
+@pytest.mark.asyncio
+@patch("app.services.weather.weather_service.OPENWEATHER_API_KEY", "test")
+@patch("httpx.AsyncClient.get")
+async def test_get_weather_for_city_does_not_remember_upstream_errors(mock_get):
+    """Test that only 404s are negatively cached, not outages"""
+    mock_get.side_effect = httpx.RequestError("Connection error")
+
+    for _ in range(2):
+        with pytest.raises(WeatherAPIError):
+            await get_weather_for_city("Londn")
+
+    assert mock_get.call_count == 2
+    assert len(negative_city_cache) == 0
+
+
+def reference_categorize_temperature(temp):
+    """The original linear scan over TEMPERATURE_RANGES"""
+    for category, (min_temp, max_temp) in TEMPERATURE_RANGES.items():
+        if min_temp <= temp < max_temp:
+            return category
+    return None
+
+
+def test_categorize_temperature_matches_linear_scan_in_range():
+    """Test that the bisect lookup agrees with the range scan on in-range values"""
+    temps = [t / 4 for t in range(-200, 200)] + [-50, 0, 10, 18, 24, 30, 49.999, -0.001]
+    for temp in temps:
+        assert categorize_temperature(temp) == reference_categorize_temperature(temp)
+
+
+def test_categorize_temperature_out_of_range():
+    """Test that readings outside the ranges clamp to the coldest and hottest category"""
+    assert categorize_temperature(-60) == "freezing"
+    assert categorize_temperature(50) == "hot"
+    assert categorize_temperature(57.3) == "hot"
+    assert categorize_temperature(float("nan")) == "mild"
+
+
+def test_categorize_temperatures_batch():
+    """Test that the vectorized categorizer agrees with the scalar one"""
+    temps = np.array([t / 4 for t in range(-260, 260)] + [float("nan")])
+
+    codes = categorize_temperatures(temps)
+
+    assert codes.shape == temps.shape
+    assert [TEMPERATURE_CATEGORIES[code] for code in codes] == [
+        categorize_temperature(temp) for temp in temps
+    ]
+
+
+def test_weather_codec_round_trip():
+    """Test that the compact L2 encoding restores weather data unchanged"""
+    weather = process_weather_data(mock_weather_response)
+    data = encode_weather(weather)
+
+    assert decode_weather(data) == weather
+    assert len(data) < len(weather.model_dump_json())